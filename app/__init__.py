@@ -1,26 +1,180 @@
-from flask import Flask
-from app.db import init_db
 import os
-from app.routes import blueprints  # Import all routes
+from app.startup import StartupProfile, WorkerStartup, import_phase
+
+# Each group of imports is timed for the startup profile (/startup/profile)
+with import_phase("flask"):
+    from flask import Flask
+with import_phase("database (SQLAlchemy)"):
+    from app.db import init_db, replicas
+with import_phase("application modules"):
+    from app.auth import require_token
+    from app.metrics import init_metrics
+    from app.cache import init_cache, book_cache, book_loads
+    from app.idempotency import init_idempotency, idempotency_store
+    from app.ratelimit import init_rate_limit, rate_limiter
+    from app.search import init_search
+    from app.inventory import start_reservation_sweeper
+    from app.serializers import init_json
+    from app.compression import init_compression
+    from app.cli import init_cli
+with import_phase("routes"):
+    from app.routes import blueprints  # Import all routes
+
+def load_config(app):
+    """
+    Load the application configuration from environment variables.
+    Shared by the WSGI app and the asyncio app (app.aio) so both modes read the same settings.
+
+    Args:
+        app: The Flask (or Quart) application instance.
+    """
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')  # Database connection string
+    app.config['DATABASE_REPLICA_URLS'] = os.getenv('DATABASE_REPLICA_URLS')  # Comma-separated read replicas for GET requests
+    app.config['REPLICA_STRATEGY'] = os.getenv('REPLICA_STRATEGY', 'round_robin')  # round_robin or least_connections
+    app.config['REPLICA_POOL_SIZE'] = os.getenv('REPLICA_POOL_SIZE')  # Pool size per replica (default: the primary's)
+    app.config['REPLICA_MAX_OVERFLOW'] = os.getenv('REPLICA_MAX_OVERFLOW')  # Pool overflow per replica (default: the primary's)
+    app.config['REPLICA_RETRY_INTERVAL'] = float(os.getenv('REPLICA_RETRY_INTERVAL', 30))  # Seconds a failed replica stays out of rotation
+    app.config['READ_YOUR_WRITES_SECONDS'] = float(os.getenv('READ_YOUR_WRITES_SECONDS', 5))  # Reads pinned to the primary after a write
+    app.config['ASYNC_DATABASE_URL'] = os.getenv('ASYNC_DATABASE_URL')  # Async-driver URL for app.aio (derived from DATABASE_URL if unset)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False  # Disable SQLAlchemy event system to save resources
+    app.config['SERVER_WORKERS'] = int(os.getenv('WEB_CONCURRENCY', 0))  # Worker processes (0 = not preforked)
+    app.config['SERVER_THREADS'] = int(os.getenv('WEB_THREADS', 0))  # Handler threads per worker; sizes the DB pool
+    app.config['DB_POOL_SIZE'] = os.getenv('DB_POOL_SIZE')  # Overrides the pool size derived from SERVER_THREADS
+    app.config['DB_MAX_OVERFLOW'] = os.getenv('DB_MAX_OVERFLOW')  # Overrides the derived pool overflow
+    app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', '1') != '0'  # Per-endpoint timings and pool stats at /metrics
+    app.config['SLOW_QUERY_MS'] = float(os.getenv('SLOW_QUERY_MS', 0))  # Log statements slower than this (0 disables)
+    app.config['JSON_ENCODER'] = os.getenv('JSON_ENCODER', 'auto')  # auto (orjson when installed), orjson or json
+    app.config['COMPRESSION_ENABLED'] = os.getenv('COMPRESSION_ENABLED', '1') != '0'  # Compress responses the client accepts compressed
+    app.config['COMPRESSION_ALGORITHMS'] = os.getenv('COMPRESSION_ALGORITHMS', 'zstd,br,gzip')  # Codings in order of preference (zstd/br when installed)
+    app.config['COMPRESSION_MIN_SIZE'] = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))  # Bodies smaller than this are sent as is
+    app.config['COMPRESSION_LEVEL'] = int(os.getenv('COMPRESSION_LEVEL', 6))  # gzip level (1-9)
+    app.config['COMPRESSION_BR_LEVEL'] = int(os.getenv('COMPRESSION_BR_LEVEL', 4))  # brotli quality (0-11)
+    app.config['COMPRESSION_ZSTD_LEVEL'] = int(os.getenv('COMPRESSION_ZSTD_LEVEL', 3))  # zstd level (1-22)
+    app.config['LIST_STREAM_THRESHOLD'] = int(os.getenv('LIST_STREAM_THRESHOLD', 100))  # Listing pages larger than this are streamed
+    app.config['RATE_LIMIT_ENABLED'] = os.getenv('RATE_LIMIT_ENABLED', '1') != '0'  # Token-bucket limits on the books and customers API
+    app.config['RATE_LIMIT_BACKEND'] = os.getenv('RATE_LIMIT_BACKEND', 'memory')  # memory (per worker) or redis (shared)
+    app.config['RATE_LIMIT_REDIS_URL'] = os.getenv('RATE_LIMIT_REDIS_URL')  # Shared buckets connection string (default: CACHE_REDIS_URL)
+    app.config['RATE_LIMIT_RATE'] = float(os.getenv('RATE_LIMIT_RATE', 50))  # Requests per second per client and endpoint
+    app.config['RATE_LIMIT_BURST'] = float(os.getenv('RATE_LIMIT_BURST', 100))  # Requests a client may send at once
+    app.config['RATE_LIMIT_ENDPOINTS'] = os.getenv('RATE_LIMIT_ENDPOINTS')  # Per-endpoint overrides, e.g. books.add_books_batch=1:5
+    app.config['RATE_LIMIT_BLUEPRINTS'] = os.getenv('RATE_LIMIT_BLUEPRINTS', 'books,customers,inventory,transfer')  # Blueprints that are limited
+    app.config['RATE_LIMIT_CLIENT_HEADER'] = os.getenv('RATE_LIMIT_CLIENT_HEADER')  # Header identifying clients (default: peer address)
+    app.config['BOOK_CACHE_BACKEND'] = os.getenv('BOOK_CACHE_BACKEND', 'memory')  # memory, redis or none
+    app.config['BOOK_CACHE_MAXSIZE'] = int(os.getenv('BOOK_CACHE_MAXSIZE', 10000))  # Max books held in-process
+    app.config['BOOK_CACHE_TTL'] = float(os.getenv('BOOK_CACHE_TTL', 300))  # Seconds a cached book stays valid
+    app.config['CACHE_REDIS_URL'] = os.getenv('CACHE_REDIS_URL')  # Shared cache connection string
+    app.config['IDEMPOTENCY_BACKEND'] = os.getenv('IDEMPOTENCY_BACKEND', 'memory')  # memory, redis or none (Idempotency-Key ignored)
+    app.config['IDEMPOTENCY_MAXSIZE'] = int(os.getenv('IDEMPOTENCY_MAXSIZE', 10000))  # Max idempotency keys held in-process
+    app.config['IDEMPOTENCY_TTL'] = float(os.getenv('IDEMPOTENCY_TTL', 86400))  # Seconds a response is replayed for its Idempotency-Key
+    app.config['BOOK_BATCH_CHUNK_SIZE'] = int(os.getenv('BOOK_BATCH_CHUNK_SIZE', 1000))  # Rows per bulk INSERT
+    app.config['BOOK_BATCH_MAX_ITEMS'] = int(os.getenv('BOOK_BATCH_MAX_ITEMS', 10000))  # Max items per JSON batch
+    app.config['CATALOG_HTTP_TOKEN'] = os.getenv('CATALOG_HTTP_TOKEN')  # Bearer token enabling /catalog export/import and the operator stats endpoints over HTTP (unset: off)
+    app.config['TRANSFER_BATCH_SIZE'] = int(os.getenv('TRANSFER_BATCH_SIZE', 5000))  # Rows per batch when exporting or importing tables
+    app.config['SEARCH_INDEX_PATH'] = os.getenv('SEARCH_INDEX_PATH')  # File the search index is persisted to (workers may share it)
+    app.config['SEARCH_REFRESH_INTERVAL'] = float(os.getenv('SEARCH_REFRESH_INTERVAL', 30))  # Seconds before a search picks up other workers' writes (0 disables)
+    app.config['RESERVATION_TTL'] = int(os.getenv('RESERVATION_TTL', 900))  # Default seconds a reservation holds stock
+    app.config['RESERVATION_MAX_TTL'] = int(os.getenv('RESERVATION_MAX_TTL', 3600))  # Longest hold a client may ask for
+    app.config['RESERVATION_SWEEP_INTERVAL'] = float(os.getenv('RESERVATION_SWEEP_INTERVAL', 30))  # 0 disables the sweeper
+    app.config['STARTUP_WARM_UP'] = os.getenv('STARTUP_WARM_UP', 'sync')  # sync, background or lazy (see app/startup.py)
+    app.config['SEARCH_WARM_UP'] = os.getenv('SEARCH_WARM_UP', '0') == '1'  # Build the search index during warm-up, not on the first search
+    app.config['ISBN_REDIRECTS'] = os.getenv('ISBN_REDIRECTS', '0') == '1'  # GET of an ISBN-10 or hyphenated ISBN redirects to the stored book (needs isbn13 backfilled)
+    app.config['USER_ID_ANY_CASE'] = os.getenv('USER_ID_ANY_CASE', '0') == '1'  # GET /customers?userId= also matches one customer in another letter case (needs user_id_lower backfilled)
+
 
 def create_app():
+    # Time every initialization step for the startup profile
+    profile = StartupProfile()
+
     # Create a Flask application instance
-    app = Flask(__name__)
+    with profile.phase("create Flask app"):
+        app = Flask(__name__)
 
     # Load configuration from environment variables
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')  # Database connection string
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False  # Disable SQLAlchemy event system to save resources
+    with profile.phase("load config"):
+        load_config(app)
+
+    # Use the fastest available JSON encoder for responses
+    with profile.phase("init JSON"):
+        init_json(app)
+
+    # Compress responses with the best coding the client accepts
+    with profile.phase("init compression"):
+        init_compression(app)
+
+    # Initialize the database with the Flask app (no connection is opened here)
+    with profile.phase("init database"):
+        init_db(app)
 
-    # Initialize the database with the Flask app
-    init_db(app)
+    # Time requests, SQL statements and pool checkouts per endpoint
+    with profile.phase("init metrics"):
+        init_metrics(app)
+
+    # Turn away clients that exceed their request rate before they reach the connection pool
+    with profile.phase("init rate limit"):
+        init_rate_limit(app)
+
+    # Initialize the read-through caches
+    with profile.phase("init cache"):
+        init_cache(app)
+
+    # Remember the responses of POSTs sent with an Idempotency-Key, so client retries are replayed
+    with profile.phase("init idempotency"):
+        init_idempotency(app)
+
+    # Initialize the full-text search index (built lazily on first use, or during warm-up)
+    with profile.phase("init search"):
+        init_search(app)
 
     # Register all blueprints (modularized routes) with the Flask app
-    for blueprint in blueprints:
-        app.register_blueprint(blueprint)
+    with profile.phase("register blueprints"):
+        for blueprint in blueprints:
+            app.register_blueprint(blueprint)
+
+    # Register the `flask catalog` export/import commands
+    with profile.phase("init CLI"):
+        init_cli(app)
+
+    # Release expired reservations in the background
+    with profile.phase("start reservation sweeper"):
+        start_reservation_sweeper(app)
+
+    # Warm-up and readiness of this worker; the server starts the warm-up once the worker has forked
+    startup = WorkerStartup(app, profile)
+    app.extensions['startup'] = startup
 
     # Define a simple status route to check if the app is running
     @app.route("/status")
     def home():
         return {"message": "OK"}  # Return a JSON response indicating the app is running
 
+    # Report whether this worker's pools and indexes are warm; 503 until they are
+    @app.route("/ready")
+    def ready():
+        report = startup.report()
+        return report, 200 if report["ready"] else 503
+
+    # Show where this worker's startup time went
+    @app.route("/startup/profile")
+    @require_token
+    def startup_profile():
+        return profile.report()
+
+    # Expose cache counters so the cache can be sized from real traffic
+    @app.route("/cache/stats")
+    @require_token
+    def cache_stats():
+        return {"books": book_cache.stats(), "book_loads": book_loads.stats(), "idempotency": idempotency_store.stats()}
+
+    # Show the rate limiter's settings and how many requests it turned away
+    @app.route("/ratelimit/stats")
+    @require_token
+    def rate_limit_stats():
+        return rate_limiter.stats()
+
+    # Show which read replicas are in rotation
+    @app.route("/db/replicas")
+    @require_token
+    def replica_stats():
+        return replicas.stats()
+
     return app  # Return the configured Flask app instance
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""
+Asyncio serving mode.
+
+The same books and customers API as the WSGI app, served by Quart on SQLAlchemy's asyncio
+engine (aiomysql for MySQL, aiosqlite for SQLite), so one worker process can keep many requests
+in flight while they wait on the database instead of needing a thread per request. Validation,
+serialization, conditional requests and the book cache and search index are shared with the
+WSGI app.
+
+Inventory routes (reservations and purchases), the reservation sweeper and /metrics are only
+served by the WSGI app.
+
+Requires the packages in requirements-async.txt. Serve with:
+    python -m app.serve --mode async
+"""
+from quart import Quart, request
+from app import load_config
+from app.aio.db import aio_db, init_async_db, warm_up_async_db
+from app.auth import require_token_async
+from app.cache import init_cache, book_cache
+from app.idempotency import init_idempotency, idempotency_store
+from app.ratelimit import rate_limiter
+from app.search import init_search
+from app.serializers import init_json
+from app.aio.routes import blueprints  # Import all async routes
+from app.aio.routes.books import book_loads
+
+
+def create_async_app():
+    # Create a Quart application instance
+    app = Quart(__name__)
+
+    # Load the same configuration as the WSGI app
+    load_config(app)
+
+    # Use the fastest available JSON encoder for responses
+    init_json(app)
+
+    # Create the asyncio engine (no connection is opened yet)
+    init_async_db(app)
+
+    # Turn away clients that exceed their request rate, with the same limits as the WSGI app
+    rate_limiter.init_app(app)
+
+    @app.before_request
+    async def limit_request():
+        return rate_limiter.check(request)
+
+    # Initialize the read-through caches
+    init_cache(app)
+
+    # Remember the responses of POSTs sent with an Idempotency-Key, so client retries are replayed
+    init_idempotency(app)
+
+    # Initialize the full-text search index (built lazily on first use)
+    init_search(app)
+
+    # Register all blueprints with the Quart app
+    for blueprint in blueprints:
+        app.register_blueprint(blueprint)
+
+    # Open this worker's connections before it accepts requests, and close them on shutdown
+    app.extensions['db_ready'] = False
+
+    @app.before_serving
+    async def connect():
+        app.extensions['db_ready'] = await warm_up_async_db()
+
+    @app.after_serving
+    async def disconnect():
+        await aio_db.engine.dispose()
+
+    # Define a simple status route to check if the app is running
+    @app.route("/status")
+    async def home():
+        return {"message": "OK"}
+
+    # Report whether this worker's pool is open; 503 (retrying the warm-up on each call) until it is
+    @app.route("/ready")
+    async def ready():
+        if not app.extensions['db_ready']:
+            app.extensions['db_ready'] = await warm_up_async_db()
+        return {"ready": app.extensions['db_ready'], "components": {"database": app.extensions['db_ready']}}, \
+            200 if app.extensions['db_ready'] else 503
+
+    # Expose cache counters so the cache can be sized from real traffic
+    @app.route("/cache/stats")
+    @require_token_async
+    async def cache_stats():
+        return {"books": book_cache.stats(), "book_loads": book_loads.stats(), "idempotency": idempotency_store.stats()}
+
+    return app
@@ -0,0 +1,111 @@
+from quart import current_app, g
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db import pool_settings
+
+# Async drivers used in place of the sync DBAPI named in DATABASE_URL
+ASYNC_DRIVERS = {
+    'mysql': 'aiomysql',
+    'sqlite': 'aiosqlite',
+}
+
+
+def async_database_url(url):
+    """
+    Derives the asyncio-driver URL from the sync DATABASE_URL, e.g.
+    mysql+pymysql://... -> mysql+aiomysql://... and sqlite:///... -> sqlite+aiosqlite:///...
+
+    Args:
+        url (str): The sync database URL.
+    Returns:
+        str: The URL for SQLAlchemy's asyncio engine.
+    Raises:
+        ValueError: If no async driver is known for the database.
+    """
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {url.get_backend_name()}; set ASYNC_DATABASE_URL.")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+class AsyncDatabase:
+    """
+    Owns the asyncio engine and hands out one AsyncSession per request.
+
+    The engine is sized with the same pool settings as the sync app. Sessions keep their
+    attributes after commit (expire_on_commit=False), because reloading an expired attribute
+    would need an implicit await.
+    """
+
+    def __init__(self):
+        self.engine = None
+        self.sessionmaker = None
+
+    def init_app(self, app):
+        pool_size, max_overflow = pool_settings(app)
+        url = app.config.get('ASYNC_DATABASE_URL') or async_database_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        self.engine = create_async_engine(
+            url,
+            pool_size=pool_size,          # Persistent connections kept per worker process
+            max_overflow=max_overflow,    # Additional connections allowed beyond the pool size
+            pool_timeout=30,              # Wait up to 30 seconds for a connection to become available
+            pool_recycle=1800             # Recycle connections after 30 minutes to prevent stale connections
+        )
+        self.sessionmaker = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+
+        @app.teardown_appcontext
+        async def close_session(exception=None):
+            session = g.pop('db_session', None)
+            if session is not None:
+                await session.close()
+
+        app.extensions['async_db'] = self
+
+    @property
+    def session(self):
+        """
+        The current request's session, opened on first use and closed when the request ends.
+        """
+        session = g.get('db_session')
+        if session is None:
+            session = g.db_session = self.sessionmaker()
+        return session
+
+
+# Asyncio counterpart of app.db.db
+aio_db = AsyncDatabase()
+
+
+def init_async_db(app):
+    """
+    Create the asyncio engine for the Quart app. No connection is opened until the first request.
+
+    Args:
+        app: The Quart application instance.
+    """
+    aio_db.init_app(app)
+
+
+async def warm_up_async_db(connections=1):
+    """
+    Open pooled connections before serving so the first requests do not pay for connecting.
+
+    Args:
+        connections (int): The number of pooled connections to establish.
+    Returns:
+        bool: True if the database answered, False otherwise.
+    """
+    try:
+        held = [await aio_db.engine.connect() for _ in range(max(1, connections))]
+        await held[0].execute(text('SELECT 1'))
+        for connection in held:
+            await connection.close()
+        current_app.logger.info("Database connected successfully.")
+        return True
+    except SQLAlchemyError as e:
+        current_app.logger.error(f"Database connection error: {e}")
+        return False
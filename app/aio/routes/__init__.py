@@ -0,0 +1,5 @@
+from app.aio.routes.books import books_bp  # Import the async books blueprint
+from app.aio.routes.customer import customer_bp  # Import the async customer blueprint
+
+# List of all blueprints served in async mode
+blueprints = [books_bp, customer_bp]
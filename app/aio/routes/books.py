@@ -0,0 +1,561 @@
+import asyncio
+import json
+from datetime import datetime
+from quart import Blueprint, Response, current_app, jsonify, redirect, request, stream_with_context, url_for
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from app.models.book import Book  # Import the Book model
+from app.aio.db import aio_db  # Import the asyncio database for non-blocking queries
+from app.cache import AsyncSingleFlight, book_cache  # Import the read-through book cache and load coalescing
+from app.search import book_search  # Import the full-text search index
+from app.validation import BOOK_SCHEMA, BOOK_UPDATE_SCHEMA, error_body  # Import the precompiled validators
+from app.serializers import BOOK_FIELDS, columns_for, parse_fields, project, serialize_book  # Import the serializers
+from app.conditional import (  # Import the HTTP conditional request helpers
+    if_match_failed, is_not_modified, make_etag, not_modified_response, with_validators
+)
+from app.routes.books import (  # Reuse the request-independent pieces of the WSGI handlers
+    LIST_MAX_LIMIT, LIST_SORT_COLUMNS, MAX_BULK_KEYS, cache_book, drop_existing, encode_cursor, isbn13_statement, list_conditions,
+    validate_books
+)
+
+# Create a Blueprint for books-related routes; same name and URLs as the WSGI blueprint
+books_bp = Blueprint('books', __name__, url_prefix='/books')
+
+# Coalesces concurrent database loads of the same book on a cache miss
+book_loads = AsyncSingleFlight()
+
+# Serializes the first search index build so concurrent requests wait for it instead of repeating it
+_search_build_lock = asyncio.Lock()
+
+
+async def ensure_search_ready():
+    """
+    Loads or builds the search index on first use, and refreshes it when it is due, reading the
+    catalog through this request's session.
+    """
+    if book_search.ready:
+        if book_search.refresh_due():
+            await aio_db.session.run_sync(book_search.refresh_if_due)
+        return
+    async with _search_build_lock:
+        if not book_search.ready:
+            await aio_db.session.run_sync(book_search.ensure_ready)
+
+
+async def book_not_found(isbn):
+    """
+    Returns a 404, or with ISBN_REDIRECTS set, redirects to the book stored under another form of the ISBN.
+    Async counterpart of app.routes.books.book_not_found.
+    """
+    statement = isbn13_statement(isbn) if current_app.config['ISBN_REDIRECTS'] else None
+    match = (await aio_db.session.execute(statement)).scalar() if statement is not None else None
+    if match is None:
+        return jsonify({"message": "ISBN not found"}), 404
+    return redirect(url_for('books.get_book', isbn=match, **request.args.to_dict()), 302)
+
+
+# Route to retrieve a book by its ISBN
+@books_bp.route('/isbn/<isbn>', methods=['GET'])
+@books_bp.route('/<isbn>', methods=['GET'])
+async def get_book(isbn):
+    """
+    Retrieves the details of a book identified by its ISBN.
+    Async counterpart of app.routes.books.get_book, with the same parameters and responses.
+    """
+    try:
+        fields = parse_fields(request.args.get('fields'), BOOK_FIELDS)
+
+        # Serve the book from the cache when possible
+        entry = book_cache.get(isbn)
+
+        if entry is None and request.if_none_match:
+            # Revalidate from the version column alone before loading the whole row
+            current = (await aio_db.session.execute(select(Book.version, Book.updated_at).where(Book.ISBN == isbn))).first()
+            if not current:
+                return await book_not_found(isbn)
+            if is_not_modified(make_etag(current.version, fields), req=request):
+                return not_modified_response(current.version, current.updated_at, fields, response_class=current_app.response_class)
+
+        if entry is None:
+            # Concurrent misses for the same ISBN share a single query
+            entry = await book_loads.do(isbn, lambda: load_book(isbn))
+            if entry is None:
+                return await book_not_found(isbn)
+
+        version, updated_at = entry["version"], datetime.fromisoformat(entry["updated_at"])
+        if is_not_modified(make_etag(version, fields), updated_at, req=request):
+            return not_modified_response(version, updated_at, fields, response_class=current_app.response_class)
+
+        return with_validators(jsonify(project(entry["body"], fields)), version, updated_at, fields), 200
+
+    except ValueError as e:
+        # Handle value errors and return a 400 error
+        return jsonify({"message": str(e)}), 400
+
+    except Exception:
+        # Handle unexpected errors and return a 500 error
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
+
+
+async def load_book(isbn):
+    """
+    Loads a book's columns without building an ORM object and caches the full record.
+    Async counterpart of app.routes.books.load_book.
+    """
+    columns = columns_for(None, BOOK_FIELDS, Book.version, Book.updated_at)
+    book = (await aio_db.session.execute(select(*columns).where(Book.ISBN == isbn))).first()
+    return cache_book(book) if book else None
+
+
+# Route to list books with filters and keyset pagination
+@books_bp.route('/', methods=['GET'])
+async def list_books():
+    """
+    Lists books, optionally filtered, one page at a time with keyset pagination.
+    Async counterpart of app.routes.books.list_books, with the same parameters and responses.
+    """
+    if 'isbn' in request.args:
+        try:
+            fields = parse_fields(request.args.get('fields'), BOOK_FIELDS)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+        return await lookup_books([isbn for isbn in request.args['isbn'].split(',') if isbn], fields)
+
+    try:
+        sort = request.args.get('sort', 'isbn')
+        if sort not in LIST_SORT_COLUMNS:
+            return jsonify({"message": "sort must be one of: isbn, genre, price."}), 400
+        sort_column = LIST_SORT_COLUMNS[sort]
+
+        limit = request.args.get('limit', 20, type=int)
+        if not 1 <= limit <= LIST_MAX_LIMIT:
+            return jsonify({"message": f"limit must be between 1 and {LIST_MAX_LIMIT}."}), 400
+
+        # Select only the columns needed for the response and the cursor, filtered and seeking past the previous page
+        fields = parse_fields(request.args.get('fields'), BOOK_FIELDS)
+        columns = columns_for(fields, BOOK_FIELDS, Book.ISBN, *([sort_column] if sort_column is not None else []))
+        order_by = [Book.ISBN] if sort_column is None else [sort_column, Book.ISBN]
+        statement = select(*columns).where(*list_conditions(request.args, sort_column)).order_by(*order_by).limit(limit + 1)
+        books = (await aio_db.session.execute(statement)).all()
+
+        next_cursor = None
+        if len(books) > limit:
+            books = books[:limit]
+            last = books[-1]
+            next_cursor = encode_cursor([last.ISBN] if sort_column is None else [getattr(last, sort_column.key), last.ISBN])
+
+        return jsonify({"books": [serialize_book(book, fields) for book in books], "next_cursor": next_cursor}), 200
+
+    except ValueError as e:
+        # Handle value errors and return a 400 error
+        return jsonify({"message": str(e)}), 400
+
+    except Exception:
+        # Handle unexpected errors and return a 500 error
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
+
+
+async def lookup_books(isbns, fields=None):
+    """
+    Retrieves several books by ISBN in one round trip, serving cached books from the cache.
+    Async counterpart of app.routes.books.lookup_books.
+    """
+    isbns = list(dict.fromkeys(isbns))
+    if not isbns or not all(isinstance(isbn, str) for isbn in isbns):
+        return jsonify({"message": "At least one ISBN is required."}), 400
+    if len(isbns) > MAX_BULK_KEYS:
+        return jsonify({"message": f"At most {MAX_BULK_KEYS} ISBNs can be requested at once."}), 400
+
+    try:
+        found = {}
+        for isbn in isbns:
+            entry = book_cache.get(isbn)
+            if entry is not None:
+                found[isbn] = entry["body"]
+
+        misses = [isbn for isbn in isbns if isbn not in found]
+        if misses:
+            columns = columns_for(None, BOOK_FIELDS, Book.version, Book.updated_at)
+            for book in await aio_db.session.execute(select(*columns).where(Book.ISBN.in_(misses))):
+                found[book.ISBN] = cache_book(book)["body"]
+
+        return jsonify({
+            "books": [project(found[isbn], fields) for isbn in isbns if isbn in found],
+            "missing": [isbn for isbn in isbns if isbn not in found]
+        }), 200
+
+    except Exception:
+        # Handle unexpected errors and return a 500 error
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
+
+
+# Route to retrieve many books by ISBN with the keys in the request body
+@books_bp.route('/lookup', methods=['POST'])
+async def get_books_by_isbn():
+    """
+    Retrieves several books by ISBN in one request (the POST form of `GET /books?isbn=a,b,c`).
+    """
+    data = await request.get_json(silent=True)
+    isbns = data.get('isbns') if isinstance(data, dict) else None
+    if not isinstance(isbns, list):
+        return jsonify({"message": "isbns must be a list of ISBNs."}), 400
+    try:
+        fields = parse_fields(','.join(data.get('fields') or []), BOOK_FIELDS)
+    except (TypeError, ValueError) as e:
+        return jsonify({"message": str(e)}), 400
+    return await lookup_books(isbns, fields)
+
+
+# Route to search books by keyword
+@books_bp.route('/search', methods=['GET'])
+async def search_books():
+    """
+    Searches book titles, authors and descriptions by keyword, ranked with BM25.
+    Async counterpart of app.routes.books.search_books, with the same parameters and responses.
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"message": "Missing q query parameter"}), 400
+        limit = request.args.get('limit', 20, type=int)
+        if not 1 <= limit <= 100:
+            return jsonify({"message": "limit must be between 1 and 100."}), 400
+        prefix = request.args.get('prefix', 'true').lower() not in ('0', 'false', 'no')
+        fields = parse_fields(request.args.get('fields'), BOOK_FIELDS)
+
+        await ensure_search_ready()
+        hits = book_search.index.search(query, limit=limit, prefix=prefix)
+
+        # Load the matching books in one query and return them in ranked order
+        books = {}
+        if hits:
+            columns = columns_for(fields, BOOK_FIELDS, Book.ISBN)
+            result = await aio_db.session.execute(select(*columns).where(Book.ISBN.in_([isbn for isbn, _ in hits])))
+            books = {book.ISBN: book for book in result}
+        results = [
+            dict(serialize_book(book, fields), score=round(score, 4))
+            for book, score in ((books.get(isbn), score) for isbn, score in hits)
+            if book is not None
+        ]
+        return jsonify({"query": query, "results": results}), 200
+
+    except ValueError as e:
+        # Handle value errors and return a 400 error
+        return jsonify({"message": str(e)}), 400
+
+    except Exception:
+        # Handle unexpected errors and return a 500 error
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
+
+
+# Route to autocomplete search terms
+@books_bp.route('/search/suggest', methods=['GET'])
+async def suggest_search_terms():
+    """
+    Suggests indexed words that start with the last word of the given query.
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"message": "Missing q query parameter"}), 400
+        limit = request.args.get('limit', 10, type=int)
+        if not 1 <= limit <= 50:
+            return jsonify({"message": "limit must be between 1 and 50."}), 400
+
+        await ensure_search_ready()
+        return jsonify({"query": query, "suggestions": book_search.index.suggest(query, limit=limit)}), 200
+
+    except Exception:
+        # Handle unexpected errors and return a 500 error
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
+
+
+# Route to add a new book
+@books_bp.route('/', methods=['POST'])
+async def add_book():
+    """
+    Adds a new book to the system.
+    Async counterpart of app.routes.books.add_book, with the same validation and responses.
+    """
+    data = await request.get_json()
+    session = aio_db.session
+    try:
+        # Validate every field of the payload at once
+        fields, errors = BOOK_SCHEMA.validate(data)
+        if errors:
+            return jsonify(error_body(errors)), 400
+
+        new_book = Book(
+            ISBN=fields['ISBN'],
+            title=fields['title'],
+            author=fields['Author'],
+            description=fields['description'],
+            genre=fields['genre'],
+            price=fields['price'],
+            quantity=fields['quantity']
+        )
+        # Insert the book; there is no lookup first, the unique index on ISBN rejects a duplicate
+        session.add(new_book)
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            return jsonify({"message": "This ISBN already exists in the system."}), 422
+
+        # Write the committed book through to the cache and the search index
+        entry = cache_book(new_book)
+        book_search.index_books([entry["body"]])
+
+        response = with_validators(jsonify(entry["body"]), new_book.version, new_book.updated_at)
+        response.status_code = 201
+        response.headers['Location'] = f"{request.host_url}books/{new_book.ISBN}"
+        return response
+
+    except ValueError as e:
+        # Handle value errors and return a 400 error
+        return jsonify({"message": str(e)}), 400
+
+    except Exception:
+        # Handle unexpected errors and return a 500 error
+        await session.rollback()
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
+
+
+# Route to update an existing book by its ISBN
+@books_bp.route('/<isbn>', methods=['PUT'])
+async def update_book(isbn):
+    """
+    Updates the details of a book identified by its ISBN, honouring If-Match.
+    Async counterpart of app.routes.books.update_book, with the same validation and responses.
+    """
+    data = await request.get_json()
+    session = aio_db.session
+    try:
+        # Validate every field of the payload at once
+        fields, errors = BOOK_UPDATE_SCHEMA.validate(data)
+        if errors:
+            return jsonify(error_body(errors)), 400
+
+        # Check if the ISBN in the request body matches the book's ISBN
+        if 'ISBN' in data and data['ISBN'] != isbn:
+            return jsonify({"message": "ISBN in the request body does not match the book's ISBN."}), 400
+
+        book = await session.scalar(select(Book).where(Book.ISBN == isbn))
+        if not book:
+            return jsonify({"message": "ISBN not found"}), 404
+        if if_match_failed(book.version, req=request):
+            return jsonify({"message": "The book was modified since it was retrieved (If-Match failed)."}), 412
+
+        book.title = fields['title']
+        book.author = fields['Author']
+        book.description = fields['description']
+        book.genre = fields['genre']
+        book.price = fields['price']
+        book.quantity = fields['quantity']
+
+        # Commit the changes; the UPDATE only applies if the row still has the version loaded above
+        await session.commit()
+
+        # Refresh the cached copy and the search index now that the update is committed
+        entry = cache_book(book)
+        book_search.index_books([entry["body"]])
+
+        return with_validators(jsonify(entry["body"]), book.version, book.updated_at), 200
+
+    except StaleDataError:
+        # Another request updated the book between our read and our write
+        await session.rollback()
+        status = 412 if request.if_match else 409
+        return jsonify({"message": "The book was modified concurrently; retrieve it again and retry."}), status
+
+    except ValueError as e:
+        # Handle value errors and return a 400 error
+        return jsonify({"message": str(e)}), 400
+
+    except Exception:
+        # Handle unexpected errors and return a 500 error
+        await session.rollback()
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
+
+
+def _batch_chunk_size():
+    """
+    Returns the number of rows written per bulk INSERT (see app.routes.books._batch_chunk_size).
+    """
+    configured = int(current_app.config.get('BOOK_BATCH_CHUNK_SIZE', 1000))
+    requested = request.args.get('chunk_size', type=int)
+    if requested is None or requested <= 0:
+        return configured
+    return min(requested, configured * 10)
+
+
+async def _prepare_books(items):
+    """
+    Validates book payloads and checks all their ISBNs against the database with a single IN (...) query.
+    """
+    rows, errors = validate_books(items)
+    existing = set()
+    if rows:
+        result = await aio_db.session.execute(select(Book.ISBN).where(Book.ISBN.in_([row["ISBN"] for _, row in rows])))
+        existing = set(result.scalars())
+    return drop_existing(rows, errors, existing), errors
+
+
+async def _insert_books(rows, chunk_size):
+    """
+    Writes validated rows with bulk INSERTs, committing once per chunk. A chunk that hits a duplicate
+    ISBN is written again row by row so only the duplicates fail (422); a chunk that fails otherwise
+    is rolled back and reported without affecting the others.
+    Returns:
+        list: One result per row.
+    """
+    session = aio_db.session
+    results = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        try:
+            await session.execute(Book.__table__.insert(), [row for _, row in chunk])
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            results.extend(await _insert_rows(chunk))
+            continue
+        except Exception:
+            await session.rollback()
+            current_app.logger.exception(f"{request.method} {request.path} failed")
+            results.extend({"index": index, "ISBN": row["ISBN"], "status": 500, "message": "An unexpected error occurred."}
+                           for index, row in chunk)
+            continue
+        book_search.index_books(row for _, row in chunk)
+        results.extend({"index": index, "ISBN": row["ISBN"], "status": 201} for index, row in chunk)
+    return results
+
+
+async def _insert_rows(chunk):
+    """
+    Writes the rows of a chunk one at a time after its bulk INSERT hit a duplicate ISBN.
+    Async counterpart of app.routes.books._insert_rows.
+    Returns:
+        list: One result per row.
+    """
+    session = aio_db.session
+    results = []
+    for index, row in chunk:
+        try:
+            await session.execute(Book.__table__.insert(), row)
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            results.append({"index": index, "ISBN": row["ISBN"], "status": 422, "message": "This ISBN already exists in the system."})
+            continue
+        except Exception:
+            await session.rollback()
+            current_app.logger.exception(f"{request.method} {request.path} failed")
+            results.append({"index": index, "ISBN": row["ISBN"], "status": 500, "message": "An unexpected error occurred."})
+            continue
+        book_search.index_books([row])
+        results.append({"index": index, "ISBN": row["ISBN"], "status": 201})
+    return results
+
+
+# Route to add many books in one request
+@books_bp.route('/batch', methods=['POST'])
+async def add_books_batch():
+    """
+    Adds a batch of books to the system.
+    Async counterpart of app.routes.books.add_books_batch, with the same body and responses.
+    """
+    data = await request.get_json(silent=True)
+    items = data.get('books') if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return jsonify({"message": "Request body must be a JSON array of books."}), 400
+    if len(items) > int(current_app.config.get('BOOK_BATCH_MAX_ITEMS', 10000)):
+        return jsonify({"message": "Too many books in one batch; use /books/batch/ndjson instead."}), 413
+
+    try:
+        rows, results = await _prepare_books(list(enumerate(items)))
+        results.extend(await _insert_books(rows, _batch_chunk_size()))
+        results.sort(key=lambda result: result["index"])
+
+        created = sum(1 for result in results if result["status"] == 201)
+        return jsonify({"created": created, "failed": len(results) - created, "results": results}), 200
+
+    except Exception:
+        # Handle unexpected errors and return a 500 error
+        await aio_db.session.rollback()
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
+
+
+# Route to stream a newline-delimited JSON catalog into the system
+@books_bp.route('/batch/ndjson', methods=['POST'])
+async def add_books_ndjson():
+    """
+    Adds books from a newline-delimited JSON (NDJSON) request body of any size, `chunk_size` lines
+    at a time, streaming one result line per item and a summary line back.
+    Async counterpart of app.routes.books.add_books_ndjson.
+    """
+    chunk_size = _batch_chunk_size()
+
+    async def lines():
+        # Split the body into lines as it arrives
+        buffered = b''
+        async for data in request.body:
+            buffered += data
+            *complete, buffered = buffered.split(b'\n')
+            for line in complete:
+                if line.strip():
+                    yield line
+        if buffered.strip():
+            yield buffered
+
+    def parse(pending):
+        for index, line in pending:
+            try:
+                yield index, json.loads(line)
+            except ValueError:
+                yield index, None
+
+    async def chunks():
+        pending = []
+        index = 0
+        async for line in lines():
+            pending.append((index, line))
+            index += 1
+            if len(pending) == chunk_size:
+                yield list(parse(pending))
+                pending = []
+        if pending:
+            yield list(parse(pending))
+
+    async def process(items):
+        try:
+            rows, results = await _prepare_books(items)
+            results.extend(await _insert_books(rows, chunk_size))
+        except Exception:
+            await aio_db.session.rollback()
+            current_app.logger.exception(f"{request.method} {request.path} failed")
+            results = [{"index": index, "status": 500, "message": "An unexpected error occurred."} for index, _ in items]
+        results.sort(key=lambda result: result["index"])
+        return results
+
+    async def generate():
+        created = failed = 0
+        async for items in chunks():
+            for result in await process(items):
+                if result["status"] == 201:
+                    created += 1
+                else:
+                    failed += 1
+                yield json.dumps(result) + "\n"
+        yield json.dumps({"created": created, "failed": failed}) + "\n"
+
+    return Response(stream_with_context(generate)(), status=200, mimetype='application/x-ndjson')
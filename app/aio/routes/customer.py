@@ -0,0 +1,205 @@
+from quart import Blueprint, current_app, jsonify, request
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from app.models.customer import Customer  # Import the Customer model
+from app.aio.db import aio_db  # Import the asyncio database for non-blocking queries
+from app.validation import CUSTOMER_SCHEMA, error_body, is_valid_email  # Import the precompiled validators
+from app.serializers import CUSTOMER_FIELDS, columns_for, parse_fields, serialize_customer  # Import the serializers
+from app.conditional import if_match_versions, is_not_modified, make_etag, not_modified_response, with_validators  # Import the HTTP conditional request helpers
+from app.idempotency import idempotent_async  # Replays the response of a retried POST sent with an Idempotency-Key
+from app.routes.customer import MAX_BULK_KEYS, customer_values, update_statement, user_id_statements
+
+# Create a Blueprint for customer-related routes; same name and URLs as the WSGI blueprint
+customer_bp = Blueprint('customers', __name__, url_prefix='/customers')
+
+
+@customer_bp.route('/', methods=['POST'])
+@idempotent_async
+async def create_customer():
+    """
+    Creates a new customer in the system.
+    Async counterpart of app.routes.customer.create_customer, with the same validation and responses.
+    """
+    session = aio_db.session
+    try:
+        data = await request.get_json()
+
+        # Validate every field of the payload at once
+        fields, errors = CUSTOMER_SCHEMA.validate(data)
+        if errors:
+            return jsonify(error_body(errors)), 400
+
+        # Insert the customer; there is no lookup first, the unique index on userId rejects a duplicate
+        new_customer = Customer(**customer_values(fields))
+        session.add(new_customer)
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            return jsonify({"message": "This user ID already exists in the system."}), 422
+
+        response = with_validators(jsonify(serialize_customer(new_customer)), new_customer.version, new_customer.updated_at)
+        return response, 201, {'Location': f"/customers/{new_customer.customer_id}"}
+    except Exception:
+        # Handle unexpected errors
+        await session.rollback()
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An error occurred while creating the customer"}), 500
+
+
+@customer_bp.route('/<id>', methods=['PUT'])
+async def update_customer(id):
+    """
+    Replaces the details of a customer with a single conditional UPDATE, honouring If-Match.
+    Async counterpart of app.routes.customer.update_customer, with the same payload and responses.
+    """
+    session = aio_db.session
+    try:
+        # Validate that id is numerical
+        if not id.isdigit():
+            return jsonify({"message": "Illegal, missing, or malformed input"}), 400
+
+        # Validate every field of the payload at once
+        fields, errors = CUSTOMER_SCHEMA.validate(await request.get_json())
+        if errors:
+            return jsonify(error_body(errors)), 400
+
+        statement = update_statement(int(id), fields, if_match_versions(req=request))
+        columns = columns_for(None, CUSTOMER_FIELDS, Customer.version, Customer.updated_at)
+        try:
+            if aio_db.engine.dialect.update_returning:
+                customer = (await session.execute(statement.returning(*columns))).first()
+            elif (await session.execute(statement)).rowcount == 1:
+                customer = (await session.execute(select(*columns).where(Customer.customer_id == int(id)))).first()
+            else:
+                customer = None
+        except IntegrityError:
+            await session.rollback()
+            return jsonify({"message": "This user ID already exists in the system."}), 422
+
+        if customer is None:
+            # No row matched: the ID is unknown, or the row exists and If-Match holds a stale version
+            await session.rollback()
+            if request.if_match and await session.get(Customer, int(id)) is not None:
+                return jsonify({"message": "The customer was modified since it was retrieved (If-Match failed)."}), 412
+            return jsonify({"message": "Customer ID not found"}), 404
+        await session.commit()
+
+        response = with_validators(jsonify(serialize_customer(customer)), customer.version, customer.updated_at)
+        return response, 200
+    except Exception:
+        # Handle unexpected errors
+        await session.rollback()
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An error occurred while updating the customer"}), 500
+
+
+@customer_bp.route('/<id>', methods=['GET'])
+async def get_customer_by_id(id):
+    """
+    Retrieves customer details by their numeric ID, honouring If-None-Match and If-Modified-Since.
+    Async counterpart of app.routes.customer.get_customer_by_id, with the same parameters and responses.
+    """
+    try:
+        # Validate that id is numerical
+        if not id.isdigit():
+            return jsonify({"message": "Illegal, missing, or malformed input"}), 400
+
+        fields = parse_fields(request.args.get('fields'), CUSTOMER_FIELDS)
+        session = aio_db.session
+
+        if request.if_none_match:
+            # Revalidate from the version column alone before loading the whole row
+            current = (await session.execute(
+                select(Customer.version, Customer.updated_at).where(Customer.customer_id == int(id))
+            )).first()
+            if not current:
+                return jsonify({"message": "Customer ID not found"}), 404
+            if is_not_modified(make_etag(current.version, fields), req=request):
+                return not_modified_response(current.version, current.updated_at, fields, response_class=current_app.response_class)
+
+        # Retrieve the requested columns of the customer by numeric ID
+        columns = columns_for(fields, CUSTOMER_FIELDS, Customer.version, Customer.updated_at)
+        customer = (await session.execute(select(*columns).where(Customer.customer_id == int(id)))).first()
+        if not customer:
+            return jsonify({"message": "Customer ID not found"}), 404
+        if is_not_modified(make_etag(customer.version, fields), customer.updated_at, req=request):
+            return not_modified_response(customer.version, customer.updated_at, fields, response_class=current_app.response_class)
+
+        response = with_validators(jsonify(serialize_customer(customer, fields)), customer.version, customer.updated_at, fields)
+        return response, 200
+    except ValueError as e:
+        # Handle an invalid field selection
+        return jsonify({"message": str(e)}), 400
+    except Exception:
+        # Handle unexpected errors
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An error occurred while retrieving the customer"}), 500
+
+
+@customer_bp.route('/', methods=['GET'])
+async def get_customer_by_user_id():
+    """
+    Retrieves customer details based on the `userId` query parameter, or several customers at once
+    with `ids` (see `lookup_customers`).
+    Async counterpart of app.routes.customer.get_customer_by_user_id, with the same parameters and responses.
+    """
+    if 'ids' in request.args:
+        try:
+            fields = parse_fields(request.args.get('fields'), CUSTOMER_FIELDS)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+        return await lookup_customers(request.args['ids'].split(','), fields)
+
+    try:
+        user_id = request.args.get('userId')
+        if not user_id:
+            return jsonify({"message": "Missing userId query parameter"}), 400
+
+        # Validate email format for userId using the precompiled regex
+        if not is_valid_email(user_id):
+            return jsonify({"message": "Invalid email format for userId"}), 400
+
+        fields = parse_fields(request.args.get('fields'), CUSTOMER_FIELDS)
+        customer = None
+        statements = user_id_statements(user_id, columns_for(fields, CUSTOMER_FIELDS), current_app.config['USER_ID_ANY_CASE'])
+        for statement in statements:
+            rows = (await aio_db.session.execute(statement)).all()
+            if len(rows) == 1:
+                customer = rows[0]
+                break
+        if not customer:
+            return jsonify({"message": "User ID not found"}), 404
+
+        return jsonify(serialize_customer(customer, fields)), 200
+    except ValueError as e:
+        # Handle an invalid field selection
+        return jsonify({"message": str(e)}), 400
+    except Exception:
+        # Handle unexpected errors
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An error occurred while retrieving the customer"}), 500
+
+
+async def lookup_customers(ids, fields=None):
+    """
+    Retrieves several customers by numeric ID with a single IN (...) query.
+    Async counterpart of app.routes.customer.lookup_customers.
+    """
+    ids = [id for id in dict.fromkeys(ids) if id]
+    if not ids or not all(id.isdigit() for id in ids):
+        return jsonify({"message": "Illegal, missing, or malformed input"}), 400
+    if len(ids) > MAX_BULK_KEYS:
+        return jsonify({"message": f"At most {MAX_BULK_KEYS} customer IDs can be requested at once."}), 400
+
+    try:
+        ids = list(dict.fromkeys(int(id) for id in ids))
+        columns = columns_for(fields, CUSTOMER_FIELDS, Customer.customer_id)
+        result = await aio_db.session.execute(select(*columns).where(Customer.customer_id.in_(ids)))
+        found = {customer.customer_id: customer for customer in result}
+        customers = [serialize_customer(found[id], fields) for id in ids if id in found]
+        return jsonify({"customers": customers, "missing": [id for id in ids if id not in found]}), 200
+    except Exception:
+        # Handle unexpected errors
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An error occurred while retrieving the customers"}), 500
@@ -0,0 +1,59 @@
+"""
+Operator-only endpoints.
+
+Table export/import (/catalog) and the per-worker diagnostics (/cache/stats, /ratelimit/stats,
+/db/replicas, /startup/profile) are not part of the public API: they expose every customer's
+details, or the traffic, topology and settings of the deployment. They share one bearer token,
+CATALOG_HTTP_TOKEN. Without it they answer 404, as if they did not exist; with it, only requests
+sent with `Authorization: Bearer <CATALOG_HTTP_TOKEN>` are answered.
+"""
+import functools
+import hmac
+
+from flask import current_app, request
+
+
+def token_error(token, authorization):
+    """
+    Checks an Authorization header against the operator token.
+
+    Args:
+        token (str): The configured CATALOG_HTTP_TOKEN, or None if it is unset.
+        authorization (str): The request's Authorization header, or None.
+    Returns:
+        tuple: The error response (body, status and headers), or None if the request may proceed.
+    """
+    if not token:
+        return {"message": "Not found."}, 404, {}
+    scheme, _, credentials = (authorization or '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(credentials.encode(), token.encode()):
+        return {"message": "A valid bearer token is required."}, 401, {"WWW-Authenticate": "Bearer"}
+    return None
+
+
+def require_token(view):
+    """
+    Only runs the view for requests carrying the operator token (see `token_error`).
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        error = token_error(current_app.config.get('CATALOG_HTTP_TOKEN'), request.headers.get('Authorization'))
+        if error is not None:
+            return error
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def require_token_async(view):
+    """
+    Async counterpart of `require_token` for the Quart views of app.aio.
+    """
+    from quart import current_app as quart_app, request as quart_request
+
+    @functools.wraps(view)
+    async def wrapper(*args, **kwargs):
+        error = token_error(quart_app.config.get('CATALOG_HTTP_TOKEN'), quart_request.headers.get('Authorization'))
+        if error is not None:
+            return error
+        return await view(*args, **kwargs)
+    return wrapper
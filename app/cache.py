@@ -0,0 +1,417 @@
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+
+# Seconds after `invalidate` during which `store` is refused, long enough for a load that read the
+# row before the write committed to finish (and be dropped) rather than cache the old version
+INVALIDATION_HOLDOFF = 2.0
+
+
+class LRUCache:
+    """
+    In-process least-recently-used cache with a per-entry time to live.
+
+    Entries are kept in insertion/access order so that the oldest entry can be evicted
+    in O(1) once the cache reaches its size bound. Expired entries are dropped lazily
+    when they are read.
+
+    Args:
+        maxsize (int): The maximum number of entries held before the least recently used one is evicted.
+        ttl (float): The number of seconds an entry stays valid after it is written.
+    """
+
+    # Held by a key between `invalidate` and the end of its holdoff; reads see a miss
+    INVALIDATED = object()
+
+    def __init__(self, maxsize=10000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                # Drop the stale entry and count the lookup as a miss
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            if value is self.INVALIDATED:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                # Evict the least recently used entry to respect the size bound
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def add(self, key, value, ttl=None):
+        """
+        Stores the value only if the key holds no live entry. Returns True if it was stored.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                return False
+            self._data[key] = (now + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def store(self, key, value, ttl=None):
+        """
+        Stores a versioned value (a dict with a "version") unless the key holds a live entry of a
+        newer version or was invalidated within the holdoff. Returns True if it was stored.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                current = entry[1]
+                if current is self.INVALIDATED or current["version"] > value["version"]:
+                    return False
+            self._data[key] = (now + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate(self, key, holdoff=INVALIDATION_HOLDOFF):
+        """
+        Drops the entry for a key and refuses `store` for it during the next `holdoff` seconds.
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic() + holdoff, self.INVALIDATED)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class RedisCache:
+    """
+    Shared cache backend storing JSON-encoded values in Redis (or any client exposing
+    the same `get`, `set(..., ex=...)` and `delete` methods, such as a local stand-in;
+    `store` also needs `register_script`).
+
+    Evictions are handled by the server's own maxmemory policy, so only hits and misses
+    are counted here.
+
+    Args:
+        client: A redis-py compatible client instance.
+        prefix (str): The prefix prepended to every key to namespace this cache.
+        ttl (float): The number of seconds an entry stays valid after it is written.
+    """
+
+    # Held by a key between `invalidate` and the end of its holdoff; reads see a miss
+    INVALIDATED = json.dumps("invalidated")
+
+    # Compare-and-set of `store`, run atomically by the server: KEYS[1] is the key, ARGV holds the
+    # encoded value, its version, the marker of an invalidated key and the TTL
+    STORE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current then
+    if current == ARGV[3] then
+        return 0
+    end
+    local ok, entry = pcall(cjson.decode, current)
+    if ok and type(entry) == 'table' and tonumber(entry['version']) and tonumber(entry['version']) > tonumber(ARGV[2]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[4])
+return 1
+"""
+
+    def __init__(self, client, prefix="cache:", ttl=300):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._store = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if isinstance(raw, bytes):
+            raw = raw.decode()
+        with self._lock:
+            if raw is None or raw == self.INVALIDATED:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(self.ttl if ttl is None else ttl)))
+
+    def add(self, key, value, ttl=None):
+        # SET NX is atomic across every worker sharing the server
+        return bool(self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(self.ttl if ttl is None else ttl)), nx=True))
+
+    def store(self, key, value, ttl=None):
+        if self._store is None:
+            self._store = self.client.register_script(self.STORE_SCRIPT)
+        ttl = max(1, int(self.ttl if ttl is None else ttl))
+        return bool(self._store(keys=[self.prefix + key], args=[json.dumps(value), value["version"], self.INVALIDATED, ttl]))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def invalidate(self, key, holdoff=INVALIDATION_HOLDOFF):
+        self.client.set(self.prefix + key, self.INVALIDATED, ex=max(1, math.ceil(holdoff)))
+
+    def clear(self):
+        # Only remove keys belonging to this cache's namespace
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "redis",
+                "prefix": self.prefix,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": None,
+            }
+
+
+class Cache:
+    """
+    Application-wide cache facade bound to a backend by `init_cache`.
+
+    Until it is initialized (or when caching is disabled) every lookup is a miss and
+    every write is a no-op, so callers never need to check whether a cache exists.
+
+    Versioned records are written with `store`, which never replaces a newer version, so a load
+    that read the row before a write committed cannot overwrite the entry the write stored. A
+    write that cannot store the new version itself calls `invalidate`, which also turns such late
+    loads away for a short holdoff.
+    """
+
+    def __init__(self):
+        self.backend = None
+
+    def get(self, key):
+        return self.backend.get(key) if self.backend is not None else None
+
+    def set(self, key, value, ttl=None):
+        if self.backend is not None:
+            self.backend.set(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        return self.backend.add(key, value, ttl) if self.backend is not None else True
+
+    def store(self, key, value, ttl=None):
+        return self.backend.store(key, value, ttl) if self.backend is not None else False
+
+    def delete(self, key):
+        if self.backend is not None:
+            self.backend.delete(key)
+
+    def invalidate(self, key, holdoff=INVALIDATION_HOLDOFF):
+        if self.backend is not None:
+            self.backend.invalidate(key, holdoff)
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        return self.backend.stats() if self.backend is not None else {"backend": None}
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical loads: while one thread runs the load for a key, other
+    threads asking for the same key wait for its result instead of repeating the work.
+
+    Nothing is remembered once the load finishes, so this only collapses requests that overlap
+    in time (such as a burst of misses for one hot key); keeping the result is the cache's job.
+    The result, or the exception, is shared by every waiter and must not be mutated.
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.coalesced = 0
+
+    def do(self, key, load):
+        """
+        Returns `load()`, sharing one call among all threads that ask for `key` at the same time.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+                self.loads += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = load()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return {"loads": self.loads, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """
+    Asyncio counterpart of SingleFlight: concurrent tasks of one event loop share a single
+    await of the load for a key.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.loads = 0
+        self.coalesced = 0
+
+    async def do(self, key, load):
+        """
+        Returns `await load()`, sharing one call among all tasks that ask for `key` at the same time.
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # Shielded, so a waiter that is cancelled does not cancel the shared load
+            return await asyncio.shield(future)
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        self.loads += 1
+        try:
+            result = await load()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark it retrieved; there may be no waiters
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            del self._calls[key]
+        return result
+
+    def stats(self):
+        return {"loads": self.loads, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+
+# Cache of serialized book records keyed by ISBN
+book_cache = Cache()
+
+# Coalesces concurrent database loads of the same book on a cache miss
+book_loads = SingleFlight()
+
+
+def init_cache(app):
+    """
+    Configure the application caches from the Flask config.
+
+    Recognised settings:
+        BOOK_CACHE_BACKEND: "memory" (default), "redis" or "none".
+        BOOK_CACHE_MAXSIZE: Maximum number of books held by the in-process backend.
+        BOOK_CACHE_TTL: Seconds a cached book stays valid.
+        CACHE_REDIS_URL: Connection string for the redis backend.
+
+    The memory backend is per worker process: a write refreshes the copy of the worker that ran it,
+    while the other workers keep serving their own copy until it expires (BOOK_CACHE_TTL). With
+    several workers (SERVER_WORKERS > 1), use the redis backend, or a TTL short enough for the
+    staleness to be acceptable.
+
+    Args:
+        app: The Flask application instance.
+    """
+    backend = app.config.get('BOOK_CACHE_BACKEND', 'memory')
+    ttl = float(app.config.get('BOOK_CACHE_TTL', 300))
+    if backend == 'memory' and int(app.config.get('SERVER_WORKERS', 0)) > 1:
+        app.logger.warning(
+            f"BOOK_CACHE_BACKEND=memory with {app.config['SERVER_WORKERS']} workers: each worker caches its own copy "
+            f"of a book and may serve it for up to {ttl:g}s after another worker updates it; use BOOK_CACHE_BACKEND=redis."
+        )
+
+    if backend == 'none':
+        book_cache.backend = None
+    elif backend == 'redis':
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("BOOK_CACHE_BACKEND=redis requires the 'redis' package") from e
+        client = redis.Redis.from_url(app.config['CACHE_REDIS_URL'])
+        book_cache.backend = RedisCache(client, prefix="book:", ttl=ttl)
+    else:
+        book_cache.backend = LRUCache(maxsize=int(app.config.get('BOOK_CACHE_MAXSIZE', 10000)), ttl=ttl)
+
+    app.extensions['book_cache'] = book_cache
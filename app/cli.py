@@ -0,0 +1,117 @@
+import json
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.transfer import TransferStats, check_format, export_table, format_for, get_table, import_table, open_input, open_output
+
+# `flask catalog ...` commands for bulk data maintenance
+catalog_cli = AppGroup('catalog', help="Bulk export and import of catalog tables.")
+
+
+def _report(action, table, stats):
+    """
+    Prints a one-line JSON summary of a transfer to stderr, so it never mixes with data on stdout.
+    """
+    click.echo(json.dumps({"action": action, "table": table, **stats.as_dict()}), err=True)
+
+
+@catalog_cli.command('export')
+@click.argument('table')
+@click.option('--format', 'fmt', help="csv, ndjson or parquet (default: from --output, else csv)")
+@click.option('--output', '-o', default='-', show_default=True, help="File to write; a .gz suffix compresses it, - is stdout")
+@click.option('--batch-size', type=int, help="Rows fetched and encoded at a time (default TRANSFER_BATCH_SIZE)")
+def export_command(table, fmt, output, batch_size):
+    """
+    Stream TABLE (books or customers) to a file.
+    """
+    fmt = fmt or format_for(output)
+    try:
+        check_format(fmt)
+        columns = get_table(table)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+    stats = TransferStats()
+    target = open_output(output)
+    try:
+        for chunk in export_table(columns, fmt, batch_size or current_app.config['TRANSFER_BATCH_SIZE'], stats):
+            target.write(chunk)
+    finally:
+        if output != '-':
+            target.close()
+    _report('export', table, stats)
+
+
+@catalog_cli.command('import')
+@click.argument('table')
+@click.argument('path')
+@click.option('--format', 'fmt', help="csv, ndjson or parquet (default: from the file name, else csv)")
+@click.option('--batch-size', type=int, help="Rows per upsert statement and transaction (default TRANSFER_BATCH_SIZE)")
+def import_command(table, path, fmt, batch_size):
+    """
+    Upsert the rows of PATH (CSV, NDJSON or Parquet, optionally .gz; - is stdin) into TABLE.
+    """
+    fmt = fmt or format_for(path)
+    try:
+        check_format(fmt)
+        columns = get_table(table)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+    source = open_input(path)
+    try:
+        stats = import_table(columns, source, fmt, batch_size or current_app.config['TRANSFER_BATCH_SIZE'])
+    finally:
+        if path != '-':
+            source.close()
+    _report('import', table, stats)
+    if stats.failed:
+        raise SystemExit(1)
+
+
+@catalog_cli.command('backfill')
+@click.argument('name', type=click.Choice(['isbn13', 'user_id_lower']))
+@click.option('--batch-size', type=int, default=1000, show_default=True, help="Rows updated per transaction")
+@click.option('--pause', type=float, default=0.05, show_default=True, help="Seconds to sleep between batches")
+def backfill_command(name, batch_size, pause):
+    """
+    Fill a column added by a migration for existing rows, in small throttled batches.
+    """
+    from app.backfill import BACKFILLS
+
+    backfill = BACKFILLS[name]
+    click.echo(f"{name}: {backfill.remaining()} rows to fill", err=True)
+    totals = backfill.run(batch_size, pause, progress=lambda totals: click.echo(json.dumps(totals), err=True))
+    click.echo(json.dumps({"backfill": name, **totals, "remaining": backfill.remaining()}), err=True)
+
+
+@catalog_cli.command('check-plans')
+@click.option('--verbose', '-v', is_flag=True, help="Print every plan, not only failures")
+def check_plans_command(verbose):
+    """
+    EXPLAIN every route query and fail if one reads a whole table.
+    """
+    from app.plans import check_plans
+
+    failures = 0
+    for result in check_plans():
+        failures += not result["uses_index"]
+        status = "ok" if result["uses_index"] else "FULL SCAN"
+        click.echo(f"{status:<10}{result['name']}" + (f"  (warning: {'; '.join(result['warnings'])})" if result["warnings"] else ""))
+        if verbose or not result["uses_index"]:
+            for line in result["plan"]:
+                click.echo(f"{'':<10}  {line}")
+    if failures:
+        raise SystemExit(1)
+
+
+def init_cli(app):
+    """
+    Register the application's `flask` commands.
+
+    Args:
+        app: The Flask application instance.
+    """
+    app.cli.add_command(catalog_cli)
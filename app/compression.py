@@ -0,0 +1,211 @@
+import zlib
+from flask import request
+
+from app.conditional import ENCODING_SEPARATOR, identity_etag
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; "br" is not offered without it
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional; "zstd" is not offered without it
+    zstandard = None
+
+# Media types worth compressing besides text/*; already-compressed formats such as Parquet are left alone
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+}
+
+# Uncompressed bytes a streamed response accumulates before the compressor is flushed to the client
+STREAM_FLUSH_BYTES = 8192
+
+
+class GzipCompressor:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+# Content codings: (compressor class, config key of its level, whether its library is installed)
+ENCODINGS = {
+    'zstd': (ZstdCompressor, 'COMPRESSION_ZSTD_LEVEL', zstandard is not None),
+    'br': (BrotliCompressor, 'COMPRESSION_BR_LEVEL', brotli is not None),
+    'gzip': (GzipCompressor, 'COMPRESSION_LEVEL', True),
+}
+
+
+def is_compressible(mimetype):
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+
+
+def choose_encoding(accept_encodings, offered):
+    """
+    Picks the content coding for a response from the request's Accept-Encoding header.
+
+    Args:
+        accept_encodings: The request's parsed Accept-Encoding header.
+        offered (list): The codings the server can produce, most preferred first.
+    Returns:
+        str: The coding the client weights highest (ties go to the server's preference), or None
+             to send the response uncompressed.
+    """
+    best, best_quality = None, 0
+    for name in offered:
+        quality = accept_encodings.quality(name)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def encode_etag(response, encoding):
+    """
+    Gives a compressed response its own strong ETag, the identity tag followed by the coding
+    (e.g. "3+gzip"), since its bytes differ from the uncompressed representation's. Weak tags
+    only promise equivalent content and are left as they are.
+    """
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}{ENCODING_SEPARATOR}{encoding}")
+
+
+def match_encoded_etag(response, if_none_match):
+    """
+    Sends a 304 back with the tag the client's copy was stored under: the compressed variant's tag
+    when that is what If-None-Match names, so a cache can tell which stored response is still fresh.
+    """
+    etag, weak = response.get_etag()
+    if not etag or weak or not if_none_match:
+        return
+    for tag in if_none_match.as_set():
+        if tag != etag and identity_etag(tag) == etag:
+            response.set_etag(tag)
+            return
+
+
+def compress_stream(chunks, compressor):
+    """
+    Compresses a streamed body chunk by chunk. The first chunk is flushed at once so the client
+    starts receiving data immediately; after that output is flushed every STREAM_FLUSH_BYTES.
+    """
+    pending = None
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        pending = len(chunk) if pending is None else pending + len(chunk)
+        if pending == len(chunk) or pending >= STREAM_FLUSH_BYTES:
+            data += compressor.flush()
+            pending = 0
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def init_compression(app):
+    """
+    Compress responses with the best coding the client accepts.
+
+    Responses smaller than COMPRESSION_MIN_SIZE, of media types that do not compress, or that
+    already carry a Content-Encoding are sent as they are. Streamed responses are compressed on
+    the fly. A compressed response's strong ETag gets the coding appended ("3+gzip"), so each
+    coding has its own validator; app.conditional accepts both forms in If-None-Match and If-Match,
+    and a 304 names the tag the client sent. `Vary: Accept-Encoding` keeps shared caches from
+    mixing up the codings.
+
+    Recognised settings:
+        COMPRESSION_ENABLED: Set to False to send every response uncompressed.
+        COMPRESSION_ALGORITHMS: Codings in order of preference, e.g. "zstd,br,gzip"; codings whose
+                                library (zstandard, brotli) is not installed are skipped.
+        COMPRESSION_MIN_SIZE: Smallest body, in bytes, worth compressing.
+        COMPRESSION_LEVEL, COMPRESSION_BR_LEVEL, COMPRESSION_ZSTD_LEVEL: Levels of gzip, brotli and zstd.
+
+    Args:
+        app: The Flask application instance.
+    """
+    if not app.config.get('COMPRESSION_ENABLED', True):
+        return
+
+    names = [name.strip() for name in app.config.get('COMPRESSION_ALGORITHMS', 'zstd,br,gzip').split(',') if name.strip()]
+    unknown = [name for name in names if name not in ENCODINGS]
+    if unknown:
+        raise ValueError(f"Unknown compression algorithm(s): {', '.join(unknown)}; expected: {', '.join(ENCODINGS)}.")
+    offered = [name for name in names if ENCODINGS[name][2]]
+    min_size = app.config.get('COMPRESSION_MIN_SIZE', 1024)
+
+    def compressor_for(name):
+        compressor_class, level_key, _ = ENCODINGS[name]
+        return compressor_class(app.config[level_key])
+
+    @app.after_request
+    def compress_response(response):
+        if response.status_code == 304:
+            match_encoded_etag(response, request.if_none_match)
+            return response
+        if (not offered or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough or 'Content-Encoding' in response.headers
+                or not is_compressible(response.mimetype)
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+
+        # The body depends on Accept-Encoding even when this particular response is sent as is
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings, offered)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            original = response.response
+            response.response = compress_stream(response.iter_encoded(), compressor_for(encoding))
+            if hasattr(original, 'close'):
+                response.call_on_close(original.close)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            compressor = compressor_for(encoding)
+            response.set_data(compressor.compress(data) + compressor.finish())
+
+        response.headers['Content-Encoding'] = encoding
+        encode_etag(response, encoding)
+        return response
@@ -0,0 +1,123 @@
+import zlib
+from datetime import timezone
+from flask import request, current_app
+
+# Separates an entity tag from the content coding that app.compression appends to the tag of a
+# compressed response, e.g. "3+gzip"
+ENCODING_SEPARATOR = '+'
+
+
+def make_etag(version, fields=None):
+    """
+    Builds the strong ETag of a resource representation from its row version.
+    A field selection yields a different representation, so it is folded into the tag; so does a
+    content coding, which app.compression appends after ENCODING_SEPARATOR.
+
+    Args:
+        version (int): The row's version counter.
+        fields (tuple, optional): The selected response fields, or None for the full record.
+    Returns:
+        str: The unquoted entity tag.
+    """
+    if fields is None:
+        return str(version)
+    return f"{version}-{zlib.crc32(','.join(fields).encode()):08x}"
+
+
+def identity_etag(etag):
+    """
+    Returns the tag of the uncompressed representation a (possibly compressed) response's tag names.
+    """
+    return etag.split(ENCODING_SEPARATOR, 1)[0]
+
+
+def _version_of(etag):
+    return identity_etag(etag).split('-', 1)[0]
+
+
+def is_not_modified(etag, last_modified=None, req=None):
+    """
+    Evaluates the request's If-None-Match (or, without it, If-Modified-Since) precondition.
+    A tag the client received with a compressed copy of the representation matches too.
+
+    Args:
+        etag (str): The current entity tag of the resource.
+        last_modified (datetime, optional): When the resource was last written, as naive UTC.
+        req (optional): The request to evaluate; the current Flask request by default.
+    Returns:
+        bool: True if the client's copy is current and a 304 can be sent.
+    """
+    req = req if req is not None else request
+    if req.if_none_match:
+        if req.if_none_match.star_tag:
+            return True
+        return etag in {identity_etag(tag) for tag in req.if_none_match.as_set(include_weak=True)}
+    if req.if_modified_since and last_modified is not None:
+        # HTTP dates have one-second resolution
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= req.if_modified_since
+    return False
+
+
+def if_match_failed(version, req=None):
+    """
+    Evaluates the request's If-Match precondition against the stored row version.
+    Tags of any field selection or content coding of the same version match, since they describe
+    the same row state.
+
+    Args:
+        version (int): The current version of the row, or None if it does not exist.
+        req (optional): The request to evaluate; the current Flask request by default.
+    Returns:
+        bool: True if the request carried If-Match and it does not match, so a 412 must be sent.
+    """
+    if_match = (req if req is not None else request).if_match
+    if not if_match:
+        return False
+    if if_match.star_tag:
+        return version is None
+    return str(version) not in {_version_of(tag) for tag in if_match.as_set()}
+
+
+def if_match_versions(req=None):
+    """
+    Returns the row versions the request's If-Match header accepts, for a conditional UPDATE that
+    checks the precondition in its WHERE clause instead of reading the row first.
+
+    Args:
+        req (optional): The request to evaluate; the current Flask request by default.
+    Returns:
+        list: The versions named by the header's tags (empty if none is a version), or None if the
+              request has no If-Match or If-Match: * (any existing row matches).
+    """
+    if_match = (req if req is not None else request).if_match
+    if not if_match or if_match.star_tag:
+        return None
+    versions = {_version_of(tag) for tag in if_match.as_set()}
+    return sorted(int(version) for version in versions if version.isdigit())
+
+
+def with_validators(response, version, last_modified=None, fields=None):
+    """
+    Attaches ETag and Last-Modified headers to a response.
+
+    Args:
+        response: A Flask response object.
+        version (int): The row's version counter.
+        last_modified (datetime, optional): When the row was last written, as naive UTC.
+        fields (tuple, optional): The field selection the body was built with.
+    Returns:
+        The same response object.
+    """
+    response.set_etag(make_etag(version, fields))
+    if last_modified is not None:
+        response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return response
+
+
+def not_modified_response(version, last_modified=None, fields=None, response_class=None):
+    """
+    Returns an empty 304 response carrying the current validators.
+    `response_class` defaults to the current Flask app's; the asyncio app passes its own.
+    """
+    response_class = response_class or current_app.response_class
+    return with_validators(response_class(status=304), version, last_modified, fields)
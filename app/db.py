@@ -1,35 +1,340 @@
+import itertools
+import os
+import threading
+import time
+import weakref
+from datetime import datetime, timezone
+import click
+from flask import g, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.sql import text
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.dml import UpdateBase
+from app.metrics import InstrumentedQueuePool
+
+
+class RoutingSession(Session):
+    """
+    Session that sends the reads of GET requests to a read replica when replicas are configured.
+
+    Everything else goes to the primary: writes (flushes and INSERT/UPDATE/DELETE statements),
+    every statement of a non-GET request, work outside a request such as the reservation sweeper,
+    and GET requests from a client inside its read-your-writes window.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or isinstance(clause, UpdateBase):
+                # Remember the write so the client is pinned to the primary for a while
+                g.db_wrote = True
+            elif g.get('db_read_replica'):
+                # Choose once per request so all of its reads share one replica connection
+                if 'db_replica' not in g:
+                    g.db_replica = self._connect_replica()
+                if g.db_replica is not None:
+                    return g.db_replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _connect_replica(self):
+        """
+        Connects this session to a healthy replica, moving on to the next one when connecting fails.
+        Returns:
+            Engine: The replica's engine, or None to read from the primary.
+        """
+        for _ in replicas.keys:
+            key = replicas.choose()
+            if key is None:
+                break
+            engine = self._db.engines[key]
+            try:
+                self.connection(bind_arguments={"bind": engine})
+                return engine
+            except SQLAlchemyError:
+                replicas.mark_down(key)
+        return None
+
 
 # Initialize the SQLAlchemy object
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+def utcnow():
+    """
+    Returns the current UTC time as a naive datetime, which is how timestamps are stored.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def pool_settings(app):
+    """
+    Size the connection pool from the serving configuration.
+
+    Each handler thread holds at most one connection at a time, so a worker running
+    SERVER_THREADS threads needs a pool of that size plus a little overflow for background
+    work such as the reservation sweeper. DB_POOL_SIZE and DB_MAX_OVERFLOW override the
+    computed values; without any serving configuration the historical 10 + 20 pool is used.
+
+    Args:
+        app: The Flask application instance.
+    Returns:
+        tuple: The pool size and the maximum overflow.
+    """
+    threads = int(app.config.get('SERVER_THREADS') or 0)
+    pool_size = app.config.get('DB_POOL_SIZE') or (threads if threads else 10)
+    max_overflow = app.config.get('DB_MAX_OVERFLOW')
+    if max_overflow is None:
+        max_overflow = max(2, threads // 4) if threads else 20
+    return int(pool_size), int(max_overflow)
+
+
+def engine_options(pool_size, max_overflow, name):
+    """
+    Returns the engine options shared by the primary and the replica binds.
+    """
+    return {
+        "poolclass": InstrumentedQueuePool,  # QueuePool that reports checkout waits and timeouts to /metrics
+        "pool_size": pool_size,      # Persistent connections kept per worker process
+        "max_overflow": max_overflow,  # Additional connections allowed beyond the pool size
+        "pool_timeout": 30,          # Wait up to 30 seconds for a connection to become available
+        "pool_recycle": 1800,        # Recycle connections after 30 minutes to prevent stale connections
+        "pool_logging_name": name    # Labels the pool in /metrics
+    }
+
 
 def init_db(app):
     """
     Initialize the database with the Flask app and configure connection pooling.
 
+    No connection is opened here: in a preforking server the app may be created before the
+    workers fork, and sockets must not be shared across processes. Call `warm_up_db` from
+    each worker instead.
+
+    Tables are not created here: the schema is managed by the migrations in migrations/
+    (`flask db upgrade`).
+
+    Replicas listed in DATABASE_REPLICA_URLS become additional binds with their own pools
+    (REPLICA_POOL_SIZE and REPLICA_MAX_OVERFLOW, defaulting to the primary's sizing).
+
     Args:
         app: The Flask application instance.
     """
+    pool_size, max_overflow = pool_settings(app)
+
     # Configure SQLAlchemy connection pooling options
-    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-        "poolclass": QueuePool,   # Use QueuePool for efficient connection pooling
-        "pool_size": 10,          # Maintain up to 10 persistent connections in the pool
-        "max_overflow": 20,       # Allow up to 20 additional connections beyond the pool size
-        "pool_timeout": 30,       # Wait up to 30 seconds for a connection to become available
-        "pool_recycle": 1800      # Recycle connections after 30 minutes to prevent stale connections
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(pool_size, max_overflow, "primary")
+
+    # Each replica is a separate bind with its own connection pool
+    replica_pool_size = int(app.config.get('REPLICA_POOL_SIZE') or pool_size)
+    replica_max_overflow = app.config.get('REPLICA_MAX_OVERFLOW')
+    replica_max_overflow = max_overflow if replica_max_overflow is None else int(replica_max_overflow)
+    app.config['SQLALCHEMY_BINDS'] = {
+        key: dict(engine_options(replica_pool_size, replica_max_overflow, key), url=url)
+        for key, url in replica_urls(app).items()
     }
-    
+
     # Bind the SQLAlchemy object to the Flask app
     db.init_app(app)
+    replicas.init_app(app)
 
-    # Test the database connection within the app context
-    with app.app_context():
+    # Alembic takes about as long to import as SQLAlchemy, so server workers skip it; the
+    # migrations are only registered when the app is loaded by the `flask` command
+    if click.get_current_context(silent=True) is not None:
+        init_migrations(app)
+
+
+def init_migrations(app):
+    """
+    Register the schema migrations in migrations/ (`flask db upgrade`) with the app. `init_db` does
+    this when running under the `flask` command; call it to run migrations from Python.
+
+    Migrations run against the primary only; replicas receive schema changes through replication.
+
+    Args:
+        app: The Flask application instance.
+    """
+    from flask_migrate import Migrate
+    Migrate(app, db, directory=os.path.join(os.path.dirname(app.root_path), 'migrations'), render_as_batch=True)
+
+
+def replica_urls(app):
+    """
+    Returns the configured replicas as {bind key: URL}, e.g. {"replica0": "mysql+pymysql://..."}.
+    """
+    urls = [url.strip() for url in (app.config.get('DATABASE_REPLICA_URLS') or '').split(',') if url.strip()]
+    return {f"replica{i}": url for i, url in enumerate(urls)}
+
+
+class ReplicaRouter:
+    """
+    Chooses the replica that serves a read and keeps track of replica health.
+
+    Strategies (REPLICA_STRATEGY):
+        round_robin: Cycle through the healthy replicas.
+        least_connections: Use the healthy replica with the fewest checked-out connections.
+
+    A replica whose connection fails is marked down for REPLICA_RETRY_INTERVAL seconds and reads
+    fall back to the other replicas, or to the primary when none is left. Once the interval has
+    passed, the next read probes the replica with SELECT 1 before routing to it again.
+
+    After a request writes, the client receives a cookie that pins its reads to the primary for
+    READ_YOUR_WRITES_SECONDS, so it always sees its own writes despite replication lag. Other
+    clients may read a lagging replica, and a book cached from it stays until BOOK_CACHE_TTL or
+    the book's next write.
+    """
+
+    COOKIE = 'db_primary_until'
+
+    def __init__(self):
+        self.keys = []
+        self.strategy = 'round_robin'
+        self.retry_interval = 30.0
+        self.pin_seconds = 5.0
+        self._down_until = {}
+        self._cycle = itertools.count()
+        self._lock = threading.Lock()
+        self._watched = weakref.WeakSet()
+
+    def init_app(self, app):
+        self.keys = list(replica_urls(app))
+        self.strategy = app.config.get('REPLICA_STRATEGY', 'round_robin')
+        if self.strategy not in ('round_robin', 'least_connections'):
+            raise ValueError("REPLICA_STRATEGY must be round_robin or least_connections.")
+        self.retry_interval = float(app.config.get('REPLICA_RETRY_INTERVAL', 30))
+        self.pin_seconds = float(app.config.get('READ_YOUR_WRITES_SECONDS', 5))
+        self._down_until = {}
+        app.extensions['db_replicas'] = self
+        if not self.keys:
+            return
+
+        @app.before_request
+        def route_reads():
+            # Only GET requests read from replicas, and only outside the client's read-your-writes window
+            pinned_until = request.cookies.get(self.COOKIE, type=float) or 0
+            g.db_read_replica = request.method in ('GET', 'HEAD') and pinned_until <= time.time()
+
+        @app.after_request
+        def pin_writers(response):
+            if g.get('db_wrote') and self.pin_seconds > 0:
+                response.set_cookie(self.COOKIE, f"{time.time() + self.pin_seconds:.3f}",
+                                    max_age=max(1, int(self.pin_seconds + 0.999)), httponly=True, samesite='Lax')
+            return response
+
+    def engines(self):
+        """
+        Returns the replica engines of the current app as {bind key: Engine}, creating them on first use.
+        """
+        engines = db.engines
+        for key in self.keys:
+            engine = engines[key]
+            if engine not in self._watched:
+                # Any connection failure on a replica takes it out of rotation
+                event.listen(engine, 'handle_error', lambda context, key=key: self._on_error(key, context))
+                self._watched.add(engine)
+        return {key: engines[key] for key in self.keys}
+
+    def _on_error(self, key, context):
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(key)
+
+    def mark_down(self, key):
+        with self._lock:
+            self._down_until[key] = time.monotonic() + self.retry_interval
+
+    def _healthy(self, key, engine):
+        if key not in self._down_until:
+            return True
+        with self._lock:
+            down_until = self._down_until.get(key)
+            if down_until is None:
+                return True
+            if down_until > time.monotonic():
+                return False
+            # Keep it out of rotation for other threads while this one probes it
+            self._down_until[key] = time.monotonic() + self.retry_interval
         try:
-            db.session.execute(text('SELECT 1'))  # Execute a simple query to test the connection
-            print("Database connected successfully.")
-        except SQLAlchemyError as e:
-            # Log an error message if the connection test fails
-            print(f"Database connection error: {e}")
+            with engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+        except SQLAlchemyError:
+            return False
+        with self._lock:
+            self._down_until.pop(key, None)
+        return True
+
+    def choose(self):
+        """
+        Returns the bind key of the replica that should serve the next read, or None to use the primary.
+        """
+        if not self.keys:
+            return None
+        engines = self.engines()
+        healthy = [(key, engine) for key, engine in engines.items() if self._healthy(key, engine)]
+        if not healthy:
+            return None
+        # Rotate the candidates so that ties between idle replicas are also spread round-robin
+        start = next(self._cycle) % len(healthy)
+        healthy = healthy[start:] + healthy[:start]
+        if self.strategy == 'least_connections':
+            return min(healthy, key=lambda item: item[1].pool.checkedout())[0]
+        return healthy[0][0]
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "strategy": self.strategy,
+                "replicas": {key: {"healthy": self._down_until.get(key, 0) <= now} for key in self.keys},
+            }
+
+
+# Read replica routing for `db.session`
+replicas = ReplicaRouter()
+
+
+def open_connections(app, connections=1):
+    """
+    Open pooled connections in the current process so the first requests do not pay for connecting.
+
+    Args:
+        app: The Flask application instance.
+        connections (int): The number of pooled connections to establish.
+    Raises:
+        SQLAlchemyError: If the primary database cannot be reached.
+    """
+    with app.app_context():
+        # Replicas are optional: one that cannot be reached is marked down and reads use the primary
+        for key, engine in replicas.engines().items():
+            engine.dispose(close=False)
+            try:
+                with engine.connect() as connection:
+                    connection.execute(text('SELECT 1'))
+            except SQLAlchemyError as e:
+                replicas.mark_down(key)
+                app.logger.warning(f"Replica {key} unavailable: {e}")
+
+        # Discard anything inherited from a parent process before connecting
+        db.engine.dispose(close=False)
+        held = [db.engine.connect() for _ in range(max(1, connections))]
+        held[0].execute(text('SELECT 1'))  # Execute a simple query to test the connection
+        for connection in held:
+            connection.close()
+
+
+def warm_up_db(app, connections=1):
+    """
+    Open connections in the current process so the first requests do not pay for connecting.
+
+    Args:
+        app: The Flask application instance.
+        connections (int): The number of pooled connections to establish.
+    Returns:
+        bool: True if the database answered, False otherwise.
+    """
+    try:
+        open_connections(app, connections)
+        app.logger.info("Database connected successfully.")
+        return True
+    except SQLAlchemyError as e:
+        # Log an error message if the connection test fails
+        app.logger.error(f"Database connection error: {e}")
+        return False
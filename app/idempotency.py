@@ -0,0 +1,212 @@
+"""
+Idempotency keys for non-idempotent writes (POST).
+
+A client that sends `Idempotency-Key: <unique value>` with a request may retry it safely: the
+first request runs and its response is stored for IDEMPOTENCY_TTL seconds; a retry with the same
+key and the same body gets the stored response back, with `Idempotent-Replayed: true`, without
+running the view or touching the database. Keys are scoped to the client (see
+RateLimiter.client_id), the method and the path.
+
+    - The same key with a different body is rejected with 422.
+    - The same key while the first request is still running is rejected with 409 and Retry-After.
+    - 5xx responses are not stored, so the request can be retried for real.
+
+The store is the same kind of bounded, expiring cache as the book cache: per worker in memory
+(LRU, IDEMPOTENCY_MAXSIZE entries), or shared between workers in Redis. With the memory backend
+a retry that lands on another worker runs again, so duplicates must still be rejected by the
+database (the unique index on customers.userId does that for POST /customers).
+"""
+import functools
+import hashlib
+import threading
+
+from flask import current_app, request
+
+from app.cache import Cache, LRUCache, RedisCache
+from app.ratelimit import rate_limiter
+
+HEADER = 'Idempotency-Key'
+
+# Longest key a client may send
+MAX_KEY_LENGTH = 255
+
+# Seconds a claim on a key lasts while its first request runs, so a crashed worker frees it
+IN_FLIGHT_TTL = 60
+
+# Response headers kept with a stored response and sent again on replay
+REPLAYED_HEADERS = ('Content-Type', 'Location', 'ETag', 'Last-Modified')
+
+
+class IdempotencyStore:
+    """
+    Claims idempotency keys and keeps the responses of the requests that used them.
+
+    Each key holds either an in-flight claim, {"fingerprint": ...}, or the finished response,
+    {"fingerprint": ..., "status": ..., "body": ..., "headers": {...}}.
+    """
+
+    def __init__(self):
+        self.cache = Cache()
+        self.ttl = 86400.0
+        self.enabled = False
+        self.replays = 0
+        self.conflicts = 0
+        self.mismatches = 0
+        self._lock = threading.Lock()
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def scope(self, req, key):
+        """
+        Returns the storage key for an Idempotency-Key sent with a request.
+        """
+        return f"{rate_limiter.client_id(req)} {req.method} {req.path} {key}"
+
+    @staticmethod
+    def fingerprint(body):
+        return hashlib.sha256(body).hexdigest()
+
+    def begin(self, scoped_key, fingerprint):
+        """
+        Claims a key for a new request.
+        Returns:
+            tuple: None if the request should run, otherwise the (body, status, headers) to answer with.
+        """
+        if self.cache.add(scoped_key, {"fingerprint": fingerprint}, IN_FLIGHT_TTL):
+            return None
+        stored = self.cache.get(scoped_key)
+        if stored is None and self.cache.add(scoped_key, {"fingerprint": fingerprint}, IN_FLIGHT_TTL):
+            # The previous claim was released or expired between the two calls
+            return None
+        if stored is not None and stored["fingerprint"] != fingerprint:
+            self._count("mismatches")
+            return {"message": f"This {HEADER} was already used with a different request."}, 422, {}
+        if stored is None or "status" not in stored:
+            self._count("conflicts")
+            return {"message": f"A request with this {HEADER} is still being processed."}, 409, {"Retry-After": "1"}
+        self._count("replays")
+        headers = dict(stored["headers"], **{"Idempotent-Replayed": "true"})
+        return stored["body"], stored["status"], headers
+
+    def finish(self, scoped_key, fingerprint, status, body, headers):
+        """
+        Stores the response of a request that claimed a key, or releases the key after a server error.
+        """
+        if status >= 500:
+            self.cache.delete(scoped_key)
+            return
+        kept = {name: headers[name] for name in REPLAYED_HEADERS if name in headers}
+        self.cache.set(scoped_key, {"fingerprint": fingerprint, "status": status, "body": body, "headers": kept}, self.ttl)
+
+    def release(self, scoped_key):
+        self.cache.delete(scoped_key)
+
+    def stats(self):
+        return dict(self.cache.stats(), replays=self.replays, conflicts=self.conflicts, mismatches=self.mismatches)
+
+
+# Application-wide idempotency store; configured by `init_idempotency`
+idempotency_store = IdempotencyStore()
+
+
+def _key(req):
+    key = req.headers.get(HEADER)
+    if key is not None and not 0 < len(key) <= MAX_KEY_LENGTH:
+        raise ValueError(f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters long.")
+    return key
+
+
+def idempotent(view):
+    """
+    Makes a Flask view honour the Idempotency-Key header (see the module docstring).
+    Requests without the header run as usual.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            key = _key(request)
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        if key is None or not idempotency_store.enabled:
+            return view(*args, **kwargs)
+
+        scoped_key = idempotency_store.scope(request, key)
+        fingerprint = idempotency_store.fingerprint(request.get_data())
+        answer = idempotency_store.begin(scoped_key, fingerprint)
+        if answer is not None:
+            return answer
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except BaseException:
+            idempotency_store.release(scoped_key)
+            raise
+        idempotency_store.finish(scoped_key, fingerprint, response.status_code, response.get_data(as_text=True), response.headers)
+        return response
+
+    return wrapper
+
+
+def idempotent_async(view):
+    """
+    Async counterpart of `idempotent` for the Quart views of app.aio.
+    """
+    from quart import current_app as quart_app, request as quart_request
+
+    @functools.wraps(view)
+    async def wrapper(*args, **kwargs):
+        try:
+            key = _key(quart_request)
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        if key is None or not idempotency_store.enabled:
+            return await view(*args, **kwargs)
+
+        scoped_key = idempotency_store.scope(quart_request, key)
+        fingerprint = idempotency_store.fingerprint(await quart_request.get_data())
+        answer = idempotency_store.begin(scoped_key, fingerprint)
+        if answer is not None:
+            return answer
+        try:
+            response = await quart_app.make_response(await view(*args, **kwargs))
+        except BaseException:
+            idempotency_store.release(scoped_key)
+            raise
+        body = await response.get_data(as_text=True)
+        idempotency_store.finish(scoped_key, fingerprint, response.status_code, body, response.headers)
+        return response
+
+    return wrapper
+
+
+def init_idempotency(app):
+    """
+    Configure the idempotency store from the Flask (or Quart) config.
+
+    Recognised settings:
+        IDEMPOTENCY_BACKEND: "memory" (default), "redis" or "none" (the header is ignored).
+        IDEMPOTENCY_MAXSIZE: Maximum number of keys held by the in-process backend.
+        IDEMPOTENCY_TTL: Seconds a stored response is replayed for.
+        CACHE_REDIS_URL: Connection string for the redis backend.
+
+    Args:
+        app: The Flask application instance.
+    """
+    backend = app.config.get('IDEMPOTENCY_BACKEND', 'memory')
+    idempotency_store.ttl = float(app.config.get('IDEMPOTENCY_TTL', 86400))
+    idempotency_store.enabled = backend != 'none'
+
+    if backend == 'none':
+        idempotency_store.cache.backend = None
+    elif backend == 'redis':
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("IDEMPOTENCY_BACKEND=redis requires the 'redis' package") from e
+        client = redis.Redis.from_url(app.config['CACHE_REDIS_URL'])
+        idempotency_store.cache.backend = RedisCache(client, prefix="idempotency:", ttl=idempotency_store.ttl)
+    else:
+        idempotency_store.cache.backend = LRUCache(maxsize=int(app.config.get('IDEMPOTENCY_MAXSIZE', 10000)), ttl=idempotency_store.ttl)
+
+    app.extensions['idempotency'] = idempotency_store
@@ -0,0 +1,123 @@
+import threading
+from sqlalchemy import update, select
+
+from app.db import db, utcnow
+from app.cache import book_cache
+from app.models.book import Book
+from app.models.reservation import Reservation
+
+
+def take_stock(isbn, quantity):
+    """
+    Atomically removes copies of a book from stock within the current transaction.
+
+    The decrement is a single conditional UPDATE, so concurrent callers can never drive the
+    quantity below zero: the database only applies it while enough copies remain. The row's
+    version is bumped with it so cached ETags are invalidated.
+
+    Args:
+        isbn (str): The ISBN of the book.
+        quantity (int): The number of copies to take.
+    Returns:
+        bool: True if the stock was taken, False if the book has fewer than `quantity` copies
+              left (or does not exist).
+    """
+    result = db.session.execute(
+        update(Book.__table__)
+        .where(Book.__table__.c.ISBN == isbn, Book.__table__.c.quantity >= quantity)
+        .values(quantity=Book.__table__.c.quantity - quantity, version=Book.__table__.c.version + 1)
+    )
+    return result.rowcount == 1
+
+
+def release_expired_reservations(batch_size=500):
+    """
+    Expires active reservations whose hold has lapsed and returns their copies to stock.
+
+    Each reservation is flipped to "expired" with a conditional UPDATE before its stock is
+    restored, so a reservation that is purchased or released concurrently by another worker
+    is never returned to stock twice.
+
+    Args:
+        batch_size (int): The maximum number of reservations handled per call.
+    Returns:
+        int: The number of reservations released.
+    """
+    reservations = Reservation.__table__
+    expired = db.session.execute(
+        select(reservations.c.id, reservations.c.ISBN, reservations.c.quantity)
+        .where(reservations.c.status == 'active', reservations.c.expires_at <= utcnow())
+        .limit(batch_size)
+    ).all()
+
+    released = set()
+    for reservation_id, isbn, quantity in expired:
+        result = db.session.execute(
+            update(reservations)
+            .where(reservations.c.id == reservation_id, reservations.c.status == 'active')
+            .values(status='expired')
+        )
+        if result.rowcount == 1:
+            db.session.execute(
+                update(Book.__table__)
+                .where(Book.__table__.c.ISBN == isbn)
+                .values(quantity=Book.__table__.c.quantity + quantity, version=Book.__table__.c.version + 1)
+            )
+            released.add((reservation_id, isbn))
+    db.session.commit()
+
+    for isbn in {isbn for _, isbn in released}:
+        book_cache.invalidate(isbn)
+    return len(released)
+
+
+class ReservationSweeper(threading.Thread):
+    """
+    Background thread that periodically releases expired reservations.
+
+    Args:
+        app: The Flask application instance whose database the sweeper works on.
+        interval (float): Seconds between sweeps.
+        batch_size (int): The maximum number of reservations released per sweep pass.
+    """
+
+    def __init__(self, app, interval=30, batch_size=500):
+        super().__init__(name='reservation-sweeper', daemon=True)
+        self.app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            with self.app.app_context():
+                try:
+                    # Keep going while full batches come back so a backlog clears in one sweep
+                    while release_expired_reservations(self.batch_size) == self.batch_size:
+                        pass
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error(f"Reservation sweep failed: {e}")
+                finally:
+                    db.session.remove()
+
+    def stop(self):
+        self._stopped.set()
+
+
+def start_reservation_sweeper(app):
+    """
+    Start the background reservation sweeper unless RESERVATION_SWEEP_INTERVAL is 0.
+
+    Args:
+        app: The Flask application instance.
+    Returns:
+        ReservationSweeper: The running sweeper, or None if sweeping is disabled.
+    """
+    interval = float(app.config.get('RESERVATION_SWEEP_INTERVAL', 30))
+    if interval <= 0:
+        return None
+    sweeper = ReservationSweeper(app, interval=interval)
+    sweeper.start()
+    app.extensions['reservation_sweeper'] = sweeper
+    return sweeper
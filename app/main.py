@@ -1,3 +1,5 @@
+import os
+
 # Import the create_app function from the app package's __init__.py file
 from app.__init__ import create_app
 
@@ -6,5 +8,7 @@ app = create_app()
 
 # Run the application if this script is executed directly
 if __name__ == "__main__":
-    # Start the Flask development server on host 0.0.0.0 and port 5000 with debug mode enabled
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # Start the Flask development server on host 0.0.0.0 and port 5000.
+    # Debug mode must be requested explicitly with FLASK_DEBUG=1; production traffic is served by app.serve.
+    app.extensions['startup'].warm_up()
+    app.run(host="0.0.0.0", port=5000, debug=os.getenv('FLASK_DEBUG') == '1')
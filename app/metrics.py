@@ -0,0 +1,260 @@
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    """
+    Cumulative histogram in the Prometheus layout: a count per bucket upper bound, plus sum and count.
+    Not thread-safe on its own; the owning registry holds the lock.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last slot is the +Inf bucket
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        """
+        Yields the _bucket, _sum and _count lines of the histogram.
+        """
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{format_labels(labels + (("le", str(bound)),))} {cumulative}'
+        yield f'{name}_sum{format_labels(labels)} {self.sum:.6f}'
+        yield f'{name}_count{format_labels(labels)} {self.count}'
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        f'{key}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for key, value in labels
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+class Metrics:
+    """
+    Per-process registry of request, query and connection pool metrics.
+
+    Requests are aggregated per endpoint (the Flask endpoint name, so the label set stays bounded
+    no matter which ISBNs or IDs are requested). Each worker process keeps its own registry; a
+    scrape of /metrics reports the process that served it, labelled with its pid.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}          # (endpoint, method, status) -> count
+        self.durations = {}         # endpoint -> Histogram of handler seconds
+        self.queries = {}           # endpoint -> statements executed
+        self.query_seconds = {}     # endpoint -> seconds spent executing statements
+        self.pool_wait_seconds = {}  # endpoint -> seconds spent waiting for a pooled connection
+        self.pool_checkouts = {}    # pool name -> checkouts
+        self.pool_timeouts = {}     # pool name -> checkouts that gave up after pool_timeout
+        self.pool_waits = {}        # pool name -> Histogram of checkout wait seconds
+        self.slow_queries = 0
+        self.pools = weakref.WeakSet()
+
+    def record_request(self, endpoint, method, status, seconds, queries, query_seconds, pool_wait):
+        with self._lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.durations.get(endpoint)
+            if histogram is None:
+                histogram = self.durations[endpoint] = Histogram()
+            histogram.observe(seconds)
+            self.queries[endpoint] = self.queries.get(endpoint, 0) + queries
+            self.query_seconds[endpoint] = self.query_seconds.get(endpoint, 0.0) + query_seconds
+            self.pool_wait_seconds[endpoint] = self.pool_wait_seconds.get(endpoint, 0.0) + pool_wait
+
+    def record_checkout(self, pool_name, seconds, timed_out=False):
+        with self._lock:
+            self.pool_checkouts[pool_name] = self.pool_checkouts.get(pool_name, 0) + 1
+            if timed_out:
+                self.pool_timeouts[pool_name] = self.pool_timeouts.get(pool_name, 0) + 1
+            histogram = self.pool_waits.get(pool_name)
+            if histogram is None:
+                histogram = self.pool_waits[pool_name] = Histogram()
+            histogram.observe(seconds)
+
+    def record_slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def render(self, pid):
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        base = (("pid", pid),)
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            family("http_requests_total", "counter", "Requests handled, by endpoint, method and status.")
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{format_labels(base + (('endpoint', endpoint), ('method', method), ('status', status)))} {count}")
+
+            family("http_request_duration_seconds", "histogram", "Handler time per endpoint.")
+            for endpoint, histogram in sorted(self.durations.items()):
+                lines.extend(histogram.samples("http_request_duration_seconds", base + (("endpoint", endpoint),)))
+
+            family("db_queries_total", "counter", "SQL statements executed while handling requests, by endpoint.")
+            for endpoint, count in sorted(self.queries.items()):
+                lines.append(f"db_queries_total{format_labels(base + (('endpoint', endpoint),))} {count}")
+
+            family("db_query_seconds_total", "counter", "Time spent executing SQL statements, by endpoint.")
+            for endpoint, seconds in sorted(self.query_seconds.items()):
+                lines.append(f"db_query_seconds_total{format_labels(base + (('endpoint', endpoint),))} {seconds:.6f}")
+
+            family("db_pool_wait_seconds_total", "counter", "Time requests spent waiting for a pooled connection, by endpoint.")
+            for endpoint, seconds in sorted(self.pool_wait_seconds.items()):
+                lines.append(f"db_pool_wait_seconds_total{format_labels(base + (('endpoint', endpoint),))} {seconds:.6f}")
+
+            family("db_pool_checkouts_total", "counter", "Connections checked out of the pool.")
+            for pool_name, count in sorted(self.pool_checkouts.items()):
+                lines.append(f"db_pool_checkouts_total{format_labels(base + (('pool', pool_name),))} {count}")
+
+            family("db_pool_timeouts_total", "counter", "Checkouts that gave up after pool_timeout.")
+            for pool_name in sorted(self.pool_checkouts):
+                lines.append(f"db_pool_timeouts_total{format_labels(base + (('pool', pool_name),))} {self.pool_timeouts.get(pool_name, 0)}")
+
+            family("db_pool_checkout_wait_seconds", "histogram", "Time to obtain a connection from the pool.")
+            for pool_name, histogram in sorted(self.pool_waits.items()):
+                lines.extend(histogram.samples("db_pool_checkout_wait_seconds", base + (("pool", pool_name),)))
+
+            family("db_slow_queries_total", "counter", "Statements slower than SLOW_QUERY_MS.")
+            lines.append(f"db_slow_queries_total{format_labels(base)} {self.slow_queries}")
+
+        # Pool gauges are read live from every pool still in use
+        gauges = (
+            ("db_pool_size", "Persistent connections the pool keeps.", lambda pool: pool.size()),
+            ("db_pool_checked_out", "Connections currently checked out.", lambda pool: pool.checkedout()),
+            ("db_pool_overflow", "Connections open beyond the pool size (negative while the pool is filling).", lambda pool: pool.overflow()),
+        )
+        pools = sorted(self.pools, key=lambda pool: pool.metrics_name)
+        for name, help_text, read in gauges:
+            family(name, "gauge", help_text)
+            for pool in pools:
+                lines.append(f"{name}{format_labels(base + (('pool', pool.metrics_name),))} {read(pool)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that times every checkout, including the time spent blocked waiting for a free
+    connection, and counts checkouts that time out.
+
+    Pools are labelled with the engine's `pool_logging_name` ("primary" unless configured).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics_name = self._orig_logging_name or "primary"
+        metrics.pools.add(self)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            metrics.record_checkout(self.metrics_name, time.perf_counter() - started, timed_out=True)
+            raise
+        waited = time.perf_counter() - started
+        metrics.record_checkout(self.metrics_name, waited)
+        if has_request_context():
+            g.metrics_pool_wait = g.get('metrics_pool_wait', 0.0) + waited
+        return connection
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stack = conn.info.get('metrics_query_started')
+    if not stack:
+        return
+    elapsed = time.perf_counter() - stack.pop()
+
+    if has_request_context():
+        g.metrics_queries = g.get('metrics_queries', 0) + 1
+        g.metrics_query_seconds = g.get('metrics_query_seconds', 0.0) + elapsed
+
+    threshold = _slow_query_seconds
+    if threshold and elapsed >= threshold:
+        metrics.record_slow_query()
+        endpoint = request.endpoint if has_request_context() else None
+        _logger.warning(f"Slow query ({elapsed * 1000:.1f} ms, endpoint {endpoint}): {statement[:500]}")
+
+
+# Set by init_metrics; module level so the engine events need no app context
+_slow_query_seconds = 0
+_logger = None
+
+
+def init_metrics(app):
+    """
+    Instrument the app: time every request, attribute SQL statements and pool waits to the
+    endpoint that caused them, optionally log slow queries, and expose everything at /metrics.
+
+    The engine events are registered on the Engine class, so every engine the app creates
+    (including ones recreated after a fork) is covered. METRICS_ENABLED=0 turns it all off.
+
+    Args:
+        app: The Flask application instance.
+    """
+    global _slow_query_seconds, _logger
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    _slow_query_seconds = float(app.config.get('SLOW_QUERY_MS') or 0) / 1000
+    _logger = app.logger
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.get('metrics_started')
+        if started is None:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        metrics.record_request(
+            endpoint, request.method, response.status_code, time.perf_counter() - started,
+            g.get('metrics_queries', 0), g.get('metrics_query_seconds', 0.0), g.get('metrics_pool_wait', 0.0)
+        )
+        return response
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        return metrics.render(os.getpid()), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
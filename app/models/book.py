@@ -1,18 +1,41 @@
-from app.db import db
+from app.db import db, utcnow
 from sqlalchemy.orm import validates
+from app.validation import normalize_isbn13
+
+
+def _isbn13_default(context):
+    # Computed per row, so bulk INSERTs through the Core table get it too
+    return normalize_isbn13(context.get_current_parameters().get('ISBN'))
 
 # Define the Book model (table)
 class Book(db.Model):
     __tablename__ = 'books'  # Name of the table in the database
+
+    # Composite indexes backing the keyset-paginated listing; InnoDB appends the primary key
+    # to every secondary index, so each one resolves "WHERE col = ? AND ISBN > ?" as a range seek
+    __table_args__ = (
+        db.Index('ix_books_genre_isbn', 'genre', 'ISBN'),
+        db.Index('ix_books_genre_price_isbn', 'genre', 'price', 'ISBN'),
+        db.Index('ix_books_author_isbn', 'author', 'ISBN'),
+        db.Index('ix_books_price_isbn', 'price', 'ISBN'),
+        db.Index('ix_books_isbn13', 'isbn13'),
+        db.Index('ix_books_updated_at', 'updated_at'),  # The search index's refresh of recent writes
+    )
     
     # Define the columns of the table
-    ISBN = db.Column(db.String(200), primary_key=True, nullable=False, unique=True)  # Primary key, unique identifier for each book
+    ISBN = db.Column(db.String(200), primary_key=True, nullable=False)  # Primary key, unique identifier for each book
     title = db.Column(db.String(200), nullable=False)  # Title of the book
     author = db.Column(db.String(200), nullable=False)  # Author of the book
     description = db.Column(db.Text, nullable=False)  # Description or summary of the book
     genre = db.Column(db.String(200), nullable=False)  # Genre or category of the book
     price = db.Column(db.Float, nullable=False)  # Price of the book
     quantity = db.Column(db.Integer, nullable=False)  # Quantity of the book available in stock
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # Bumped on every write; backs the ETag
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow)  # Last write (UTC); backs Last-Modified
+    isbn13 = db.Column(db.String(13), nullable=True, default=_isbn13_default)  # Normalized ISBN-13 (None if ISBN is not an ISBN); see `flask catalog backfill`
+
+    # Let the ORM bump `version` on every update and refuse to overwrite a concurrently modified row
+    __mapper_args__ = {"version_id_col": version}
     
     # Constructor to initialize a Book object
     def __init__(self, ISBN, title, author, description, genre, price, quantity):
@@ -1,13 +1,26 @@
-from app.db import db
+from app.db import db, utcnow
 from sqlalchemy.orm import validates
 
+
+def _user_id_lower_default(context):
+    # Computed per row, so bulk INSERTs through the Core table get it too
+    user_id = context.get_current_parameters().get('userId')
+    return user_id.lower() if user_id is not None else None
+
+
 # Define the Customer model (table)
 class Customer(db.Model):
     __tablename__ = 'customers'  # Name of the table in the database
 
+    # Named so migrations can manage them; the unique index backs the userId lookup
+    __table_args__ = (
+        db.Index('uq_customers_userId', 'userId', unique=True),
+        db.Index('ix_customers_user_id_lower', 'user_id_lower'),
+    )
+
     # Define the columns for the customers table
     customer_id = db.Column(db.Integer, primary_key=True, autoincrement=True)  # Primary key, auto-incremented
-    userId = db.Column(db.String(255), nullable=False, unique=True)  # Unique user identifier
+    userId = db.Column(db.String(255), nullable=False)  # Unique user identifier (see uq_customers_userId)
     name = db.Column(db.String(255), nullable=False)  # Customer's name
     phone = db.Column(db.String(255), nullable=False)  # Customer's phone number
     address = db.Column(db.String(255), nullable=False)  # Primary address
@@ -15,6 +28,12 @@ class Customer(db.Model):
     city = db.Column(db.String(255), nullable=False)  # City of residence
     state = db.Column(db.String(255), nullable=False)  # State of residence
     zipcode = db.Column(db.String(255), nullable=False)  # Zip code
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # Bumped on every write; backs the ETag
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow)  # Last write (UTC); backs Last-Modified
+    user_id_lower = db.Column(db.String(255), nullable=True, default=_user_id_lower_default)  # Lowercased userId for case-insensitive lookups
+
+    # Let the ORM bump `version` on every update and refuse to overwrite a concurrently modified row
+    __mapper_args__ = {"version_id_col": version}
 
     # Constructor to initialize a Customer object
     def __init__(self, userId, name, phone, address, city, state, zipcode, address2=None):
@@ -25,4 +44,10 @@ class Customer(db.Model):
         self.address2 = address2  # Assign secondary address (if provided)
         self.city = city  # Assign city
         self.state = state  # Assign state
-        self.zipcode = zipcode  # Assign zip code
\ No newline at end of file
+        self.zipcode = zipcode  # Assign zip code
+
+    # Keep the lowercased copy in step whenever userId is assigned through the ORM
+    @validates('userId')
+    def _lower_user_id(self, key, value):
+        self.user_id_lower = value.lower() if value is not None else None
+        return value
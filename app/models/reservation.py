@@ -0,0 +1,30 @@
+from app.db import db, utcnow
+
+
+# Define the Reservation model (table)
+class Reservation(db.Model):
+    __tablename__ = 'reservations'  # Name of the table in the database
+
+    # Lets the sweeper find expired holds without scanning purchased history
+    __table_args__ = (
+        db.Index('ix_reservations_status_expires_at', 'status', 'expires_at'),
+    )
+
+    # Define the columns of the table
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)  # Primary key, auto-incremented
+    ISBN = db.Column(db.String(200), db.ForeignKey('books.ISBN'), nullable=False, index=True)  # Book being held or sold
+    quantity = db.Column(db.Integer, nullable=False)  # Number of copies held or sold
+    status = db.Column(db.String(20), nullable=False, default='active')  # active, purchased or expired
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)  # When the stock was taken (UTC)
+    expires_at = db.Column(db.DateTime, nullable=True)  # When an active hold is released (UTC)
+
+    # Constructor to initialize a Reservation object
+    def __init__(self, ISBN, quantity, status='active', expires_at=None):
+        self.ISBN = ISBN
+        self.quantity = quantity
+        self.status = status
+        self.expires_at = expires_at
+
+    # String representation of the Reservation object for debugging and logging
+    def __repr__(self):
+        return f"<Reservation {self.id} {self.status} ({self.quantity} x ISBN: {self.ISBN})>"
@@ -0,0 +1,220 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryBuckets:
+    """
+    In-process token buckets, one per key.
+
+    A bucket holds up to `burst` tokens and refills at `rate` tokens per second; every request
+    takes one. Buckets are refilled lazily from the time elapsed since they were last used, so
+    idle keys cost nothing. The least recently used buckets are dropped beyond `maxsize`; a
+    dropped bucket starts again full, which is what an idle bucket would have refilled to anyway.
+
+    Args:
+        maxsize (int): The maximum number of buckets kept.
+    """
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst):
+        """
+        Takes a token from the bucket of `key`.
+        Returns:
+            tuple: (allowed, tokens left, seconds until a token is available)
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return allowed, tokens, 0 if allowed else (1 - tokens) / rate
+
+    def stats(self):
+        with self._lock:
+            return {"backend": "memory", "buckets": len(self._buckets), "maxsize": self.maxsize}
+
+
+class RedisBuckets:
+    """
+    Token buckets shared by every worker through Redis (or any client exposing `register_script`).
+
+    The refill and take run atomically in a Lua script against the server's clock, so all
+    workers and hosts draw from the same bucket. Idle buckets expire once they would be full again.
+
+    Args:
+        client: A redis-py compatible client instance.
+        prefix (str): The prefix prepended to every key to namespace the buckets.
+    """
+
+    SCRIPT = """
+    local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+    local tokens = tonumber(state[1]) or burst
+    local updated_at = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, client, prefix="ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+        self._take = client.register_script(self.SCRIPT)
+
+    def take(self, key, rate, burst):
+        allowed, tokens = self._take(keys=[self.prefix + key], args=[rate, burst])
+        tokens = float(tokens)
+        return bool(allowed), tokens, 0 if allowed else (1 - tokens) / rate
+
+    def stats(self):
+        return {"backend": "redis", "prefix": self.prefix}
+
+
+def parse_endpoint_limits(value):
+    """
+    Parses per-endpoint overrides such as "books.add_book=5:10,customers.create_customer=2:5".
+
+    Returns:
+        dict: Endpoint name -> (rate per second, burst).
+    Raises:
+        ValueError: If an entry is malformed.
+    """
+    limits = {}
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        try:
+            endpoint, limit = item.split('=')
+            rate, burst = limit.split(':')
+            limits[endpoint.strip()] = (float(rate), float(burst))
+        except ValueError:
+            raise ValueError(f"Invalid rate limit {item!r}; expected endpoint=rate:burst.")
+    return limits
+
+
+class RateLimiter:
+    """
+    Per-client, per-endpoint rate limiting bound to a bucket backend by `init_rate_limit`.
+
+    Every (client, endpoint) pair has its own bucket, so one client hammering one endpoint is
+    slowed down without affecting other clients or its other requests. Until it is initialized
+    (or when rate limiting is disabled) every request is allowed.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.rate = 50
+        self.burst = 100
+        self.endpoint_limits = {}
+        self.blueprints = set()
+        self.client_header = None
+        self.limited = 0
+
+    def init_app(self, app):
+        if not app.config.get('RATE_LIMIT_ENABLED', True):
+            self.backend = None
+            return
+
+        self.rate = float(app.config.get('RATE_LIMIT_RATE', 50))
+        self.burst = float(app.config.get('RATE_LIMIT_BURST', 100))
+        self.endpoint_limits = parse_endpoint_limits(app.config.get('RATE_LIMIT_ENDPOINTS'))
+        self.blueprints = {name.strip() for name in app.config.get('RATE_LIMIT_BLUEPRINTS', 'books,customers,inventory,transfer').split(',')}
+        self.client_header = app.config.get('RATE_LIMIT_CLIENT_HEADER')
+
+        if app.config.get('RATE_LIMIT_BACKEND', 'memory') == 'redis':
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package") from e
+            url = app.config.get('RATE_LIMIT_REDIS_URL') or app.config['CACHE_REDIS_URL']
+            self.backend = RedisBuckets(redis.Redis.from_url(url))
+        else:
+            self.backend = MemoryBuckets()
+        app.extensions['rate_limiter'] = self
+
+    def client_id(self, req):
+        """
+        Identifies the caller: the RATE_LIMIT_CLIENT_HEADER value (e.g. an API key or the client
+        address set by a trusted proxy) when configured and present, otherwise the peer address.
+        """
+        if self.client_header:
+            value = req.headers.get(self.client_header)
+            if value:
+                return value
+        return req.remote_addr or 'unknown'
+
+    def check(self, req):
+        """
+        Takes a token for the request.
+
+        Args:
+            req: The current Flask or Quart request.
+        Returns:
+            tuple: A (body, 429, headers) response to return instead of handling the request, or
+                   None if the request may proceed.
+        """
+        if self.backend is None or req.blueprint not in self.blueprints or req.endpoint is None:
+            return None
+        rate, burst = self.endpoint_limits.get(req.endpoint, (self.rate, self.burst))
+        allowed, _, retry_after = self.backend.take(f"{req.endpoint}:{self.client_id(req)}", rate, burst)
+        if allowed:
+            return None
+        self.limited += 1
+        retry_after = max(1, math.ceil(retry_after))
+        return {"message": f"Too many requests; retry after {retry_after}s."}, 429, {"Retry-After": str(retry_after)}
+
+    def stats(self):
+        if self.backend is None:
+            return {"backend": None}
+        return {**self.backend.stats(), "rate": self.rate, "burst": self.burst, "limited": self.limited}
+
+
+# Rate limiter for the books and customers endpoints
+rate_limiter = RateLimiter()
+
+
+def init_rate_limit(app):
+    """
+    Rate limit the API per client and endpoint with token buckets; excess requests get a 429
+    with a Retry-After header before they reach a view or the connection pool.
+
+    Recognised settings:
+        RATE_LIMIT_ENABLED: Set to False to allow every request.
+        RATE_LIMIT_BACKEND: "memory" (default, per worker process) or "redis" (shared by all workers).
+        RATE_LIMIT_REDIS_URL: Connection string for the redis backend (default CACHE_REDIS_URL).
+        RATE_LIMIT_RATE: Requests per second each client may make to each endpoint.
+        RATE_LIMIT_BURST: Requests a client may make at once before the rate applies.
+        RATE_LIMIT_ENDPOINTS: Per-endpoint overrides, e.g. "books.add_books_batch=1:5".
+        RATE_LIMIT_BLUEPRINTS: Comma-separated blueprints that are limited (default "books,customers,inventory,transfer").
+        RATE_LIMIT_CLIENT_HEADER: Header identifying the client instead of the peer address.
+
+    Args:
+        app: The Flask application instance.
+    """
+    from flask import request
+
+    rate_limiter.init_app(app)
+
+    @app.before_request
+    def limit_request():
+        return rate_limiter.check(request)
@@ -1,5 +1,7 @@
 from app.routes.books import books_bp  # Import the books blueprint
 from app.routes.customer import customer_bp  # Import the customer blueprint
+from app.routes.inventory import inventory_bp  # Import the inventory blueprint
+from app.routes.transfer import transfer_bp  # Import the catalog export/import blueprint
 
 # List of all blueprints
-blueprints = [books_bp,customer_bp]  
\ No newline at end of file
+blueprints = [books_bp,customer_bp,inventory_bp,transfer_bp]  
\ No newline at end of file
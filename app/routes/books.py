@@ -1,11 +1,75 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, g, Response, redirect, stream_with_context, url_for
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from app.models.book import Book  # Import the Book model
 from app.db import db  # Import the db object for database interaction
+from app.cache import book_cache, book_loads  # Import the read-through book cache and load coalescing
+from app.search import book_search  # Import the full-text search index
+from app.validation import BOOK_SCHEMA, BOOK_UPDATE_SCHEMA, error_body, normalize_isbn13  # Import the precompiled validators
+from app.serializers import BOOK_FIELDS, columns_for, parse_fields, project, serialize_book, stream_json  # Import the serializers
+from app.conditional import (  # Import the HTTP conditional request helpers
+    if_match_failed, is_not_modified, make_etag, not_modified_response, with_validators
+)
 
 # Create a Blueprint for books-related routes
 books_bp = Blueprint('books', __name__, url_prefix='/books')
 
 
+def cache_book(book):
+    """
+    Stores a book's full response body in the cache together with its version and last write time,
+    so cache hits can answer conditional requests without touching the database. An entry is never
+    replaced by an older version, so a load that raced with a write cannot undo its write-through.
+    Args:
+        book: A Book instance or a row that includes the version and updated_at columns.
+    Returns:
+        dict: The cache entry.
+    """
+    entry = {"version": book.version, "updated_at": book.updated_at.isoformat(), "body": serialize_book(book)}
+    book_cache.store(book.ISBN, entry)
+    return entry
+
+
+def load_book(isbn):
+    """
+    Loads a book's columns without building an ORM object and caches the full record.
+    Returns:
+        dict: The cache entry, or None if the book does not exist.
+    """
+    book = db.session.query(*columns_for(None, BOOK_FIELDS, Book.version, Book.updated_at)).filter(Book.ISBN == isbn).first()
+    return cache_book(book) if book else None
+
+
+def isbn13_statement(isbn):
+    """
+    Builds the lookup of a book stored under another form of `isbn` (an ISBN-10, or one written
+    with hyphens), matched on the normalized isbn13 column.
+    Returns:
+        Select: The statement selecting the stored ISBN, or None if `isbn` is not an ISBN.
+    """
+    isbn13 = normalize_isbn13(isbn)
+    if isbn13 is None:
+        return None
+    return select(Book.ISBN).where(Book.isbn13 == isbn13, Book.ISBN != isbn).limit(1)
+
+
+def book_not_found(isbn):
+    """
+    Answers a GET for an ISBN no book is stored under: a 404, or with ISBN_REDIRECTS set, a redirect
+    to the book stored under another form of the same ISBN (see `isbn13_statement`).
+    """
+    statement = isbn13_statement(isbn) if current_app.config['ISBN_REDIRECTS'] else None
+    match = db.session.execute(statement).scalar() if statement is not None else None
+    if match is None:
+        return jsonify({"message": "ISBN not found"}), 404
+    # Not permanent: a book may later be stored under the requested form itself
+    return redirect(url_for('books.get_book', isbn=match, **request.args.to_dict()), 302)
+
+
 # Route to retrieve a book by its ISBN
 @books_bp.route('/isbn/<isbn>', methods=['GET'])
 @books_bp.route('/<isbn>', methods=['GET'])
@@ -16,40 +80,403 @@ def get_book(isbn):
     It queries the database for the book with the given ISBN and returns its details if found.
     Args:
         isbn (str): The ISBN of the book to be retrieved.
+    Query parameters:
+        fields (str, optional): A comma-separated list of the fields to return.
     Returns:
-        Response: A JSON response with the book details and a 200 status code if the book is found.
+        Response: A JSON response with the book details, ETag and Last-Modified headers and a 200 status code
+                  if the book is found.
+        Response: An empty response with a 304 status code if If-None-Match or If-Modified-Since shows the
+                  client's copy is current.
+        Response: A redirect with a 302 status code to the book stored under another form of the ISBN
+                  (ISBN-10 or ISBN-13, with or without hyphens) when ISBN_REDIRECTS is set.
         Response: A JSON response with an error message and a 404 status code if the book is not found.
         Response: A JSON response with an error message and a 400 status code in case of a value error.
         Response: A JSON response with an error message and a 500 status code in case of unexpected errors.
     """
     
     try:
-        # Query the database for a book with the given ISBN
-        book = Book.query.filter_by(ISBN=isbn).first()
-        if not book:
-            # Return a 404 error if the book is not found
-            return jsonify({"message": "ISBN not found"}), 404
+        fields = parse_fields(request.args.get('fields'), BOOK_FIELDS)
+
+        # Serve the book from the cache when possible
+        entry = book_cache.get(isbn)
+
+        if entry is None and request.if_none_match:
+            # Revalidate from the version column alone before loading the whole row
+            current = db.session.query(Book.version, Book.updated_at).filter(Book.ISBN == isbn).first()
+            if not current:
+                # Redirect to the book stored under another form of the ISBN, or return a 404 error
+                return book_not_found(isbn)
+            if is_not_modified(make_etag(current.version, fields)):
+                return not_modified_response(current.version, current.updated_at, fields)
+
+        if entry is None:
+            # Concurrent misses for the same ISBN share a single query; a client pinned to the
+            # primary after a write never shares a load that may have read a lagging replica
+            entry = book_loads.do((isbn, bool(g.get('db_read_replica'))), lambda: load_book(isbn))
+            if entry is None:
+                # Redirect to the book stored under another form of the ISBN, or return a 404 error
+                return book_not_found(isbn)
+
+        version, updated_at = entry["version"], datetime.fromisoformat(entry["updated_at"])
+        if is_not_modified(make_etag(version, fields), updated_at):
+            # Return a 304 without serializing when the client's copy is current
+            return not_modified_response(version, updated_at, fields)
+
+        # Return the book details with a 200 status code
+        return with_validators(jsonify(project(entry["body"], fields)), version, updated_at, fields), 200
+
+    except ValueError as e:
+        # Handle value errors and return a 400 error
+        return jsonify({"message": str(e)}), 400
+
+    except Exception:
+        # Handle unexpected errors and return a 500 error
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
+
+
+# Columns the listing can be ordered by; ISBN is always the tie-breaker so the order is total
+LIST_SORT_COLUMNS = {'isbn': None, 'genre': Book.genre, 'price': Book.price}
+
+# Largest listing page; pages above LIST_STREAM_THRESHOLD rows are streamed instead of buffered
+LIST_MAX_LIMIT = 1000
+
+# Rows fetched from the database at a time while a page is streamed
+STREAM_BATCH_SIZE = 100
+
+
+def encode_cursor(values):
+    """
+    Encodes the sort key of the last row on a page into an opaque, URL-safe cursor.
+    """
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor produced by `encode_cursor`.
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor.")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor.")
+    return values
+
+
+def _float_arg(args, name):
+    """
+    Returns a query parameter parsed as a float, or None if it is absent.
+    Raises:
+        ValueError: If the parameter is present but not a number.
+    """
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number.")
+
+
+def list_conditions(args, sort_column):
+    """
+    Builds the WHERE clauses of a catalog listing from its query parameters: the optional
+    filters plus the keyset condition that seeks past the previous page's cursor.
+    Args:
+        args: The request's query parameters.
+        sort_column: The listing's sort column, or None when sorting by ISBN alone.
+    Returns:
+        list: SQLAlchemy conditions to apply with filter() or where().
+    Raises:
+        ValueError: If a price bound or the cursor is malformed.
+    """
+    conditions = []
+    # Apply the optional filters
+    if args.get('genre'):
+        conditions.append(Book.genre == args['genre'])
+    if args.get('author'):
+        conditions.append(Book.author == args['author'])
+    min_price, max_price = _float_arg(args, 'min_price'), _float_arg(args, 'max_price')
+    if min_price is not None:
+        conditions.append(Book.price >= min_price)
+    if max_price is not None:
+        conditions.append(Book.price <= max_price)
+    if args.get('in_stock', '').lower() in ('1', 'true', 'yes'):
+        conditions.append(Book.quantity > 0)
+
+    # Seek past the last row of the previous page instead of using OFFSET
+    cursor = args.get('cursor')
+    if cursor:
+        values = decode_cursor(cursor)
+        if sort_column is None:
+            if len(values) != 1:
+                raise ValueError("Invalid cursor.")
+            conditions.append(Book.ISBN > values[0])
+        else:
+            if len(values) != 2:
+                raise ValueError("Invalid cursor.")
+            conditions.append(or_(sort_column > values[0], and_(sort_column == values[0], Book.ISBN > values[1])))
+    return conditions
+
+
+# Route to list books with filters and keyset pagination
+@books_bp.route('/', methods=['GET'])
+def list_books():
+    """
+    Lists books, optionally filtered, one page at a time.
+    This function handles HTTP GET requests to browse the catalog. Pages are fetched with keyset
+    (seek) pagination: the cursor carries the sort key of the last row returned, and the next page
+    starts strictly after it, so every page costs the same regardless of how deep it is.
+    Query parameters:
+        genre (str, optional): Only return books of this genre.
+        author (str, optional): Only return books by this author.
+        min_price, max_price (float, optional): Inclusive price range.
+        in_stock (bool, optional): When "true", only return books with a quantity above zero.
+        fields (str, optional): A comma-separated list of the fields to return for each book.
+        sort (str, optional): "isbn" (default), "genre" or "price".
+        limit (int, optional): Page size, between 1 and LIST_MAX_LIMIT (default 20). Pages larger than
+                               LIST_STREAM_THRESHOLD are streamed as chunked JSON while rows are read.
+        cursor (str, optional): The `next_cursor` value of the previous page.
+        isbn (str, optional): A comma-separated list of ISBNs; when given, the listing is replaced by a
+                              bulk lookup of exactly those books (see `get_books_by_isbn`).
+    Returns:
+        Response: A JSON response with the page of books and the cursor for the next page (null on
+                  the last page) and a 200 status code.
+        Response: A JSON response with an error message and a 400 status code if a parameter is invalid.
+        Response: A JSON response with an error message and a 500 status code in case of unexpected errors.
+    """
+    if 'isbn' in request.args:
+        try:
+            fields = parse_fields(request.args.get('fields'), BOOK_FIELDS)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+        return lookup_books([isbn for isbn in request.args['isbn'].split(',') if isbn], fields)
+
+    try:
+        sort = request.args.get('sort', 'isbn')
+        if sort not in LIST_SORT_COLUMNS:
+            return jsonify({"message": "sort must be one of: isbn, genre, price."}), 400
+        sort_column = LIST_SORT_COLUMNS[sort]
+
+        limit = request.args.get('limit', 20, type=int)
+        if not 1 <= limit <= LIST_MAX_LIMIT:
+            return jsonify({"message": f"limit must be between 1 and {LIST_MAX_LIMIT}."}), 400
+
+        # Select only the columns needed for the response and the cursor
+        fields = parse_fields(request.args.get('fields'), BOOK_FIELDS)
+        query = db.session.query(*columns_for(fields, BOOK_FIELDS, Book.ISBN, *([sort_column] if sort_column is not None else [])))
+
+        # Apply the filters and seek past the previous page
+        query = query.filter(*list_conditions(request.args, sort_column))
+
+        order_by = [Book.ISBN] if sort_column is None else [sort_column, Book.ISBN]
+        # Fetch one extra row to learn whether another page exists
+        query = query.order_by(*order_by).limit(limit + 1)
+        cursor_for = lambda last: encode_cursor([last.ISBN] if sort_column is None else [getattr(last, sort_column.key), last.ISBN])
+
+        if limit > current_app.config.get('LIST_STREAM_THRESHOLD', 100):
+            return _stream_books_page(query.yield_per(STREAM_BATCH_SIZE), limit, fields, cursor_for)
+
+        books = query.all()
+        next_cursor = None
+        if len(books) > limit:
+            books = books[:limit]
+            next_cursor = cursor_for(books[-1])
 
-        # Prepare the response body with book details
         response_body = {
-            "ISBN": book.ISBN,
-            "title": book.title,
-            "Author": book.author,
-            "description": book.description,
-            "genre": book.genre,
-            "price": book.price,
-            "quantity": book.quantity
+            "books": [serialize_book(book, fields) for book in books],
+            "next_cursor": next_cursor
         }
-        # Return the book details with a 200 status code
         return jsonify(response_body), 200
 
     except ValueError as e:
         # Handle value errors and return a 400 error
         return jsonify({"message": str(e)}), 400
 
-    except Exception as e:
+    except Exception:
         # Handle unexpected errors and return a 500 error
-        return jsonify({"message": f"An unexpected error occurred. {e}"}), 500
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
+
+
+def _stream_books_page(rows, limit, fields, cursor_for):
+    """
+    Streams a large listing page as chunked JSON, serializing rows as they are read from the cursor.
+    The response has the same shape as a buffered page; `next_cursor` comes after the books.
+    """
+    state = {"next_cursor": None}
+
+    def books():
+        last = None
+        for count, book in enumerate(rows):
+            if count == limit:
+                # The extra row only tells that another page exists
+                state["next_cursor"] = cursor_for(last)
+                break
+            last = book
+            yield serialize_book(book, fields)
+
+    body = stream_json("books", books(), lambda: {"next_cursor": state["next_cursor"]})
+    return Response(stream_with_context(body), status=200, mimetype='application/json')
+
+
+# Largest number of keys a single bulk lookup may ask for
+MAX_BULK_KEYS = 100
+
+
+def lookup_books(isbns, fields=None):
+    """
+    Retrieves several books by ISBN in one round trip.
+    Cached books are served from the cache and the rest are loaded with a single IN (...) query.
+    Duplicate ISBNs are collapsed, and results follow the order of first appearance in the request.
+    Args:
+        isbns (list): The ISBNs to retrieve.
+        fields (tuple, optional): The fields to return for each book; every field when None.
+    Returns:
+        Response: A JSON response with the books found, in request order, the ISBNs that were not found,
+                  and a 200 status code.
+        Response: A JSON response with an error message and a 400 status code if no ISBN or more than
+                  MAX_BULK_KEYS ISBNs were given.
+        Response: A JSON response with an error message and a 500 status code in case of unexpected errors.
+    """
+    isbns = list(dict.fromkeys(isbns))
+    if not isbns or not all(isinstance(isbn, str) for isbn in isbns):
+        return jsonify({"message": "At least one ISBN is required."}), 400
+    if len(isbns) > MAX_BULK_KEYS:
+        return jsonify({"message": f"At most {MAX_BULK_KEYS} ISBNs can be requested at once."}), 400
+
+    try:
+        found = {}
+        for isbn in isbns:
+            entry = book_cache.get(isbn)
+            if entry is not None:
+                found[isbn] = entry["body"]
+
+        misses = [isbn for isbn in isbns if isbn not in found]
+        if misses:
+            columns = columns_for(None, BOOK_FIELDS, Book.version, Book.updated_at)
+            for book in db.session.query(*columns).filter(Book.ISBN.in_(misses)):
+                found[book.ISBN] = cache_book(book)["body"]
+
+        return jsonify({
+            "books": [project(found[isbn], fields) for isbn in isbns if isbn in found],
+            "missing": [isbn for isbn in isbns if isbn not in found]
+        }), 200
+
+    except Exception:
+        # Handle unexpected errors and return a 500 error
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
+
+
+# Route to retrieve many books by ISBN with the keys in the request body
+@books_bp.route('/lookup', methods=['POST'])
+def get_books_by_isbn():
+    """
+    Retrieves several books by ISBN in one request.
+    This is the POST counterpart of `GET /books?isbn=a,b,c` for key lists that do not fit in a URL.
+    The function expects a JSON body with:
+        - isbns (list): The ISBNs to retrieve (at most MAX_BULK_KEYS).
+        - fields (list, optional): The fields to return for each book.
+    Returns:
+        Response: See `lookup_books`.
+    """
+    data = request.get_json(silent=True)
+    isbns = data.get('isbns') if isinstance(data, dict) else None
+    if not isinstance(isbns, list):
+        return jsonify({"message": "isbns must be a list of ISBNs."}), 400
+    try:
+        fields = parse_fields(','.join(data.get('fields') or []), BOOK_FIELDS)
+    except (TypeError, ValueError) as e:
+        return jsonify({"message": str(e)}), 400
+    return lookup_books(isbns, fields)
+
+
+# Route to search books by keyword
+@books_bp.route('/search', methods=['GET'])
+def search_books():
+    """
+    Searches book titles, authors and descriptions by keyword.
+    This function handles HTTP GET requests for full-text search. Results are ranked with BM25 over
+    an inverted index, and the last query word also matches words it is a prefix of so the endpoint
+    can serve search-as-you-type.
+    Query parameters:
+        q (str): The search query.
+        limit (int, optional): The maximum number of results, between 1 and 100 (default 20).
+        prefix (bool, optional): Set to "false" to disable prefix matching of the last word.
+        fields (str, optional): A comma-separated list of the fields to return for each book.
+    Returns:
+        Response: A JSON response with the ranked books and their scores and a 200 status code.
+        Response: A JSON response with an error message and a 400 status code if the query is missing or invalid.
+        Response: A JSON response with an error message and a 500 status code in case of unexpected errors.
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"message": "Missing q query parameter"}), 400
+        limit = request.args.get('limit', 20, type=int)
+        if not 1 <= limit <= 100:
+            return jsonify({"message": "limit must be between 1 and 100."}), 400
+        prefix = request.args.get('prefix', 'true').lower() not in ('0', 'false', 'no')
+        fields = parse_fields(request.args.get('fields'), BOOK_FIELDS)
+
+        book_search.ensure_ready()
+        hits = book_search.index.search(query, limit=limit, prefix=prefix)
+
+        # Load the matching books in one query and return them in ranked order
+        books = {}
+        if hits:
+            columns = columns_for(fields, BOOK_FIELDS, Book.ISBN)
+            books = {book.ISBN: book for book in db.session.query(*columns).filter(Book.ISBN.in_([isbn for isbn, _ in hits]))}
+        results = [
+            dict(serialize_book(book, fields), score=round(score, 4))
+            for book, score in ((books.get(isbn), score) for isbn, score in hits)
+            if book is not None
+        ]
+        return jsonify({"query": query, "results": results}), 200
+
+    except ValueError as e:
+        # Handle value errors and return a 400 error
+        return jsonify({"message": str(e)}), 400
+
+    except Exception:
+        # Handle unexpected errors and return a 500 error
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
+
+
+# Route to autocomplete search terms
+@books_bp.route('/search/suggest', methods=['GET'])
+def suggest_search_terms():
+    """
+    Suggests indexed words that start with the last word of the given query.
+    Query parameters:
+        q (str): The partial query.
+        limit (int, optional): The maximum number of suggestions, between 1 and 50 (default 10).
+    Returns:
+        Response: A JSON response with the suggested words, most common first, and a 200 status code.
+        Response: A JSON response with an error message and a 400 status code if the query is missing or invalid.
+        Response: A JSON response with an error message and a 500 status code in case of unexpected errors.
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"message": "Missing q query parameter"}), 400
+        limit = request.args.get('limit', 10, type=int)
+        if not 1 <= limit <= 50:
+            return jsonify({"message": "limit must be between 1 and 50."}), 400
+
+        book_search.ensure_ready()
+        return jsonify({"query": query, "suggestions": book_search.index.suggest(query, limit=limit)}), 200
+
+    except Exception:
+        # Handle unexpected errors and return a 500 error
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
 
 
 # Route to add a new book
@@ -58,8 +485,8 @@ def add_book():
     """
     Adds a new book to the system.
     This function handles HTTP POST requests to create a new book entry in the database.
-    It validates the input data, checks for duplicate ISBNs, and ensures the price format is correct.
-    If all validations pass, the book is added to the database.
+    It validates the input data and ensures the price format is correct. If all validations pass, the
+    book is inserted; a duplicate ISBN is rejected by the unique index rather than looked up first.
     Returns:
         Response: A JSON response with the new book's details and a 201 status code if successful.
         Response: A JSON response with an error message and a 400, 422, or 500 status code in case of validation errors,
@@ -69,50 +496,39 @@ def add_book():
     # Get data from the request body
     data = request.get_json()
     try:
-        # Validate that all mandatory fields are present
-        required_fields = ['ISBN', 'title', 'Author', 'description', 'genre', 'price', 'quantity']
-        for field in required_fields:
-            if field not in data or not data[field]:
-                # Return a 400 error if any mandatory field is missing or empty
-                return jsonify({"message": f"{field} is a mandatory field and cannot be empty."}), 400
-
-        # Check if a book with the same ISBN already exists
-        if Book.query.filter_by(ISBN=data['ISBN']).first():
-            # Return a 422 error if the ISBN already exists
-            return jsonify({"message": "This ISBN already exists in the system."}), 422
-
-        # Validate that the price has exactly two decimal points
-        if not isinstance(data['price'], (float, str)) or not (len(str(data['price']).split('.')[-1]) == 2):
-            # Return a 400 error if the price format is invalid
-            return jsonify({"message": "Price must have exactly two decimal points."}), 400
+        # Validate every field of the payload at once
+        fields, errors = BOOK_SCHEMA.validate(data)
+        if errors:
+            # Return a 400 error listing every missing or malformed field
+            return jsonify(error_body(errors)), 400
 
         # Create a new Book instance with the provided data
         new_book = Book(
-            ISBN=data['ISBN'],
-            title=data['title'],
-            author=data['Author'],
-            description=data['description'],
-            genre=data['genre'],
-            price=float(data['price']),
-            quantity=int(data['quantity'])
+            ISBN=fields['ISBN'],
+            title=fields['title'],
+            author=fields['Author'],
+            description=fields['description'],
+            genre=fields['genre'],
+            price=fields['price'],
+            quantity=fields['quantity']
         )
 
-        # Add the new book to the database
+        # Insert the book; there is no lookup first, the unique index on ISBN rejects a duplicate
         db.session.add(new_book)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            # Return a 422 error if the ISBN already exists
+            return jsonify({"message": "This ISBN already exists in the system."}), 422
         db.session.commit()
 
-        # Prepare the response body with the new book's details
-        response_body = {
-            "ISBN": new_book.ISBN,
-            "title": new_book.title,
-            "Author": new_book.author,
-            "description": new_book.description,
-            "genre": new_book.genre,
-            "price": new_book.price,
-            "quantity": new_book.quantity
-        }
-        # Return the response with a 201 status code and a Location header
-        response = jsonify(response_body)
+        # Write the committed book through to the cache and the search index
+        entry = cache_book(new_book)
+        book_search.index_books([entry["body"]])
+
+        # Return the response with a 201 status code, a Location header and the new version's ETag
+        response = with_validators(jsonify(entry["body"]), new_book.version, new_book.updated_at)
         response.status_code = 201
         response.headers['Location'] = f"{request.host_url}books/{new_book.ISBN}"
         return response
@@ -121,9 +537,10 @@ def add_book():
         # Handle value errors and return a 400 error
         return jsonify({"message": str(e)}), 400
 
-    except Exception as e:
+    except Exception:
         # Handle unexpected errors and return a 500 error
-        return jsonify({"message": f"An unexpected error occurred.{e}"}), 500
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
 
 
 # Route to update an existing book by its ISBN
@@ -136,65 +553,301 @@ def update_book(isbn):
     and updates the book's information if all validations pass.
     Args:
         isbn (str): The ISBN of the book to be updated, extracted from the URL.
+    An If-Match header holding an ETag from a previous GET makes the update conditional on the book
+    not having changed since (optimistic concurrency).
     Returns:
-        Response: A JSON response with the updated book details and a 200 status code if successful.
+        Response: A JSON response with the updated book details, the new ETag and a 200 status code if successful.
         Response: A JSON response with an error message and a 400, 404, or 500 status code in case of validation errors,
                 book not found, or unexpected errors respectively.
+        Response: A JSON response with an error message and a 412 status code if If-Match does not match the current
+                version, or a 409 status code if a concurrent update won the race.
     """
     # Get data from the request body
     data = request.get_json()
     try:
-        # Validate that all mandatory fields are present
-        required_fields = ['title', 'Author', 'description', 'genre', 'price', 'quantity']
-        for field in required_fields:
-            if field not in data or not data[field]:
-                # Return a 400 error if any mandatory field is missing or empty
-                return jsonify({"message": f"{field} is a mandatory field and cannot be empty."}), 400
-        
+        # Validate every field of the payload at once
+        fields, errors = BOOK_UPDATE_SCHEMA.validate(data)
+        if errors:
+            # Return a 400 error listing every missing or malformed field
+            return jsonify(error_body(errors)), 400
+
         # Check if the ISBN in the request body matches the book's ISBN
         if 'ISBN' in data and data['ISBN'] != isbn:
             # Return a 400 error if the ISBN in the request body does not match the book's ISBN
             return jsonify({"message": "ISBN in the request body does not match the book's ISBN."}), 400
 
-        # Validate that the price has exactly two decimal points
-        if not isinstance(data['price'], (float, str)) or not (len(str(data['price']).split('.')[-1]) == 2):
-            # Return a 400 error if the price format is invalid
-            return jsonify({"message": "Price must have exactly two decimal points."}), 400
-        
         # Query the database for a book with the given ISBN
         book = Book.query.filter_by(ISBN=isbn).first()
         if not book:
-            # Return a 404 error if the book is not found
+            # Return a 404 error if the book is not found, whatever the preconditions
             return jsonify({"message": "ISBN not found"}), 404
+        if if_match_failed(book.version):
+            # Return a 412 error if the client's copy is not the current version
+            return jsonify({"message": "The book was modified since it was retrieved (If-Match failed)."}), 412
 
         # Update the book details with the provided data
-        book.title = data['title']
-        book.author = data['Author']
-        book.description = data['description']
-        book.genre = data['genre']
-        book.price = float(data['price'])
-        book.quantity = int(data['quantity'])
-
-        # Commit the changes to the database
+        book.title = fields['title']
+        book.author = fields['Author']
+        book.description = fields['description']
+        book.genre = fields['genre']
+        book.price = fields['price']
+        book.quantity = fields['quantity']
+
+        # Commit the changes; the UPDATE only applies if the row still has the version loaded above
         db.session.commit()
 
-        # Prepare the response body with the updated book details
-        response_body = {
-            "ISBN": book.ISBN,
-            "title": book.title,
-            "Author": book.author,
-            "description": book.description,
-            "genre": book.genre,
-            "price": book.price,
-            "quantity": book.quantity
-        }
-        # Return the updated book details with a 200 status code
-        return jsonify(response_body), 200
+        # Refresh the cached copy and the search index now that the update is committed
+        entry = cache_book(book)
+        book_search.index_books([entry["body"]])
+
+        # Return the updated book details and the new ETag with a 200 status code
+        return with_validators(jsonify(entry["body"]), book.version, book.updated_at), 200
+
+    except StaleDataError:
+        # Another request updated the book between our read and our write
+        db.session.rollback()
+        status = 412 if request.if_match else 409
+        return jsonify({"message": "The book was modified concurrently; retrieve it again and retry."}), status
 
     except ValueError as e:
         # Handle value errors and return a 400 error
         return jsonify({"message": str(e)}), 400
 
-    except Exception as e:
+    except Exception:
+        # Handle unexpected errors and return a 500 error
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
+
+
+def _batch_chunk_size():
+    """
+    Returns the number of rows written per bulk INSERT, taken from the `chunk_size` query
+    parameter when given and bounded by the BOOK_BATCH_CHUNK_SIZE configuration.
+    """
+    configured = int(current_app.config.get('BOOK_BATCH_CHUNK_SIZE', 1000))
+    requested = request.args.get('chunk_size', type=int)
+    if requested is None or requested <= 0:
+        return configured
+    return min(requested, configured * 10)
+
+
+def validate_books(items):
+    """
+    Validates a sequence of book payloads with the book schema and rejects ISBNs repeated within it.
+    Args:
+        items (list): (index, payload) pairs taken from the batch.
+    Returns:
+        tuple: The rows ready for a bulk INSERT as (index, row) pairs, and the per-item error
+               results for payloads that were rejected.
+    """
+    rows, errors, seen = [], [], set()
+    for index, data in items:
+        if not isinstance(data, dict):
+            errors.append({"index": index, "status": 400, "message": "Each item must be a JSON object."})
+            continue
+        fields, field_errors = BOOK_SCHEMA.validate(data)
+        isbn = fields.get('ISBN', data.get('ISBN'))
+        if field_errors:
+            errors.append(dict(error_body(field_errors), index=index, ISBN=isbn, status=400))
+            continue
+        if isbn in seen:
+            errors.append({"index": index, "ISBN": isbn, "status": 422, "message": "This ISBN appears more than once in the batch."})
+            continue
+        seen.add(isbn)
+        rows.append((index, {
+            "ISBN": isbn,
+            "title": fields['title'],
+            "author": fields['Author'],
+            "description": fields['description'],
+            "genre": fields['genre'],
+            "price": fields['price'],
+            "quantity": fields['quantity']
+        }))
+    return rows, errors
+
+
+def drop_existing(rows, errors, existing):
+    """
+    Removes the rows whose ISBN is already stored, recording a 422 result for each in `errors`.
+    Returns:
+        list: The remaining (index, row) pairs.
+    """
+    if not existing:
+        return rows
+    for index, row in rows:
+        if row["ISBN"] in existing:
+            errors.append({"index": index, "ISBN": row["ISBN"], "status": 422, "message": "This ISBN already exists in the system."})
+    return [(index, row) for index, row in rows if row["ISBN"] not in existing]
+
+
+def _prepare_books(items):
+    """
+    Validates a sequence of book payloads and checks all their ISBNs against the database
+    with a single IN (...) query.
+    Args:
+        items (list): (index, payload) pairs taken from the batch.
+    Returns:
+        tuple: The rows ready for a bulk INSERT as (index, row) pairs, and the per-item error
+               results for payloads that were rejected.
+    """
+    rows, errors = validate_books(items)
+
+    # Look up every candidate ISBN in one round trip
+    existing = set()
+    if rows:
+        existing = {isbn for (isbn,) in db.session.query(Book.ISBN).filter(Book.ISBN.in_([row["ISBN"] for _, row in rows]))}
+    return drop_existing(rows, errors, existing), errors
+
+
+def _insert_books(rows, chunk_size):
+    """
+    Writes validated rows with executemany-style bulk INSERTs, committing once per chunk.
+    A chunk that hits a duplicate ISBN (another writer inserted it since `_prepare_books` checked)
+    is rolled back and written again row by row, so only the duplicates fail, with a 422. A chunk
+    that fails for any other reason is rolled back and reported as failed without affecting the
+    other chunks.
+    Args:
+        rows (list): (index, row) pairs produced by `_prepare_books`.
+        chunk_size (int): The number of rows written per INSERT statement.
+    Yields:
+        dict: One result per row.
+    """
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        try:
+            db.session.execute(Book.__table__.insert(), [row for _, row in chunk])
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            yield from _insert_rows(chunk)
+            continue
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception(f"{request.method} {request.path} failed")
+            for index, row in chunk:
+                yield {"index": index, "ISBN": row["ISBN"], "status": 500, "message": "An unexpected error occurred."}
+            continue
+        book_search.index_books(row for _, row in chunk)
+        for index, row in chunk:
+            yield {"index": index, "ISBN": row["ISBN"], "status": 201}
+
+
+def _insert_rows(chunk):
+    """
+    Writes the rows of a chunk one INSERT and commit at a time, after its bulk INSERT hit a duplicate ISBN.
+    Yields:
+        dict: One result per row: 201, 422 for an ISBN that already exists, or 500.
+    """
+    for index, row in chunk:
+        try:
+            db.session.execute(Book.__table__.insert(), row)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            yield {"index": index, "ISBN": row["ISBN"], "status": 422, "message": "This ISBN already exists in the system."}
+            continue
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception(f"{request.method} {request.path} failed")
+            yield {"index": index, "ISBN": row["ISBN"], "status": 500, "message": "An unexpected error occurred."}
+            continue
+        book_search.index_books([row])
+        yield {"index": index, "ISBN": row["ISBN"], "status": 201}
+
+
+# Route to add many books in one request
+@books_bp.route('/batch', methods=['POST'])
+def add_books_batch():
+    """
+    Adds a batch of books to the system.
+    This function handles HTTP POST requests whose body is a JSON array of book payloads
+    (or an object with a "books" array). Every item is validated with the same rules as
+    add_book, duplicates are checked for the whole batch in one query, and valid rows are
+    written with bulk INSERTs in chunks of `chunk_size` rows.
+    Returns:
+        Response: A JSON response with created/failed counts and a per-item result list and a 200 status code.
+        Response: A JSON response with an error message and a 400 or 413 status code if the body is malformed
+                  or holds more items than BOOK_BATCH_MAX_ITEMS.
+        Response: A JSON response with an error message and a 500 status code in case of unexpected errors.
+    """
+    data = request.get_json(silent=True)
+    items = data.get('books') if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return jsonify({"message": "Request body must be a JSON array of books."}), 400
+    if len(items) > int(current_app.config.get('BOOK_BATCH_MAX_ITEMS', 10000)):
+        return jsonify({"message": "Too many books in one batch; use /books/batch/ndjson instead."}), 413
+
+    try:
+        rows, results = _prepare_books(list(enumerate(items)))
+        results.extend(_insert_books(rows, _batch_chunk_size()))
+        results.sort(key=lambda result: result["index"])
+
+        created = sum(1 for result in results if result["status"] == 201)
+        return jsonify({"created": created, "failed": len(results) - created, "results": results}), 200
+
+    except Exception:
         # Handle unexpected errors and return a 500 error
-        return jsonify({"message": f"An unexpected error occurred.{e}"}), 500
\ No newline at end of file
+        db.session.rollback()
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
+
+
+# Route to stream a newline-delimited JSON catalog into the system
+@books_bp.route('/batch/ndjson', methods=['POST'])
+def add_books_ndjson():
+    """
+    Adds books from a newline-delimited JSON (NDJSON) request body of any size.
+    The body is read incrementally, `chunk_size` lines at a time; each chunk is validated,
+    checked for duplicates with one IN (...) query and bulk inserted before the next one is read.
+    Results are streamed back as NDJSON, one line per input item followed by a summary line.
+    Returns:
+        Response: A streamed application/x-ndjson response with a 200 status code.
+    """
+    chunk_size = _batch_chunk_size()
+
+    def parse(lines):
+        for index, line in lines:
+            try:
+                yield index, json.loads(line)
+            except ValueError:
+                yield index, None
+
+    def chunks():
+        pending = []
+        for index, line in enumerate(line for line in request.stream if line.strip()):
+            pending.append((index, line))
+            if len(pending) == chunk_size:
+                yield list(parse(pending))
+                pending = []
+        if pending:
+            yield list(parse(pending))
+
+    def generate():
+        created = failed = 0
+        for items in chunks():
+            for result in _process_ndjson_chunk(items, chunk_size):
+                if result["status"] == 201:
+                    created += 1
+                else:
+                    failed += 1
+                yield json.dumps(result) + "\n"
+        yield json.dumps({"created": created, "failed": failed}) + "\n"
+
+    return Response(stream_with_context(generate()), status=200, mimetype='application/x-ndjson')
+
+
+def _process_ndjson_chunk(items, chunk_size):
+    """
+    Validates, de-duplicates and inserts one chunk of parsed NDJSON items.
+    Returns:
+        list: One result per item, in input order.
+    """
+    try:
+        rows, results = _prepare_books(items)
+        results.extend(_insert_books(rows, chunk_size))
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        results = [{"index": index, "status": 500, "message": "An unexpected error occurred."} for index, _ in items]
+    results.sort(key=lambda result: result["index"])
+    return results
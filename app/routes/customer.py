@@ -1,18 +1,82 @@
-from flask import Blueprint, request, jsonify
-import re
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
 from app.models.customer import Customer  # Import the Customer model
-from app.db import db  # Import the db object for database interaction
+from app.db import db, utcnow  # Import the db object for database interaction
+from app.validation import CUSTOMER_SCHEMA, error_body, is_valid_email  # Import the precompiled validators
+from app.serializers import CUSTOMER_FIELDS, columns_for, parse_fields, serialize_customer  # Import the serializers
+from app.conditional import if_match_versions, is_not_modified, make_etag, not_modified_response, with_validators  # Import the HTTP conditional request helpers
+from app.idempotency import idempotent  # Replays the response of a retried POST sent with an Idempotency-Key
 
 # Create a Blueprint for customer-related routes
 customer_bp = Blueprint('customers', __name__, url_prefix='/customers')
 
 
+def customer_values(fields):
+    """
+    Returns the column values of a customer payload validated with CUSTOMER_SCHEMA.
+    """
+    return {
+        "userId": fields['userId'],
+        "name": fields['name'],
+        "phone": fields['phone'],
+        "address": fields['address'],
+        "address2": fields['address2'],  # Optional field
+        "city": fields['city'],
+        "state": fields['state'],
+        "zipcode": fields['zipcode'],
+    }
+
+
+def update_statement(customer_id, fields, versions=None):
+    """
+    Builds the single UPDATE behind PUT /customers/<id>: it replaces the customer's fields and bumps
+    its version, and only matches the row while its version is one of `versions` (If-Match).
+
+    Args:
+        customer_id (int): The customer to update.
+        fields (dict): The payload validated with CUSTOMER_SCHEMA.
+        versions (list, optional): The versions the client's If-Match accepts; None for any.
+    """
+    customers = Customer.__table__
+    statement = update(customers).where(customers.c.customer_id == customer_id)
+    if versions is not None:
+        statement = statement.where(customers.c.version.in_(versions))
+    return statement.values(
+        **customer_values(fields),
+        user_id_lower=fields['userId'].lower(),
+        version=customers.c.version + 1,
+        updated_at=utcnow(),
+    )
+
+
+def user_id_statements(user_id, columns, any_case=False):
+    """
+    Builds the lookups of a customer by userId, in the order they are tried: the exact userId
+    (uq_customers_userId), then, with `any_case`, the same address in another letter case
+    (ix_customers_user_id_lower). A lookup only matches when it finds exactly one customer, so the
+    second one selects two rows to tell a unique match from addresses that differ only in case.
+    Customers stored before `flask catalog backfill user_id_lower` has run are only found by the first.
+    Returns:
+        list: The SELECT statements.
+    """
+    statements = [select(*columns).where(Customer.userId == user_id)]
+    if any_case:
+        statements.append(
+            select(*columns).where(Customer.user_id_lower == user_id.lower()).order_by(Customer.customer_id).limit(2)
+        )
+    return statements
+
+
 @customer_bp.route('/', methods=['POST'])
+@idempotent
 def create_customer():
     """
     Creates a new customer in the system.
     This function handles HTTP POST requests to create a new customer in the database.
-    It validates the input data, ensures the userId is unique, and adds the customer to the database if all validations pass.
+    It validates the input data and inserts the customer with a single INSERT; the unique index on userId
+    rejects a duplicate, including one created concurrently.
+    A request sent with an Idempotency-Key header may be retried: the retry gets the first response back.
     Args:
         None: The function expects a JSON payload in the request body with the following fields:
             - userId (str): The email address of the customer (must be in a valid email format).
@@ -31,62 +95,92 @@ def create_customer():
     try:
         data = request.get_json()
 
-        # Validate required fields
-        required_fields = ['userId', 'name', 'phone', 'address', 'city', 'state', 'zipcode']
-        for field in required_fields:
-            if field not in data or not data[field]:
-                return jsonify({"message": f"Missing or invalid field: {field}"}), 400
-
-        # Validate email format for userId using regex
-        email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_regex, data['userId']):
-            return jsonify({"message": "Invalid email format for userId"}), 400
+        # Validate every field of the payload at once
+        fields, errors = CUSTOMER_SCHEMA.validate(data)
+        if errors:
+            return jsonify(error_body(errors)), 400
 
-        # Validate state as a 2-letter US state abbreviation
-        valid_states = {
-            'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA', 'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA',
-            'ME', 'MD', 'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ', 'NM', 'NY', 'NC', 'ND', 'OH', 'OK',
-            'OR', 'PA', 'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY'
-        }
-        if data['state'].upper() not in valid_states:
-            return jsonify({"message": "Invalid state format. Must be a 2-letter US state abbreviation"}), 400
-
-        # Check if userId already exists in the database
-        if Customer.query.filter_by(userId=data['userId']).first():
+        # Insert the customer; there is no lookup first, the unique index on userId rejects a duplicate
+        new_customer = Customer(**customer_values(fields))
+        db.session.add(new_customer)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
             return jsonify({"message": "This user ID already exists in the system."}), 422
 
-        # Create a new customer object
-        new_customer = Customer(
-            userId=data['userId'],
-            name=data['name'],
-            phone=data['phone'],
-            address=data['address'],
-            address2=data.get('address2'),  # Optional field
-            city=data['city'],
-            state=data['state'],
-            zipcode=data['zipcode']
-        )
-
-        # Add the new customer to the database
-        db.session.add(new_customer)
+        # Build the response before committing, which would expire the attributes and reload them
+        response = with_validators(jsonify(serialize_customer(new_customer)), new_customer.version, new_customer.updated_at)
+        location = f"/customers/{new_customer.customer_id}"
         db.session.commit()
 
         # Return success response with the created customer data
-        response = {
-            "id": new_customer.customer_id,
-            "userId": new_customer.userId,
-            "name": new_customer.name,
-            "phone": new_customer.phone,
-            "address": new_customer.address,
-            "address2": new_customer.address2,
-            "city": new_customer.city,
-            "state": new_customer.state,
-            "zipcode": new_customer.zipcode
-        }
-        return jsonify(response), 201, {'Location': f"/customers/{new_customer.customer_id}"}
-    except Exception as e:
+        return response, 201, {'Location': location}
+    except Exception:
         # Handle unexpected errors
-        return jsonify({"message": "An error occurred while creating the customer", "error": str(e)}), 500
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An error occurred while creating the customer"}), 500
+
+
+@customer_bp.route('/<id>', methods=['PUT'])
+def update_customer(id):
+    """
+    Replaces the details of a customer identified by their numeric ID.
+    The update is a single conditional UPDATE: the row is not read first, and an If-Match header holding
+    an ETag from a previous GET is checked in the UPDATE's WHERE clause (optimistic concurrency). Where the
+    database supports UPDATE ... RETURNING the new row comes back with it; otherwise it is read in the
+    same transaction.
+    Args:
+        id (str): The numeric ID of the customer to update, passed as a string.
+        The JSON payload has the same fields as for POST /customers.
+    Returns:
+        Response: A JSON response with the updated customer details, the new ETag and a 200 status code if successful.
+        Response: A JSON response with an error message and a 400 status code if the input is invalid.
+        Response: A JSON response with an error message and a 404 status code if the customer is not found,
+                  with or without If-Match.
+        Response: A JSON response with an error message and a 412 status code if If-Match does not match the
+                  current version.
+        Response: A JSON response with an error message and a 422 status code if another customer has the userId.
+        Response: A JSON response with an error message and a 500 status code in case of unexpected errors.
+    """
+    try:
+        # Validate that id is numerical
+        if not id.isdigit():
+            return jsonify({"message": "Illegal, missing, or malformed input"}), 400
+
+        # Validate every field of the payload at once
+        fields, errors = CUSTOMER_SCHEMA.validate(request.get_json())
+        if errors:
+            return jsonify(error_body(errors)), 400
+
+        statement = update_statement(int(id), fields, if_match_versions())
+        columns = columns_for(None, CUSTOMER_FIELDS, Customer.version, Customer.updated_at)
+        try:
+            if db.engine.dialect.update_returning:
+                customer = db.session.execute(statement.returning(*columns)).first()
+            elif db.session.execute(statement).rowcount == 1:
+                customer = db.session.execute(select(*columns).where(Customer.customer_id == int(id))).first()
+            else:
+                customer = None
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({"message": "This user ID already exists in the system."}), 422
+
+        if customer is None:
+            # No row matched: the ID is unknown, or the row exists and If-Match holds a stale version
+            db.session.rollback()
+            if request.if_match and db.session.get(Customer, int(id)) is not None:
+                return jsonify({"message": "The customer was modified since it was retrieved (If-Match failed)."}), 412
+            return jsonify({"message": "Customer ID not found"}), 404
+        db.session.commit()
+
+        # Return the updated customer and the new ETag
+        response = with_validators(jsonify(serialize_customer(customer)), customer.version, customer.updated_at)
+        return response, 200
+    except Exception:
+        # Handle unexpected errors
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An error occurred while updating the customer"}), 500
 
 
 @customer_bp.route('/<id>', methods=['GET'])
@@ -98,8 +192,13 @@ def get_customer_by_id(id):
     and returns the customer's details if found.
     Args:
         id (str): The numeric ID of the customer to be retrieved, passed as a string.
+    Query parameters:
+        fields (str, optional): A comma-separated list of the fields to return.
     Returns:
-        Response: A JSON response with the customer's details and a 200 status code if successful.
+        Response: A JSON response with the customer's details, ETag and Last-Modified headers and a 200 status
+                  code if successful.
+        Response: An empty response with a 304 status code if If-None-Match or If-Modified-Since shows the
+                  client's copy is current.
         Response: A JSON response with an error message and a 400 status code if the input is invalid.
         Response: A JSON response with an error message and a 404 status code if the customer is not found.
         Response: A JSON response with an error message and a 500 status code in case of unexpected errors.
@@ -109,27 +208,34 @@ def get_customer_by_id(id):
         if not id.isdigit():
             return jsonify({"message": "Illegal, missing, or malformed input"}), 400
 
-        # Retrieve customer by numeric ID
-        customer = Customer.query.get(int(id))
+        fields = parse_fields(request.args.get('fields'), CUSTOMER_FIELDS)
+
+        if request.if_none_match:
+            # Revalidate from the version column alone before loading the whole row
+            current = db.session.query(Customer.version, Customer.updated_at).filter(Customer.customer_id == int(id)).first()
+            if not current:
+                return jsonify({"message": "Customer ID not found"}), 404
+            if is_not_modified(make_etag(current.version, fields)):
+                return not_modified_response(current.version, current.updated_at, fields)
+
+        # Retrieve the requested columns of the customer by numeric ID
+        columns = columns_for(fields, CUSTOMER_FIELDS, Customer.version, Customer.updated_at)
+        customer = db.session.query(*columns).filter(Customer.customer_id == int(id)).first()
         if not customer:
             return jsonify({"message": "Customer ID not found"}), 404
+        if is_not_modified(make_etag(customer.version, fields), customer.updated_at):
+            return not_modified_response(customer.version, customer.updated_at, fields)
 
-        # Return customer data
-        response = {
-            "id": customer.customer_id,
-            "userId": customer.userId,
-            "name": customer.name,
-            "phone": customer.phone,
-            "address": customer.address,
-            "address2": customer.address2,
-            "city": customer.city,
-            "state": customer.state,
-            "zipcode": customer.zipcode
-        }
-        return jsonify(response), 200
-    except Exception as e:
+        # Return customer data with its validators
+        response = with_validators(jsonify(serialize_customer(customer, fields)), customer.version, customer.updated_at, fields)
+        return response, 200
+    except ValueError as e:
+        # Handle an invalid field selection
+        return jsonify({"message": str(e)}), 400
+    except Exception:
         # Handle unexpected errors
-        return jsonify({"message": "An error occurred while retrieving the customer", "error": str(e)}), 500
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An error occurred while retrieving the customer"}), 500
 
 
 @customer_bp.route('/', methods=['GET'])
@@ -141,43 +247,92 @@ def get_customer_by_user_id():
     ensures the customer exists in the database.
     Args:
         None: The user ID is extracted from the query parameters of the HTTP request.
+    Query parameters:
+        userId (str): The email address of the customer.
+        fields (str, optional): A comma-separated list of the fields to return.
     Returns:
         Response: A JSON response containing the customer details and a 200 status code if successful.
         Response: A JSON response with an error message and a 400 status code if the user ID is missing
                   or has an invalid format.
         Response: A JSON response with an error message and a 404 status code if the user ID is not found.
         Response: A JSON response with an error message and a 500 status code in case of unexpected errors.
-    
+    The user ID is matched exactly; with USER_ID_ANY_CASE set, a single customer whose user ID differs
+    only in letter case is returned too (see `user_id_statements`).
+    When an `ids` query parameter is given instead, several customers are returned at once (see `lookup_customers`).
     """
+    if 'ids' in request.args:
+        try:
+            fields = parse_fields(request.args.get('fields'), CUSTOMER_FIELDS)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+        return lookup_customers(request.args['ids'].split(','), fields)
+
     try:
         # Retrieve userId from query parameters
         user_id = request.args.get('userId')
         if not user_id:
             return jsonify({"message": "Missing userId query parameter"}), 400
 
-        # Validate email format for userId using regex
-        email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_regex, user_id):
+        # Validate email format for userId using the precompiled regex
+        if not is_valid_email(user_id):
             return jsonify({"message": "Invalid email format for userId"}), 400
 
-        # Retrieve customer by userId
-        customer = Customer.query.filter_by(userId=user_id).first()
+        # Retrieve the requested columns of the customer by userId
+        fields = parse_fields(request.args.get('fields'), CUSTOMER_FIELDS)
+        customer = None
+        statements = user_id_statements(user_id, columns_for(fields, CUSTOMER_FIELDS), current_app.config['USER_ID_ANY_CASE'])
+        for statement in statements:
+            rows = db.session.execute(statement).all()
+            if len(rows) == 1:
+                customer = rows[0]
+                break
         if not customer:
             return jsonify({"message": "User ID not found"}), 404
 
         # Return customer data
-        response = {
-            "id": customer.customer_id,
-            "userId": customer.userId,
-            "name": customer.name,
-            "phone": customer.phone,
-            "address": customer.address,
-            "address2": customer.address2,
-            "city": customer.city,
-            "state": customer.state,
-            "zipcode": customer.zipcode
-        }
+        response = serialize_customer(customer, fields)
         return jsonify(response), 200
-    except Exception as e:
+    except ValueError as e:
+        # Handle an invalid field selection
+        return jsonify({"message": str(e)}), 400
+    except Exception:
+        # Handle unexpected errors
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An error occurred while retrieving the customer"}), 500
+
+
+# Largest number of customer IDs a single bulk lookup may ask for
+MAX_BULK_KEYS = 100
+
+
+def lookup_customers(ids, fields=None):
+    """
+    Retrieves several customers by numeric ID in one round trip.
+    All customers are loaded with a single IN (...) query. Duplicate IDs are collapsed, and results
+    follow the order of first appearance in the request.
+    Args:
+        ids (list): The customer IDs to retrieve, as strings.
+        fields (tuple, optional): The fields to return for each customer; every field when None.
+    Returns:
+        Response: A JSON response with the customers found, in request order, the IDs that were not found,
+                  and a 200 status code.
+        Response: A JSON response with an error message and a 400 status code if an ID is not numeric or
+                  more than MAX_BULK_KEYS IDs were given.
+        Response: A JSON response with an error message and a 500 status code in case of unexpected errors.
+    """
+    ids = [id for id in dict.fromkeys(ids) if id]
+    if not ids or not all(id.isdigit() for id in ids):
+        return jsonify({"message": "Illegal, missing, or malformed input"}), 400
+    if len(ids) > MAX_BULK_KEYS:
+        return jsonify({"message": f"At most {MAX_BULK_KEYS} customer IDs can be requested at once."}), 400
+
+    try:
+        ids = list(dict.fromkeys(int(id) for id in ids))
+        columns = columns_for(fields, CUSTOMER_FIELDS, Customer.customer_id)
+        found = {customer.customer_id: customer for customer in db.session.query(*columns).filter(Customer.customer_id.in_(ids))}
+        customers = [serialize_customer(found[id], fields) for id in ids if id in found]
+        return jsonify({"customers": customers, "missing": [id for id in ids if id not in found]}), 200
+    except Exception:
         # Handle unexpected errors
-        return jsonify({"message": "An error occurred while retrieving the customer", "error": str(e)}), 500
\ No newline at end of file
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An error occurred while retrieving the customers"}), 500
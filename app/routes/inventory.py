@@ -0,0 +1,174 @@
+from datetime import timedelta
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import update
+from app.models.book import Book  # Import the Book model
+from app.models.reservation import Reservation  # Import the Reservation model
+from app.inventory import take_stock  # Import the atomic stock decrement
+from app.cache import book_cache  # Import the read-through book cache
+from app.db import db, utcnow  # Import the db object for database interaction
+
+# Create a Blueprint for stock reservation and purchase routes
+inventory_bp = Blueprint('inventory', __name__, url_prefix='/books')
+
+
+def _request_body():
+    """
+    Returns the optional JSON body of the request ({} when there is none).
+    Raises:
+        ValueError: If the body is JSON but not an object.
+    """
+    data = request.get_json(silent=True)
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object.")
+    return data
+
+
+def _requested_quantity(data):
+    """
+    Returns the positive number of copies requested in the body (default 1).
+    Raises:
+        ValueError: If the quantity is not a positive integer.
+    """
+    quantity = data.get('quantity', 1)
+    if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity <= 0:
+        raise ValueError("quantity must be a positive integer.")
+    return quantity
+
+
+def _reservation_body(reservation):
+    return {
+        "id": reservation.id,
+        "ISBN": reservation.ISBN,
+        "quantity": reservation.quantity,
+        "status": reservation.status,
+        "created_at": reservation.created_at.isoformat() + 'Z',
+        "expires_at": reservation.expires_at.isoformat() + 'Z' if reservation.expires_at else None
+    }
+
+
+def _out_of_stock_response(isbn):
+    """
+    Explains why a conditional stock decrement matched no row: the book is missing or sold out.
+    """
+    db.session.rollback()
+    if not db.session.query(Book.ISBN).filter_by(ISBN=isbn).first():
+        return jsonify({"message": "ISBN not found"}), 404
+    return jsonify({"message": "Not enough copies in stock."}), 409
+
+
+# Route to hold copies of a book for a limited time
+@inventory_bp.route('/<isbn>/reserve', methods=['POST'])
+def reserve_book(isbn):
+    """
+    Reserves copies of a book, removing them from stock until they are purchased or the hold expires.
+    The stock is taken with one conditional UPDATE, so concurrent reservations can never oversell.
+    Args:
+        isbn (str): The ISBN of the book to reserve.
+    The function accepts an optional JSON body with:
+        - quantity (int, optional): The number of copies to hold (default 1).
+        - ttl (int, optional): Seconds to hold the copies, capped at RESERVATION_MAX_TTL.
+    Returns:
+        Response: A JSON response with the reservation and a 201 status code if successful.
+        Response: A JSON response with an error message and a 400, 404 or 409 status code if the input is
+                  invalid, the book does not exist, or there are not enough copies in stock.
+        Response: A JSON response with an error message and a 500 status code in case of unexpected errors.
+    """
+    try:
+        data = _request_body()
+        quantity = _requested_quantity(data)
+        ttl = data.get('ttl', current_app.config.get('RESERVATION_TTL', 900))
+        if isinstance(ttl, bool) or not isinstance(ttl, int) or ttl <= 0:
+            return jsonify({"message": "ttl must be a positive integer."}), 400
+        ttl = min(ttl, int(current_app.config.get('RESERVATION_MAX_TTL', 3600)))
+
+        if not take_stock(isbn, quantity):
+            return _out_of_stock_response(isbn)
+
+        # Record the hold in the same transaction as the stock decrement
+        reservation = Reservation(ISBN=isbn, quantity=quantity, expires_at=utcnow() + timedelta(seconds=ttl))
+        db.session.add(reservation)
+        db.session.commit()
+        book_cache.invalidate(isbn)
+
+        return jsonify(_reservation_body(reservation)), 201
+
+    except ValueError as e:
+        # Handle value errors and return a 400 error
+        return jsonify({"message": str(e)}), 400
+
+    except Exception:
+        # Handle unexpected errors and return a 500 error
+        db.session.rollback()
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
+
+
+# Route to buy copies of a book, directly or by completing a reservation
+@inventory_bp.route('/<isbn>/purchase', methods=['POST'])
+def purchase_book(isbn):
+    """
+    Purchases copies of a book.
+    With a `reservation_id`, the reservation is completed if it is still active; its copies were
+    already taken from stock when it was made. Otherwise `quantity` copies are taken from stock
+    directly with one conditional UPDATE.
+    Args:
+        isbn (str): The ISBN of the book to purchase.
+    The function accepts a JSON body with either:
+        - reservation_id (int): The active reservation to complete.
+        - quantity (int, optional): The number of copies to buy directly (default 1).
+    Returns:
+        Response: A JSON response with the completed purchase and a 200 (reservation) or 201 (direct) status code.
+        Response: A JSON response with an error message and a 400, 404 or 409 status code if the input is
+                  invalid, the book or reservation does not exist, or the stock or reservation is no longer available.
+        Response: A JSON response with an error message and a 500 status code in case of unexpected errors.
+    """
+    try:
+        data = _request_body()
+        reservation_id = data.get('reservation_id')
+        if reservation_id is not None:
+            if isinstance(reservation_id, bool) or not isinstance(reservation_id, int):
+                return jsonify({"message": "reservation_id must be an integer."}), 400
+
+            # Complete the hold only if it is still active and unexpired
+            reservations = Reservation.__table__
+            result = db.session.execute(
+                update(reservations)
+                .where(
+                    reservations.c.id == reservation_id,
+                    reservations.c.ISBN == isbn,
+                    reservations.c.status == 'active',
+                    reservations.c.expires_at > utcnow()
+                )
+                .values(status='purchased')
+            )
+            db.session.commit()
+
+            reservation = db.session.get(Reservation, reservation_id)
+            if not reservation or reservation.ISBN != isbn:
+                return jsonify({"message": "Reservation not found"}), 404
+            if result.rowcount != 1:
+                return jsonify({"message": f"Reservation is no longer active ({reservation.status})."}), 409
+            return jsonify(_reservation_body(reservation)), 200
+
+        quantity = _requested_quantity(data)
+        if not take_stock(isbn, quantity):
+            return _out_of_stock_response(isbn)
+
+        purchase = Reservation(ISBN=isbn, quantity=quantity, status='purchased')
+        db.session.add(purchase)
+        db.session.commit()
+        book_cache.invalidate(isbn)
+
+        return jsonify(_reservation_body(purchase)), 201
+
+    except ValueError as e:
+        # Handle value errors and return a 400 error
+        return jsonify({"message": str(e)}), 400
+
+    except Exception:
+        # Handle unexpected errors and return a 500 error
+        db.session.rollback()
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
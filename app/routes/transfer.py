@@ -0,0 +1,102 @@
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+import gzip
+from app.auth import token_error  # Import the operator token check
+from app.db import db  # Import the db object for database interaction
+from app.transfer import FORMATS, TransferStats, check_format, export_table, get_table, import_table  # Import the export/import pipeline
+
+# Create a Blueprint for bulk catalog export and import. `flask catalog export|import` is the
+# supported way to move whole tables; these endpoints are off unless CATALOG_HTTP_TOKEN is set
+transfer_bp = Blueprint('transfer', __name__, url_prefix='/catalog')
+
+
+@transfer_bp.before_request
+def require_token():
+    """
+    Hides the endpoints unless CATALOG_HTTP_TOKEN is configured, and then only answers requests
+    sent with `Authorization: Bearer <CATALOG_HTTP_TOKEN>`: an export holds every customer's details.
+    """
+    return token_error(current_app.config.get('CATALOG_HTTP_TOKEN'), request.headers.get('Authorization'))
+
+
+def _batch_size():
+    """
+    Returns the rows per batch from the `batch_size` query parameter, or TRANSFER_BATCH_SIZE.
+    """
+    value = request.args.get('batch_size', current_app.config.get('TRANSFER_BATCH_SIZE', 5000))
+    batch_size = int(value)
+    if batch_size < 1:
+        raise ValueError("batch_size must be a positive integer.")
+    return batch_size
+
+
+# Route to stream a whole table out of the system
+@transfer_bp.route('/<table>/export', methods=['GET'])
+def export_catalog(table):
+    """
+    Streams every row of a table as CSV, NDJSON or Parquet.
+    Rows are read through a server-side cursor and encoded one batch at a time, so the response
+    can be arbitrarily large while memory stays bounded by the batch size.
+    Args:
+        table (str): "books" or "customers".
+    Query parameters:
+        format (str): "csv" (default), "ndjson" or "parquet" (requires pyarrow).
+        batch_size (int): Rows fetched and encoded at a time (default TRANSFER_BATCH_SIZE).
+    Returns:
+        Response: The streamed file with a 200 status code, or a JSON error message.
+    """
+    try:
+        fmt = request.args.get('format', 'csv')
+        check_format(fmt)
+        columns = get_table(table)
+        batch_size = _batch_size()
+    except ValueError as e:
+        # Handle an unknown table or format, or a malformed batch size
+        return jsonify({"message": str(e)}), 400
+
+    chunks = export_table(columns, fmt, batch_size)
+    response = Response(stream_with_context(chunks), status=200, mimetype=FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{table}.{fmt}"'
+    return response
+
+
+# Route to load a CSV, NDJSON or Parquet file into a table
+@transfer_bp.route('/<table>/import', methods=['POST'])
+def import_catalog(table):
+    """
+    Upserts the rows of a CSV, NDJSON or Parquet request body into a table.
+    The body is read incrementally and written with one bulk upsert per chunk: rows with a new
+    primary key are inserted and existing rows are overwritten. Every row is validated like the
+    body of POST /books or POST /customers, and rejected rows are reported by row number. A gzip
+    Content-Encoding is decoded.
+    Args:
+        table (str): "books" or "customers".
+    Query parameters:
+        format (str): "csv", "ndjson" or "parquet"; taken from the Content-Type when omitted.
+        batch_size (int): Rows per upsert statement and transaction (default TRANSFER_BATCH_SIZE).
+    Returns:
+        Response: JSON with the rows imported and failed, the errors of the failed rows (row number and
+                  message, the first MAX_REPORTED_ERRORS) and the rows per second, with a 200 status code
+                  whether or not some rows failed, as for /books/batch.
+    """
+    try:
+        media_types = {media_type: fmt for fmt, media_type in FORMATS.items()}
+        fmt = request.args.get('format') or media_types.get(request.mimetype, 'csv')
+        check_format(fmt)
+        columns = get_table(table)
+        batch_size = _batch_size()
+
+        stream = request.stream
+        if request.headers.get('Content-Encoding') == 'gzip':
+            stream = gzip.GzipFile(fileobj=stream, mode='rb')
+
+        stats = import_table(columns, stream, fmt, batch_size, TransferStats())
+        return jsonify(stats.as_dict()), 200
+    except ValueError as e:
+        # Handle an unknown table or format, or unreadable input
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+    except Exception:
+        # Handle unexpected errors and return a 500 error
+        db.session.rollback()
+        current_app.logger.exception(f"{request.method} {request.path} failed")
+        return jsonify({"message": "An unexpected error occurred."}), 500
@@ -0,0 +1,233 @@
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from app.search.index import InvertedIndex
+
+# How far before the latest write already read a refresh looks again, so a write that committed
+# after a later one (or was stamped by a host whose clock runs slightly behind) is not missed
+REFRESH_OVERLAP = timedelta(seconds=10)
+
+
+class BookSearch:
+    """
+    Owns the application's book search index and keeps it in step with the `books` table.
+
+    The index is built lazily on the first search: it is loaded from SEARCH_INDEX_PATH when the
+    saved copy was taken at the catalog's current state (row count and latest updated_at), and
+    otherwise built in bulk from the database. The catalog is always read from the primary, never
+    from a read replica that may lag behind.
+
+    Every worker process holds its own copy. Its own writes are applied at once through
+    `index_books`; writes made by other workers are picked up by `refresh`, which re-reads the
+    books whose updated_at moved, on the first search after SEARCH_REFRESH_INTERVAL seconds. A
+    worker's results may therefore lag another worker's writes by up to that interval.
+
+    The saved copy is written after a build, after a refresh that changed the index and when the
+    worker exits, labelled with the catalog state the index was read at. Workers may share the path.
+    """
+
+    def __init__(self):
+        self.index = InvertedIndex()
+        self.path = None
+        self.refresh_interval = 30.0
+        self.ready = False
+        self.dirty = False
+        self.state = None          # {"books": row count, "updated_at": latest write} the index was read at
+        self.watermark = None      # Latest books.updated_at the index has read
+        self.refreshed_at = 0.0    # time.monotonic() of the last build or refresh
+        self._build_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.path = app.config.get('SEARCH_INDEX_PATH')
+        self.refresh_interval = float(app.config.get('SEARCH_REFRESH_INTERVAL', 30))
+        if self.path:
+            # Persist incremental updates when the worker shuts down cleanly
+            atexit.register(self.save)
+        app.extensions['book_search'] = self
+
+    @contextmanager
+    def _reading(self, session=None):
+        """
+        Yields `session`, or a short-lived session on the primary database when it is None.
+        """
+        if session is not None:
+            yield session
+            return
+        from sqlalchemy.orm import Session
+        from app.db import db
+
+        with Session(db.engine) as primary:
+            yield primary
+
+    @staticmethod
+    def catalog_state(session):
+        """
+        Returns the row count and latest updated_at of the `books` table, which a saved index must match.
+        """
+        from app.db import db
+        from app.models.book import Book
+
+        count, latest = session.query(db.func.count(Book.ISBN), db.func.max(Book.updated_at)).one()
+        return {"books": count, "updated_at": latest.isoformat() if latest is not None else None}, latest
+
+    def ensure_ready(self, session=None):
+        """
+        Loads or builds the index if this worker has not done so yet, and refreshes it once
+        SEARCH_REFRESH_INTERVAL has passed since the catalog was last read.
+
+        Args:
+            session (optional): The SQLAlchemy session to read the catalog with; a session on the
+                                primary by default. The asyncio app passes the sync facade of its session.
+        """
+        if self.ready:
+            self.refresh_if_due(session)
+            return
+        with self._build_lock:
+            if self.ready:
+                return
+            with self._reading(session) as reader:
+                state, latest = self.catalog_state(reader)
+                saved = InvertedIndex()
+                if self.path and saved.load(self.path) and saved.meta == state:
+                    self.index = saved
+                    self._read_at(state, latest)
+                else:
+                    self.build(reader)
+                    if self.path:
+                        self.save()
+            self.ready = True
+
+    def _read_at(self, state, latest):
+        self.state = state
+        self.watermark = latest
+        self.refreshed_at = time.monotonic()
+
+    def build(self, session=None):
+        """
+        Rebuilds the index from the `books` table, streaming rows instead of loading ORM objects.
+        """
+        from app.models.book import Book
+
+        with self._reading(session) as reader:
+            # Read the state first: the index then holds at least every write it describes
+            state, latest = self.catalog_state(reader)
+            index = InvertedIndex()
+            rows = reader.query(Book.ISBN, Book.title, Book.author, Book.description).yield_per(1000)
+            for isbn, title, author, description in rows:
+                index.add(isbn, {"title": title, "author": author, "description": description})
+        self.index = index
+        self._read_at(state, latest)
+        self.dirty = True
+
+    def refresh_due(self):
+        return self.refresh_interval > 0 and time.monotonic() - self.refreshed_at >= self.refresh_interval
+
+    def refresh_if_due(self, session=None):
+        """
+        Runs `refresh` if SEARCH_REFRESH_INTERVAL has passed since the catalog was last read. Only
+        one request refreshes at a time; the others keep searching the current index meanwhile.
+        """
+        if not self.refresh_due() or not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            if self.refresh_due():
+                self.refresh(session)
+        finally:
+            self._refresh_lock.release()
+
+    def refresh(self, session=None):
+        """
+        Re-indexes the books written since the catalog was last read (by any worker), through
+        the updated_at index, and saves the index if that changed it.
+        Returns:
+            int: The number of books re-indexed.
+        """
+        from app.models.book import Book
+
+        with self._reading(session) as reader:
+            state, latest = self.catalog_state(reader)
+            rows = reader.query(Book.ISBN, Book.title, Book.author, Book.description)
+            if self.watermark is not None:
+                rows = rows.filter(Book.updated_at >= self.watermark - REFRESH_OVERLAP)
+            count = 0
+            for isbn, title, author, description in rows.yield_per(1000):
+                self.index.add(isbn, {"title": title, "author": author, "description": description})
+                count += 1
+        self._read_at(state, latest)
+        if count:
+            self.dirty = True
+            self.save()
+        return count
+
+    def index_books(self, books):
+        """
+        Adds or refreshes books in the index after they were committed.
+
+        Args:
+            books (iterable): Dicts or objects exposing ISBN, title, author and description.
+        """
+        if not self.ready:
+            if not self._build_lock.locked():
+                # The first search builds the index from the database, which already has these rows
+                return
+            # A build that started before this commit may have missed it; apply it once the build is done
+            with self._build_lock:
+                pass
+            if not self.ready:
+                return
+        for book in books:
+            get = book.get if isinstance(book, dict) else lambda name, default=None: getattr(book, name, default)
+            self.index.add(get("ISBN"), {
+                "title": get("title"),
+                "author": get("author", get("Author")),
+                "description": get("description")
+            })
+        self.dirty = True
+
+    def invalidate(self):
+        """
+        Drops the index after a bulk change to the catalog (e.g. an import) so the next search
+        rebuilds it from the database instead of a saved copy. Other workers pick the change up
+        with their next refresh.
+        """
+        with self._build_lock:
+            self.index = InvertedIndex()
+            self.ready = False
+            self.dirty = False
+            self.state = None
+            self.watermark = None
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def save(self):
+        """
+        Writes the index to SEARCH_INDEX_PATH if it changed since it was last loaded or saved,
+        labelled with the catalog state it was last read at. The index may also hold later writes
+        of this worker; the label then no longer matches the catalog, so the copy is not loaded.
+        """
+        if self.path and self.dirty and self.state is not None:
+            self.index.save(self.path, meta=self.state)
+            self.dirty = False
+
+
+# Search over the book catalog
+book_search = BookSearch()
+
+
+def init_search(app):
+    """
+    Bind the book search index to the Flask app.
+
+    Recognised settings:
+        SEARCH_INDEX_PATH: File the index is saved to and loaded from across restarts.
+        SEARCH_REFRESH_INTERVAL: Seconds between reads of the books other workers wrote (0 disables).
+
+    Args:
+        app: The Flask application instance.
+    """
+    book_search.init_app(app)
@@ -0,0 +1,197 @@
+import bisect
+import heapq
+import json
+import math
+import os
+import threading
+from collections import Counter
+
+from app.search.tokenizer import tokenize
+
+# Weight of each indexed field when term frequencies are combined into one document
+FIELD_WEIGHTS = (('title', 3), ('author', 2), ('description', 1))
+
+# Format version written to disk; files with another version are ignored and rebuilt
+INDEX_FORMAT = 1
+
+
+class InvertedIndex:
+    """
+    In-memory inverted index over book titles, authors and descriptions, ranked with BM25.
+
+    Each document is identified by its ISBN and stored as a weighted bag of terms. Postings map
+    every term to the documents containing it and their weighted term frequency, and a sorted
+    vocabulary supports prefix expansion for autocomplete.
+
+    Args:
+        k1 (float): BM25 term-frequency saturation parameter.
+        b (float): BM25 document-length normalization parameter.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.meta = None      # Caller-defined label saved with the index, e.g. the state of the catalog it was read from
+        self.postings = {}    # term -> {isbn: weighted tf}
+        self.doc_terms = {}   # isbn -> {term: weighted tf}, kept so a document can be removed
+        self.doc_length = {}  # isbn -> weighted number of terms
+        self.total_length = 0
+        self._vocabulary = None  # Sorted list of terms, rebuilt lazily after writes
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    @staticmethod
+    def _analyze(fields):
+        terms = Counter()
+        for field, weight in FIELD_WEIGHTS:
+            for token in tokenize(fields.get(field)):
+                terms[token] += weight
+        return terms
+
+    def add(self, isbn, fields):
+        """
+        Adds a document, replacing any previous version with the same ISBN.
+
+        Args:
+            isbn (str): The ISBN of the book.
+            fields (dict): The book's "title", "author" and "description".
+        """
+        terms = self._analyze(fields)
+        with self._lock:
+            self._remove(isbn)
+            self.doc_terms[isbn] = dict(terms)
+            self.doc_length[isbn] = length = sum(terms.values())
+            self.total_length += length
+            for term, tf in terms.items():
+                postings = self.postings.get(term)
+                if postings is None:
+                    self.postings[term] = postings = {}
+                    self._vocabulary = None
+                postings[isbn] = tf
+
+    def remove(self, isbn):
+        with self._lock:
+            self._remove(isbn)
+
+    def _remove(self, isbn):
+        terms = self.doc_terms.pop(isbn, None)
+        if not terms:
+            return
+        self.total_length -= self.doc_length.pop(isbn)
+        for term in terms:
+            postings = self.postings[term]
+            del postings[isbn]
+            if not postings:
+                del self.postings[term]
+                self._vocabulary = None
+
+    def _expand_prefix(self, prefix, limit):
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + '\uffff')
+        postings = self.postings
+        # Keep the most common completions when the prefix is very short, without sorting them all
+        terms = heapq.nlargest(limit, self._vocabulary[start:end], key=lambda term: len(postings[term]))
+        if terms and prefix in postings and prefix not in terms:
+            # A rare exact match must not be crowded out by its more common completions
+            terms[-1] = prefix
+        return terms
+
+    def search(self, query, limit=20, prefix=True):
+        """
+        Ranks documents against a free-text query with BM25.
+
+        Args:
+            query (str): The user's query.
+            limit (int): The maximum number of results.
+            prefix (bool): Whether the last query term also matches terms it is a prefix of.
+        Returns:
+            list: (isbn, score) pairs, best match first.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            n = len(self.doc_terms)
+            if n == 0:
+                return []
+            avg_length = self.total_length / n
+
+            # Each query position contributes the best score among the terms it expands to
+            groups = [[term] for term in terms[:-1]]
+            groups.append(self._expand_prefix(terms[-1], 50) if prefix else [terms[-1]])
+
+            scores = Counter()
+            for group in groups:
+                best = {}
+                for term in group:
+                    postings = self.postings.get(term)
+                    if not postings:
+                        continue
+                    idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for isbn, tf in postings.items():
+                        norm = 1 - self.b + self.b * self.doc_length[isbn] / avg_length
+                        score = idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+                        if score > best.get(isbn, 0):
+                            best[isbn] = score
+                scores.update(best)
+        return scores.most_common(limit)
+
+    def suggest(self, prefix, limit=10):
+        """
+        Returns the most common indexed terms starting with the given prefix.
+        """
+        terms = tokenize(prefix)
+        if not terms:
+            return []
+        with self._lock:
+            return self._expand_prefix(terms[-1], limit)
+
+    def save(self, path, meta=None):
+        """
+        Writes the index to disk atomically so a restarted worker can load it instead of rebuilding.
+        Each process writes through its own temporary file, so workers saving at once cannot mix
+        their writes; the last complete file wins.
+
+        Args:
+            path (str): The file to write.
+            meta (optional): A JSON-serializable label stored with the index and restored by `load`.
+        """
+        with self._lock:
+            payload = {"format": INDEX_FORMAT, "k1": self.k1, "b": self.b, "meta": meta, "docs": self.doc_terms}
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """
+        Replaces the index contents with a file written by `save`.
+        Returns:
+            bool: False if the file is missing or was written in another format.
+        """
+        try:
+            with open(path, encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if payload.get("format") != INDEX_FORMAT:
+            return False
+        with self._lock:
+            self._reset()
+            self.k1, self.b = payload["k1"], payload["b"]
+            self.meta = payload.get("meta")
+            # Postings are derived from the per-document term bags rather than stored twice
+            for isbn, terms in payload["docs"].items():
+                self.doc_terms[isbn] = terms
+                self.doc_length[isbn] = length = sum(terms.values())
+                self.total_length += length
+                for term, tf in terms.items():
+                    self.postings.setdefault(term, {})[isbn] = tf
+        return True
@@ -0,0 +1,24 @@
+import re
+
+# Word characters, so "O'Reilly" becomes "o" + "reilly" and "C++" becomes "c"
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Very common English words that carry no ranking signal
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'into', 'is', 'it',
+    'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'with'
+})
+
+
+def tokenize(text):
+    """
+    Splits text into lowercased search terms, dropping stopwords.
+
+    Args:
+        text (str): The text to tokenize.
+    Returns:
+        list: The terms in the order they appear.
+    """
+    if not text:
+        return []
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
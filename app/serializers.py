@@ -0,0 +1,180 @@
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+from app.models.book import Book
+from app.models.customer import Customer
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library encoder is used without it
+    orjson = None
+
+# Response field name -> model column, in response order
+BOOK_FIELDS = {
+    "ISBN": Book.ISBN,
+    "title": Book.title,
+    "Author": Book.author,
+    "description": Book.description,
+    "genre": Book.genre,
+    "price": Book.price,
+    "quantity": Book.quantity,
+}
+CUSTOMER_FIELDS = {
+    "id": Customer.customer_id,
+    "userId": Customer.userId,
+    "name": Customer.name,
+    "phone": Customer.phone,
+    "address": Customer.address,
+    "address2": Customer.address2,
+    "city": Customer.city,
+    "state": Customer.state,
+    "zipcode": Customer.zipcode,
+}
+
+# Attribute names to read for each response field, resolved once
+_BOOK_ATTRS = tuple((name, column.key) for name, column in BOOK_FIELDS.items())
+_CUSTOMER_ATTRS = tuple((name, column.key) for name, column in CUSTOMER_FIELDS.items())
+
+
+def parse_fields(value, allowed):
+    """
+    Parses a `?fields=a,b,c` selection.
+
+    Args:
+        value (str): The raw query parameter, or None.
+        allowed (dict): The field map of the resource (BOOK_FIELDS or CUSTOMER_FIELDS).
+    Returns:
+        tuple: The selected field names in response order, or None to return every field.
+    Raises:
+        ValueError: If an unknown field is requested.
+    """
+    if not value:
+        return None
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}.")
+    return tuple(name for name in allowed if name in requested)
+
+
+def columns_for(fields, allowed, *extra):
+    """
+    Returns the columns to SELECT for a field selection, plus any extra columns the caller needs.
+    Selecting columns instead of entities skips ORM object construction and the identity map.
+    """
+    names = allowed if fields is None else fields
+    columns = [allowed[name] for name in names]
+    for column in extra:
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
+def _serialize(obj, attrs, fields):
+    if fields is None:
+        return {name: getattr(obj, attr) for name, attr in attrs}
+    return {name: getattr(obj, attr) for name, attr in attrs if name in fields}
+
+
+def serialize_book(book, fields=None):
+    """
+    Builds the response body for a book.
+
+    Args:
+        book: A Book instance or a row selected with `columns_for(..., BOOK_FIELDS)`.
+        fields (tuple, optional): The fields to include; every field when None.
+    Returns:
+        dict: The response body.
+    """
+    return _serialize(book, _BOOK_ATTRS, fields)
+
+
+def serialize_customer(customer, fields=None):
+    """
+    Builds the response body for a customer.
+
+    Args:
+        customer: A Customer instance or a row selected with `columns_for(..., CUSTOMER_FIELDS)`.
+        fields (tuple, optional): The fields to include; every field when None.
+    Returns:
+        dict: The response body.
+    """
+    return _serialize(customer, _CUSTOMER_ATTRS, fields)
+
+
+def project(body, fields):
+    """
+    Narrows an already serialized body (e.g. from the cache) to a field selection.
+    """
+    if fields is None:
+        return body
+    return {name: body[name] for name in fields if name in body}
+
+
+def stream_json(key, items, trailer=None, chunk_size=50):
+    """
+    Encodes a JSON object holding one large array without building the whole body in memory.
+    The array is written `chunk_size` items per chunk as they are produced; the other members
+    come last, from `trailer`, so values only known at the end (such as a cursor) can be included.
+
+    Args:
+        key (str): The name of the array member, e.g. "books".
+        items (iterable): The array's items, typically a generator over a result set.
+        trailer (callable, optional): Returns a dict of the object's remaining members once `items` is exhausted.
+        chunk_size (int): Items encoded per yielded chunk.
+    Yields:
+        str: Pieces of the JSON document, to be sent as a chunked response.
+    """
+    dumps = current_app.json.dumps
+    separator = ''
+    pending = []
+    yield '{' + dumps(key) + ':['
+    for item in items:
+        pending.append(dumps(item))
+        if len(pending) == chunk_size:
+            yield separator + ','.join(pending)
+            separator, pending = ',', []
+    if pending:
+        yield separator + ','.join(pending)
+    members = trailer() if trailer else {}
+    yield ']' + ''.join(f",{dumps(name)}:{dumps(value)}" for name, value in members.items()) + '}'
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson, so `jsonify` and `request.get_json` skip the standard
+    library encoder. Responses are written as bytes straight from orjson without an intermediate str.
+    Keys are sorted like Flask's default provider unless `sort_keys` is turned off.
+    """
+
+    options = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def _options(self):
+        return self.options | orjson.OPT_SORT_KEYS if self.sort_keys else self.options
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=self.default, option=self._options()),
+                                        mimetype=self.mimetype)
+
+
+def init_json(app):
+    """
+    Install the fastest available JSON encoder on the Flask app.
+
+    Recognised settings:
+        JSON_ENCODER: "auto" (default, orjson when installed), "orjson" or "json".
+
+    Args:
+        app: The Flask application instance.
+    """
+    encoder = app.config.get('JSON_ENCODER', 'auto')
+    if encoder == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_ENCODER=orjson requires the 'orjson' package")
+    if encoder in ('auto', 'orjson') and orjson is not None:
+        app.json = OrjsonProvider(app)
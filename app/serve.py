@@ -0,0 +1,128 @@
+"""
+Production entry point.
+
+Runs the app under gunicorn with preforked worker processes, each serving requests on a pool
+of threads. With --mode async (SERVER_MODE=async) the asyncio app (app.aio) is served by
+hypercorn instead, each worker running one event loop. Every setting can be given on the
+command line or through the environment:
+
+    SERVER_MODE          sync (gunicorn, threads) or async (hypercorn, asyncio) (default: sync)
+    WEB_CONCURRENCY      Worker processes (default: 2 x CPU cores + 1)
+    WEB_THREADS          Threads per worker, also used to size the DB pool (default: 4; sync mode only)
+    PORT / BIND          Address to listen on (default: 0.0.0.0:5000)
+    MAX_REQUESTS         Recycle a worker after this many requests (default: 10000, 0 disables)
+    MAX_REQUESTS_JITTER  Random spread added to MAX_REQUESTS so workers do not restart together
+    GRACEFUL_TIMEOUT     Seconds a recycled worker gets to finish in-flight requests
+    TIMEOUT              Seconds before a silent worker is killed and replaced
+    STARTUP_WARM_UP      How each worker opens its pool: sync, background or lazy (see app/startup.py)
+
+Usage:
+    python -m app.serve --workers 4 --threads 8
+    python -m app.serve --mode async --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=('sync', 'async'), default=os.getenv('SERVER_MODE', 'sync'))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1)))
+    parser.add_argument('--threads', type=int, default=int(os.getenv('WEB_THREADS', 4)))
+    parser.add_argument('--bind', default=os.getenv('BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}"))
+    parser.add_argument('--max-requests', type=int, default=int(os.getenv('MAX_REQUESTS', 10000)))
+    parser.add_argument('--max-requests-jitter', type=int, default=int(os.getenv('MAX_REQUESTS_JITTER', 1000)))
+    parser.add_argument('--graceful-timeout', type=int, default=int(os.getenv('GRACEFUL_TIMEOUT', 30)))
+    parser.add_argument('--timeout', type=int, default=int(os.getenv('TIMEOUT', 60)))
+    return parser.parse_args(argv)
+
+
+def post_worker_init(worker):
+    """
+    Gunicorn hook run in each worker once the app is loaded: open this worker's own connections
+    (before it accepts requests, or in the background, per STARTUP_WARM_UP).
+    """
+    worker.wsgi.extensions['startup'].warm_up(connections=int(os.getenv('WEB_THREADS', 1)))
+
+
+def serve_async(args):
+    """
+    Serve the asyncio app with hypercorn: one event loop per worker process, no handler threads.
+    """
+    try:
+        from hypercorn.config import Config
+        from hypercorn.run import run
+    except ImportError:
+        raise SystemExit("Async mode requires the packages in requirements-async.txt.")
+
+    config = Config()
+    # Each worker builds its own app, engine and connection pool
+    config.application_path = 'app.aio:create_async_app()'
+    config.bind = [args.bind]
+    config.workers = args.workers
+    config.max_requests = args.max_requests or None
+    config.max_requests_jitter = args.max_requests_jitter
+    config.graceful_timeout = args.graceful_timeout
+    config.read_timeout = args.timeout
+    run(config)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.mode == 'async':
+        os.environ['WEB_CONCURRENCY'] = str(args.workers)
+        serve_async(args)
+        return
+
+    # Workers read their sizing from the environment when they build the app, which is also
+    # where init_db takes the pool size from
+    os.environ['WEB_CONCURRENCY'] = str(args.workers)
+    os.environ['WEB_THREADS'] = str(args.threads)
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        # Platforms without gunicorn (e.g. Windows) fall back to a threaded single-process server
+        from werkzeug.serving import run_simple
+        from app import create_app
+
+        print("gunicorn is not installed; serving with a single threaded process.")
+        app = create_app()
+        app.extensions['startup'].warm_up()
+        host, _, port = args.bind.rpartition(':')
+        run_simple(host or '0.0.0.0', int(port), app, threaded=True, use_debugger=False, use_reloader=False)
+        return
+
+    # Warm start: running this module imported the app package, and with it Flask, SQLAlchemy and
+    # every app module, in the master. Workers (including the ones that replace recycled workers)
+    # fork with the modules loaded and only build the app. Nothing that opens a connection or a
+    # thread runs at import time.
+    class Server(BaseApplication):
+        def load_config(self):
+            options = {
+                'bind': args.bind,
+                'workers': args.workers,
+                'threads': args.threads,
+                'worker_class': 'gthread',
+                'max_requests': args.max_requests,
+                'max_requests_jitter': args.max_requests_jitter,
+                'graceful_timeout': args.graceful_timeout,
+                'timeout': args.timeout,
+                # Build the app after forking so no engine or socket is shared between workers
+                'preload_app': False,
+                'post_worker_init': post_worker_init,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app import create_app
+            return create_app()
+
+    Server().run()
+
+
+if __name__ == '__main__':
+    main()
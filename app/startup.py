@@ -0,0 +1,211 @@
+"""
+Worker startup: a profile of where startup time goes, background or lazy warm-up of the
+subsystems a request needs, and the readiness state behind /ready.
+
+/status answers as soon as the worker can run a request. /ready answers 200 only once the
+database pool is open (and the search index is built, when SEARCH_WARM_UP is set), so a load
+balancer or orchestrator sends traffic to a worker only when it is warm, and stops if it can no
+longer reach the database at startup.
+
+Warm-up modes (STARTUP_WARM_UP):
+    sync: Open the pool before the worker accepts requests. If the database does not answer, the
+          worker starts anyway, reports not ready and keeps retrying in the background.
+    background: Accept requests at once and warm up in a background thread, retrying until it succeeds.
+    lazy: Open nothing at startup. The first request connects on demand, and the first call to
+          /ready starts the warm-up in the background.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+WARM_UP_MODES = ('sync', 'background', 'lazy')
+
+# (module, seconds) for the imports of the app package, recorded by `import_phase`, and the
+# process that ran them
+IMPORT_PHASES = []
+IMPORTED_PID = os.getpid()
+
+
+@contextmanager
+def import_phase(name):
+    """
+    Times a group of imports in app/__init__.py for the startup profile.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        IMPORT_PHASES.append((name, time.perf_counter() - started))
+
+
+# Seconds between warm-up attempts while the database cannot be reached (doubling up to the maximum)
+RETRY_INITIAL = 0.5
+RETRY_MAX = 10.0
+
+
+class StartupProfile:
+    """
+    Durations of the import and initialization phases of one application instance.
+
+    Args:
+        imports (list, optional): (name, seconds) pairs measured while the package was imported.
+        imported_pid (int, optional): The process that imported the package. When it is not the
+                                      current one, the imports were paid once by a preloading parent.
+                                      Both default to what `import_phase` recorded.
+    """
+
+    def __init__(self, imports=IMPORT_PHASES, imported_pid=IMPORTED_PID):
+        self.imported_pid = imported_pid
+        self.phases = [("import " + name, seconds) for name, seconds in imports]
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Times the enclosed block as a phase.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.phases.append((name, seconds))
+
+    def report(self):
+        """
+        Returns the phases in the order they ran, with milliseconds per phase, and the totals for
+        imports and for everything after them.
+        """
+        with self._lock:
+            phases = list(self.phases)
+        total = lambda imports: round(sum(seconds for name, seconds in phases if name.startswith("import ") == imports) * 1000, 2)
+        return {
+            "pid": os.getpid(),
+            "imports_preloaded": self.imported_pid is not None and self.imported_pid != os.getpid(),
+            "phases": [{"name": name, "ms": round(seconds * 1000, 2)} for name, seconds in phases],
+            "import_ms": total(True),
+            "init_ms": total(False),
+        }
+
+
+class WorkerStartup:
+    """
+    Warms up one worker and tracks which of its components are ready.
+
+    Each component is "pending" until its warm-up succeeds ("ready") or fails ("failed", with the
+    error; it is retried). The worker is ready when all of its components are.
+
+    Args:
+        app: The Flask application instance.
+        profile (StartupProfile): The profile warm-up phases are added to.
+    """
+
+    def __init__(self, app, profile):
+        self.app = app
+        self.profile = profile
+        self.mode = app.config.get('STARTUP_WARM_UP', 'sync')
+        if self.mode not in WARM_UP_MODES:
+            raise ValueError(f"STARTUP_WARM_UP must be one of {', '.join(WARM_UP_MODES)}.")
+        self.connections = 1
+        self.tasks = {"database": self._warm_database}
+        if app.config.get('SEARCH_WARM_UP'):
+            self.tasks["search"] = self._warm_search
+        self.components = {name: {"state": "pending", "error": None, "ms": None} for name in self.tasks}
+        self.created = time.perf_counter()
+        self.ready_after = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _warm_database(self):
+        from app.db import open_connections
+        open_connections(self.app, self.connections)
+
+    def _warm_search(self):
+        from app.search import book_search
+        with self.app.app_context():
+            book_search.ensure_ready()
+
+    def run_pending(self):
+        """
+        Runs the warm-up of every component that is not ready yet, once.
+        Returns:
+            bool: True if the worker is ready.
+        """
+        for name, task in self.tasks.items():
+            if self.components[name]["state"] == "ready":
+                continue
+            started = time.perf_counter()
+            try:
+                task()
+            except Exception as e:
+                self.components[name].update(state="failed", error=str(e).splitlines()[0] if str(e) else repr(e))
+                self.app.logger.warning(f"Warm-up of {name} failed: {self.components[name]['error']}")
+                continue
+            seconds = time.perf_counter() - started
+            self.components[name].update(state="ready", error=None, ms=round(seconds * 1000, 2))
+            self.profile.record(f"warm up {name}", seconds)
+
+        if self.ready_after is None and self.is_ready():
+            self.ready_after = time.perf_counter() - self.created
+            self.app.logger.info(f"Worker {os.getpid()} ready {self.ready_after:.3f}s after the app was created.")
+        return self.is_ready()
+
+    def _retry_until_ready(self):
+        delay = RETRY_INITIAL
+        while not self.run_pending():
+            time.sleep(delay)
+            delay = min(delay * 2, RETRY_MAX)
+
+    def start_background(self):
+        """
+        Warms up in a daemon thread, retrying with backoff until every component is ready.
+        Does nothing if the worker is ready or a warm-up thread is already running.
+        """
+        with self._lock:
+            if self.is_ready() or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._retry_until_ready, name='startup-warm-up', daemon=True)
+            self._thread.start()
+
+    def warm_up(self, connections=1):
+        """
+        Starts the warm-up the way STARTUP_WARM_UP asks for. Call once per worker process, after forking.
+
+        Args:
+            connections (int): The number of pooled connections to open.
+        """
+        self.connections = connections
+        if self.mode == 'sync':
+            if not self.run_pending():
+                self.start_background()
+        elif self.mode == 'background':
+            self.start_background()
+
+    def is_ready(self):
+        return all(component["state"] == "ready" for component in self.components.values())
+
+    def report(self):
+        """
+        Returns the readiness of the worker and of each component, plus book cache and pool fill.
+        In lazy mode (or if no warm-up was started), this starts the warm-up in the background.
+        """
+        if not self.is_ready():
+            self.start_background()
+        from app.cache import book_cache
+        from app.db import db
+
+        with self.app.app_context():
+            pool = db.engine.pool
+            pool_status = {"checked_in": pool.checkedin()} if hasattr(pool, 'checkedin') else {}
+        return {
+            "ready": self.is_ready(),
+            "mode": self.mode,
+            "ready_after_s": None if self.ready_after is None else round(self.ready_after, 3),
+            "components": {name: dict(component) for name, component in self.components.items()},
+            "pool": pool_status,
+            "book_cache": {key: value for key, value in book_cache.stats().items() if key in ("backend", "size", "maxsize")},
+        }
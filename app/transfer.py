@@ -0,0 +1,502 @@
+"""
+Streaming export and import of whole catalog tables.
+
+Exports read the table through a server-side cursor (`yield_per`), so only one batch of rows is
+in memory at a time, and encode each batch straight to CSV, NDJSON or Parquet. Imports parse the
+input incrementally, validates every row with the same schema as the API's writes and writes the
+valid rows back with one bulk upsert per chunk. Memory use depends on the batch size, never on the
+size of the table.
+
+Parquet needs the optional `pyarrow` package.
+"""
+import csv
+import gzip
+import importlib.util
+import io
+import json
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, Integer, select
+
+from app.db import db, utcnow
+from app.models.book import Book
+from app.models.customer import Customer
+from app.validation import BOOK_SCHEMA, CUSTOMER_SCHEMA, error_body
+
+# pyarrow is optional and slow to import (tens of milliseconds), so it is only imported by the
+# Parquet encoder and decoder; worker startup does not pay for it
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+# Tables that can be exported and imported
+TABLES = {
+    'books': Book.__table__,
+    'customers': Customer.__table__,
+}
+
+# Export formats and their media types
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# Columns maintained by the application; imported values are ignored and the usual write semantics apply
+MANAGED_COLUMNS = ('version', 'updated_at')
+
+# Columns derived from other columns; imported values are ignored and recomputed by the column defaults
+DERIVED_COLUMNS = ('isbn13', 'user_id_lower')
+
+# Schema every imported row must satisfy, per table: the payload of POST /books and POST /customers
+SCHEMAS = {
+    'books': BOOK_SCHEMA,
+    'customers': CUSTOMER_SCHEMA,
+}
+
+# Rejected rows reported by an import; the count of failed rows covers the rest
+MAX_REPORTED_ERRORS = 100
+
+# Columns whose payload field has another name
+PAYLOAD_FIELDS = {'author': 'Author'}
+
+
+class TransferStats:
+    """
+    Rows moved by an export or import, and how fast.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.failed = 0
+        self.errors = []  # Per-row results of the rows that were rejected
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def finish(self):
+        self.finished = time.perf_counter()
+        return self
+
+    @property
+    def seconds(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def as_dict(self):
+        seconds = self.seconds
+        return {
+            "rows": self.rows,
+            "failed": self.failed,
+            "seconds": round(seconds, 3),
+            "rows_per_s": round(self.rows / seconds, 1) if seconds else None,
+            "errors": self.errors,
+        }
+
+
+def get_table(name):
+    """
+    Returns the table called `name`.
+    Raises:
+        ValueError: If the table cannot be transferred.
+    """
+    if name not in TABLES:
+        raise ValueError(f"Unknown table {name}; expected one of: {', '.join(TABLES)}.")
+    return TABLES[name]
+
+
+def check_format(fmt):
+    """
+    Raises ValueError if `fmt` is not a supported (and installed) format.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt}; expected one of: {', '.join(FORMATS)}.")
+    if fmt == 'parquet' and not HAS_PYARROW:
+        raise ValueError("The parquet format requires the 'pyarrow' package.")
+
+
+def format_for(filename, default='csv'):
+    """
+    Infers the format from a file name such as books.csv, books.ndjson.gz or books.parquet.
+    """
+    name = filename[:-3] if filename.endswith('.gz') else filename
+    for fmt in FORMATS:
+        if name.endswith('.' + fmt):
+            return fmt
+    if name.endswith('.jsonl'):
+        return 'ndjson'
+    return default
+
+
+# --- Export -----------------------------------------------------------------------------------
+
+def export_batches(table, batch_size=5000):
+    """
+    Reads every row of `table` in primary key order through a server-side cursor.
+    Yields:
+        list: Up to `batch_size` rows at a time.
+    """
+    statement = select(*table.columns).order_by(*table.primary_key.columns).execution_options(yield_per=batch_size)
+    yield from db.session.execute(statement).partitions()
+
+
+def _text_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_csv(columns, batches):
+    """
+    Encodes row batches as CSV with a header line, one bytes chunk per batch.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows([('' if value is None else _text_value(value) for value in row) for row in rows])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def encode_ndjson(columns, batches):
+    """
+    Encodes row batches as newline-delimited JSON objects, one bytes chunk per batch.
+    """
+    for rows in batches:
+        yield ''.join(json.dumps(dict(zip(columns, map(_text_value, row)))) + '\n' for row in rows).encode()
+
+
+class _ChunkSink:
+    """
+    Write-only file object that hands written bytes back in chunks while still reporting the
+    total offset, which the Parquet writer records in the file footer.
+    """
+
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _arrow_type(column):
+    import pyarrow
+
+    if isinstance(column.type, Integer):
+        return pyarrow.int64()
+    if isinstance(column.type, Float):
+        return pyarrow.float64()
+    if isinstance(column.type, DateTime):
+        return pyarrow.timestamp('us')
+    return pyarrow.string()
+
+
+def encode_parquet(table, batches, compression='zstd'):
+    """
+    Encodes row batches as a compressed Parquet file, one row group (and bytes chunk) per batch.
+    """
+    import pyarrow
+    import pyarrow.parquet
+
+    schema = pyarrow.schema([pyarrow.field(column.name, _arrow_type(column), nullable=column.nullable) for column in table.columns])
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(pyarrow.PythonFile(sink, mode='w'), schema, compression=compression)
+    for rows in batches:
+        columns = list(zip(*rows)) if rows else [[] for _ in schema]
+        writer.write_table(pyarrow.Table.from_arrays([pyarrow.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def export_table(table, fmt, batch_size=5000, stats=None):
+    """
+    Streams a whole table in the given format.
+
+    Args:
+        table: The table to export (see TABLES).
+        fmt (str): "csv", "ndjson" or "parquet".
+        batch_size (int): Rows fetched, encoded and yielded at a time.
+        stats (TransferStats, optional): Updated with the number of rows exported.
+    Yields:
+        bytes: Encoded chunks of the file.
+    """
+    check_format(fmt)
+    stats = stats if stats is not None else TransferStats()
+
+    def counted():
+        for rows in export_batches(table, batch_size):
+            stats.rows += len(rows)
+            yield rows
+
+    columns = [column.name for column in table.columns]
+    if fmt == 'csv':
+        yield from encode_csv(columns, counted())
+    elif fmt == 'ndjson':
+        yield from encode_ndjson(columns, counted())
+    else:
+        yield from encode_parquet(table, counted())
+    stats.finish()
+
+
+# --- Import -----------------------------------------------------------------------------------
+
+def decode_csv(stream, batch_size):
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8', newline=''))
+    yield from _batched(reader, batch_size)
+
+
+def decode_ndjson(stream, batch_size):
+    if isinstance(stream, io.RawIOBase):
+        # Reading lines straight off a raw stream (such as a WSGI request body) is very slow
+        stream = io.BufferedReader(stream, 1 << 16)
+    yield from _batched((json.loads(line) for line in stream if line.strip()), batch_size)
+
+
+def decode_parquet(stream, batch_size):
+    import pyarrow.parquet
+
+    # Parquet keeps its metadata at the end, so a non-seekable stream is spooled to disk first
+    if not (hasattr(stream, 'seekable') and stream.seekable()):
+        spooled = tempfile.TemporaryFile()
+        while True:
+            data = stream.read(1 << 20)
+            if not data:
+                break
+            spooled.write(data)
+        spooled.seek(0)
+        stream = spooled
+    for batch in pyarrow.parquet.ParquetFile(stream).iter_batches(batch_size=batch_size):
+        yield batch.to_pylist()
+
+
+def _batched(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _converters(table):
+    """
+    Returns a function per column turning text input (CSV) into the column's Python type.
+    """
+    def convert(kind, nullable):
+        def apply(value):
+            if value is None or (value == '' and (nullable or kind is not str)):
+                return None
+            if isinstance(value, str) and kind is not str:
+                return datetime.fromisoformat(value) if kind is datetime else kind(value)
+            return value
+        return apply
+
+    kinds = {Integer: int, Float: float, DateTime: datetime}
+    return {
+        column.name: convert(next((kind for base, kind in kinds.items() if isinstance(column.type, base)), str), column.nullable)
+        for column in table.columns
+    }
+
+
+def upsert_statement(table):
+    """
+    Builds a dialect-specific INSERT that updates the existing row when the primary key is taken.
+    An updated row gets a new version and write time, like any other write.
+    """
+    dialect = db.session.get_bind().dialect.name
+    key = {column.name for column in table.primary_key.columns}
+    data = [column.name for column in table.columns if column.name not in key and column.name not in MANAGED_COLUMNS]
+    managed = {'version': table.c.version + 1, 'updated_at': utcnow()}
+
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(table)
+        return statement.on_duplicate_key_update({**{name: statement.inserted[name] for name in data}, **managed})
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table)
+        return statement.on_conflict_do_update(
+            index_elements=list(table.primary_key.columns),
+            set_={**{name: statement.excluded[name] for name in data}, **managed}
+        )
+    raise ValueError(f"Bulk upserts are not supported on {dialect}.")
+
+
+def _payload(row):
+    """
+    Returns a converted row as the API payload its schema expects. Stored prices are floats, so
+    one with at most two decimals is written out with exactly two, as the API takes it.
+    """
+    payload = {PAYLOAD_FIELDS.get(name, name): value for name, value in row.items()}
+    price = payload.get('price')
+    if price.__class__ is float and round(price, 2) == price:
+        payload['price'] = f"{price:.2f}"
+    return payload
+
+
+def validate_rows(table, batch, first, converters):
+    """
+    Converts the rows of one chunk to column values and validates them with the table's schema.
+
+    Args:
+        table: The table the rows are imported into.
+        batch (list): The decoded rows.
+        first (int): The number of the first row in the input (1-based, header excluded).
+        converters (dict): Column name -> converter, see `_converters`.
+    Returns:
+        tuple: The valid rows as (row number, column values) pairs, and a result per rejected row.
+    """
+    schema = SCHEMAS[table.name]
+    rows, errors = [], []
+    for number, data in enumerate(batch, start=first):
+        if not isinstance(data, dict):
+            errors.append({"row": number, "message": "Each row must be an object."})
+            continue
+        row, field_errors = {}, {}
+        for name, convert in converters.items():
+            if name in MANAGED_COLUMNS + DERIVED_COLUMNS:
+                continue
+            try:
+                row[name] = convert(data.get(name))
+            except (TypeError, ValueError):
+                field_errors[PAYLOAD_FIELDS.get(name, name)] = f"Invalid value for {name}"
+        if not field_errors:
+            _, field_errors = schema.validate(_payload(row))
+        if field_errors:
+            errors.append(dict(error_body(field_errors), row=number))
+            continue
+        rows.append((number, row))
+    return rows, errors
+
+
+def drop_taken_user_ids(rows, errors):
+    """
+    Removes the customer rows whose userId belongs to another customer, stored or earlier in the
+    same chunk, recording a result for each in `errors`. Upserts only match on customer_id, so
+    such a row would otherwise fail the unique index and the whole chunk with it.
+    Returns:
+        list: The remaining (row number, row) pairs.
+    """
+    user_ids = {row['userId'] for _, row in rows}
+    owners = dict(db.session.execute(
+        select(Customer.userId, Customer.customer_id).where(Customer.userId.in_(user_ids))
+    ).all()) if user_ids else {}
+    kept = []
+    for number, row in rows:
+        if row['userId'] in owners and (row['customer_id'] is None or owners[row['userId']] != row['customer_id']):
+            errors.append({"row": number, "message": "This user ID already exists in the system."})
+            continue
+        owners[row['userId']] = row['customer_id']
+        kept.append((number, row))
+    return kept
+
+
+def import_table(table, stream, fmt, chunk_size=5000, stats=None):
+    """
+    Loads a CSV, NDJSON or Parquet stream into a table with one bulk upsert per chunk.
+
+    Rows are matched on the primary key: new keys are inserted and existing rows are overwritten.
+    Every row is validated with the table's schema first (see SCHEMAS); rejected rows, and
+    customers whose userId belongs to another customer, are skipped and reported by row number.
+    The version and updated_at columns of the input are ignored, and derived columns (isbn13,
+    user_id_lower) are recomputed. If the upsert of a chunk still fails, its rows are retried one
+    at a time so only the offending rows are rejected. Afterwards the book cache is cleared and
+    the search index is rebuilt on its next use.
+
+    Args:
+        table: The table to import into (see TABLES).
+        stream: A binary file object with the input.
+        fmt (str): "csv", "ndjson" or "parquet".
+        chunk_size (int): Rows per upsert statement and transaction.
+        stats (TransferStats, optional): Updated as the import progresses.
+    Returns:
+        TransferStats: The rows imported and failed, the errors of the failed rows, and the throughput.
+    """
+    from app.cache import book_cache
+    from app.search import book_search
+
+    check_format(fmt)
+    stats = stats if stats is not None else TransferStats()
+    decode = {'csv': decode_csv, 'ndjson': decode_ndjson, 'parquet': decode_parquet}[fmt]
+    converters = _converters(table)
+    statement = upsert_statement(table)
+    first = 1
+
+    for batch in decode(stream, chunk_size):
+        rows, errors = validate_rows(table, batch, first, converters)
+        first += len(batch)
+        if table is Customer.__table__:
+            rows = drop_taken_user_ids(rows, errors)
+        if rows:
+            try:
+                db.session.execute(statement, [row for _, row in rows])
+                db.session.commit()
+                stats.rows += len(rows)
+            except Exception:
+                db.session.rollback()
+                for number, row in rows:
+                    try:
+                        db.session.execute(statement, [row])
+                        db.session.commit()
+                        stats.rows += 1
+                    except Exception as e:
+                        db.session.rollback()
+                        errors.append({"row": number, "message": str(e).splitlines()[0]})
+        stats.failed += len(errors)
+        stats.errors.extend(sorted(errors, key=lambda error: error["row"])[:MAX_REPORTED_ERRORS - len(stats.errors)])
+
+    if table is Book.__table__ and stats.rows:
+        book_cache.clear()
+        book_search.invalidate()
+    return stats.finish()
+
+
+def open_output(path):
+    """
+    Opens a file for an export, gzip-compressed when the name ends in .gz; "-" is stdout.
+    """
+    import sys
+    if path == '-':
+        return sys.stdout.buffer
+    return gzip.open(path, 'wb', compresslevel=6) if path.endswith('.gz') else open(path, 'wb')
+
+
+def open_input(path):
+    """
+    Opens a file for an import, decompressing it when the name ends in .gz; "-" is stdin.
+    """
+    import sys
+    if path == '-':
+        return sys.stdin.buffer
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
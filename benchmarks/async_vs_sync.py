@@ -0,0 +1,195 @@
+"""
+Side-by-side comparison of the WSGI (gunicorn threads) and asyncio (hypercorn, app.aio) serving modes.
+
+For every concurrency level, each mode is started as a real server with a single worker process
+against the same seeded database and driven by that many concurrent keep-alive connections. The
+sync worker gets one handler thread per connection, which is what it needs to keep that many
+requests in flight. The report holds throughput, p50/p95 latency, the server's resident memory
+when idle and at peak, and the extra memory per in-flight request ((peak - idle) / concurrency).
+
+The book cache is disabled so every request reaches the database. Memory is read from /proc, so
+the script runs on Linux only.
+
+Usage:
+    python -m benchmarks.async_vs_sync --levels 16,64,256 --duration 10
+    python -m benchmarks.async_vs_sync --database-url mysql+pymysql://user:pw@localhost/bench --skip-seed
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks.harness import boot_app, git_revision, isbn_for, percentile, seed
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def tree_rss_kb(pid):
+    """
+    Returns the resident memory of a process and all its descendants, in KiB.
+    """
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (OSError, StopIteration):
+            continue
+    return total
+
+
+def start_server(mode, concurrency, port, env):
+    """
+    Starts one single-worker server in the given mode and waits until it answers /status.
+    """
+    command = [sys.executable, '-m', 'app.serve', '--mode', mode, '--workers', '1',
+               '--bind', f"127.0.0.1:{port}", '--max-requests', '0']
+    if mode == 'sync':
+        command += ['--threads', str(concurrency)]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/status", timeout=1).read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"The {mode} server did not start.")
+
+
+async def request(reader, writer, path):
+    """
+    Sends one GET over a keep-alive connection and reads the response; returns the status code.
+    """
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n".encode())
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode('latin-1').split("\r\n")
+    length = next((int(line.split(':', 1)[1]) for line in lines if line.lower().startswith('content-length:')), 0)
+    await reader.readexactly(length)
+    return int(lines[0].split()[1])
+
+
+async def drive(port, concurrency, duration, books, customers, server_pid):
+    """
+    Runs `concurrency` client connections for `duration` seconds while sampling the server's memory.
+    Returns:
+        tuple: (latencies, errors, elapsed seconds, peak RSS in KiB)
+    """
+    latencies, errors = [], 0
+    peak = tree_rss_kb(server_pid)
+    stop_at = time.perf_counter() + duration
+
+    async def client(seed_value):
+        nonlocal errors
+        rng = random.Random(seed_value)
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            while time.perf_counter() < stop_at:
+                if rng.random() < 0.7:
+                    path = f"/books/{isbn_for(rng.randrange(books))}"
+                else:
+                    path = f"/customers/{rng.randrange(1, customers + 1)}"
+                started = time.perf_counter()
+                status = await request(reader, writer, path)
+                latencies.append(time.perf_counter() - started)
+                if status >= 500:
+                    errors += 1
+        finally:
+            writer.close()
+
+    async def sample_memory():
+        nonlocal peak
+        while time.perf_counter() < stop_at:
+            peak = max(peak, tree_rss_kb(server_pid))
+            await asyncio.sleep(0.1)
+
+    started = time.perf_counter()
+    await asyncio.gather(sample_memory(), *(client(i) for i in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started, peak
+
+
+def measure(mode, concurrency, args, env):
+    port = free_port()
+    server = start_server(mode, concurrency, port, env)
+    try:
+        # Let the worker settle (connections opened, modules imported) before the idle reading
+        time.sleep(1)
+        idle = tree_rss_kb(server.pid)
+        latencies, errors, elapsed, peak = asyncio.run(
+            drive(port, concurrency, args.duration, args.books, args.customers, server.pid)
+        )
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies.sort()
+    ms = lambda value: None if value is None else round(value * 1000, 3)
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "idle_rss_mb": round(idle / 1024, 1),
+        "peak_rss_mb": round(peak / 1024, 1),
+        "kb_per_inflight_request": round((peak - idle) / concurrency, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=os.getenv('BENCH_DATABASE_URL'),
+                        help="Database both servers use (default: a fresh SQLite file)")
+    parser.add_argument('--books', type=int, default=10000)
+    parser.add_argument('--customers', type=int, default=2000)
+    parser.add_argument('--skip-seed', action='store_true', help="Reuse an already seeded --database-url")
+    parser.add_argument('--levels', default='16,64,256', help="Comma-separated concurrency levels")
+    parser.add_argument('--duration', type=float, default=10, help="Seconds per mode and level")
+    parser.add_argument('--modes', default='sync,async')
+    parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    app = boot_app(database_url)
+    if not args.skip_seed:
+        seed(app, args.books, args.customers)
+
+    env = dict(os.environ, DATABASE_URL=database_url, BOOK_CACHE_BACKEND='none', RESERVATION_SWEEP_INTERVAL='0',
+               RATE_LIMIT_ENABLED='0')
+    results = []
+    for concurrency in (int(level) for level in args.levels.split(',')):
+        for mode in args.modes.split(','):
+            results.append(measure(mode, concurrency, args, env))
+            print(json.dumps(results[-1]), file=sys.stderr)
+
+    output = json.dumps({"revision": git_revision(), "database": database_url.split('://', 1)[0],
+                         "books": args.books, "duration": args.duration, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Compares two benchmark reports written by benchmarks/run.py, e.g. before and after a change.
+
+Usage:
+    python -m benchmarks.compare results/base.json results/change.json
+    python -m benchmarks.compare base.json change.json --fail-on-regression 10
+
+With --fail-on-regression PCT the exit status is 1 when the overall p95 latency or throughput
+of the second report is more than PCT percent worse than the first.
+"""
+import argparse
+import json
+import sys
+
+# Metrics shown per operation, and whether a higher value is better
+METRICS = (
+    ("requests_per_s", True),
+    ("p50_ms", False),
+    ("p95_ms", False),
+    ("p99_ms", False),
+    ("ttfb_p95_ms", False),
+    ("queries_per_request", False),
+    ("bytes_per_request", False),
+)
+
+
+def change(before, after):
+    """
+    Returns the relative change from `before` to `after` in percent, or None if it is undefined.
+    """
+    if before is None or after is None or before == 0:
+        return None
+    return (after - before) / before * 100
+
+
+def format_row(name, metric, before, after):
+    delta = change(before, after)
+    delta = "" if delta is None else f"{delta:+.1f}%"
+    return f"{name:<26}{metric:<22}{before!s:>12}{after!s:>12}{delta:>10}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('before', help="The baseline report")
+    parser.add_argument('after', help="The report to compare with the baseline")
+    parser.add_argument('--fail-on-regression', type=float, metavar='PCT',
+                        help="Exit with status 1 if overall p95 or throughput regress by more than PCT percent")
+    args = parser.parse_args(argv)
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"before: {before.get('revision')}  {before.get('config')}")
+    print(f"after:  {after.get('revision')}  {after.get('config')}")
+    print(f"{'operation':<26}{'metric':<22}{'before':>12}{'after':>12}{'change':>10}")
+
+    sections = [("overall", before.get("overall", {}), after.get("overall", {}))]
+    for name in sorted(set(before.get("operations", {})) | set(after.get("operations", {}))):
+        sections.append((name, before.get("operations", {}).get(name, {}), after.get("operations", {}).get(name, {})))
+    for name, old, new in sections:
+        for metric, _ in METRICS:
+            print(format_row(name, metric, old.get(metric), new.get(metric)))
+
+    if args.fail_on_regression is not None:
+        regressions = []
+        for metric, higher_is_better in (("p95_ms", False), ("requests_per_s", True)):
+            delta = change(before["overall"].get(metric), after["overall"].get(metric))
+            if delta is not None and (-delta if higher_is_better else delta) > args.fail_on_regression:
+                regressions.append(f"{metric} {delta:+.1f}%")
+        if regressions:
+            print(f"Regression beyond {args.fail_on_regression}%: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
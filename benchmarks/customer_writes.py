@@ -0,0 +1,156 @@
+"""
+Concurrency check for the customer write path.
+
+Creates: many threads POST the same set of userIds at once. Half of the attempts are client
+retries that reuse the Idempotency-Key of an earlier attempt. The run checks that every userId
+exists exactly once, that exactly one create per userId got a fresh 201, that every replayed 201
+names the same customer as the original, and that the rest were turned away with 422 (duplicate)
+or 409 (same key still in flight).
+
+Updates: many threads PUT the same customer with If-Match holding the version they last read.
+The run checks that no update was lost: the final version is 1 plus the number of 200 responses.
+
+Usage:
+    python -m benchmarks.customer_writes --threads 32 --users 200 --attempts 2000
+    DATABASE_URL=mysql+pymysql://... python -m benchmarks.customer_writes
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+
+def payload(user, name="Bench Customer"):
+    return {"userId": f"user{user}@example.com", "name": name, "phone": "555-0100", "address": "1 Main St",
+            "city": "Springfield", "state": "IL", "zipcode": "62701"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=32, help="Concurrent clients")
+    parser.add_argument('--users', type=int, default=200, help="Distinct userIds the creates compete for")
+    parser.add_argument('--attempts', type=int, default=2000, help="Create attempts across all threads")
+    parser.add_argument('--updates', type=int, default=500, help="Conditional update attempts across all threads")
+    args = parser.parse_args(argv)
+
+    # Default to a throwaway SQLite file so the check runs without a database server
+    if not os.getenv('DATABASE_URL'):
+        path = os.path.join(tempfile.mkdtemp(), 'customer_bench.db')
+        os.environ['DATABASE_URL'] = f"sqlite:///{path}"
+    os.environ.setdefault('RESERVATION_SWEEP_INTERVAL', '0')
+    os.environ.setdefault('RATE_LIMIT_ENABLED', '0')  # Every thread is the same client
+
+    from app import create_app
+    from app.db import db
+    from app.models.customer import Customer
+
+    app = create_app()
+    with app.app_context():
+        db.create_all(bind_key=None)  # Tables live on the primary; replicas receive them through replication
+        db.session.query(Customer).delete()
+        db.session.commit()
+
+    lock = threading.Lock()
+    rng = random.Random(42)
+    # Every other attempt retries an earlier one with its key; the rest use a key of their own
+    attempts = []
+    for n in range(args.attempts):
+        if n % 2 and attempts:
+            attempts.append(rng.choice(attempts))
+        else:
+            attempts.append((rng.randrange(args.users), f"key-{n}"))
+    pending = iter(attempts)
+    statuses, created, replayed = {}, {}, []
+
+    def creator():
+        client = app.test_client()
+        while True:
+            with lock:
+                attempt = next(pending, None)
+            if attempt is None:
+                break
+            user, key = attempt
+            response = client.post('/customers/', json=payload(user), headers={'Idempotency-Key': key})
+            with lock:
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code == 201:
+                    if response.headers.get('Idempotent-Replayed'):
+                        replayed.append((user, response.get_json()["id"]))
+                    else:
+                        created.setdefault(user, []).append(response.get_json()["id"])
+
+    started = time.perf_counter()
+    run_threads(creator, args.threads)
+    create_elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        rows = db.session.query(Customer.userId, db.func.count()).group_by(Customer.userId).all()
+    duplicates = {user_id: count for user_id, count in rows if count > 1}
+    attempted_users = {user for user, _ in attempts}
+    ids = {user: found[0] for user, found in created.items()}
+
+    # Conditional updates of one customer: read the version, then PUT with If-Match
+    target = ids[min(ids)]
+    update_statuses = {}
+    remaining = iter(range(args.updates))
+
+    def updater():
+        client = app.test_client()
+        while True:
+            with lock:
+                n = next(remaining, None)
+            if n is None:
+                break
+            etag = client.get(f'/customers/{target}').headers['ETag']
+            status = client.put(f'/customers/{target}', json=payload(min(ids), name=f"Update {n}"), headers={'If-Match': etag}).status_code
+            with lock:
+                update_statuses[status] = update_statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    run_threads(updater, args.threads)
+    update_elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        final_version = db.session.query(Customer.version).filter_by(customer_id=target).scalar()
+
+    report = {
+        "threads": args.threads,
+        "create_attempts": args.attempts,
+        "create_statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "creates_per_s": round(args.attempts / create_elapsed, 1),
+        "users_created": len(rows),
+        "duplicate_users": duplicates,
+        "users_created_twice": sorted(user for user, found in created.items() if len(found) > 1),
+        "replays_naming_another_customer": sum(1 for user, id in replayed if ids.get(user) != id),
+        "update_attempts": args.updates,
+        "update_statuses": {str(k): v for k, v in sorted(update_statuses.items())},
+        "updates_per_s": round(args.updates / update_elapsed, 1),
+        "final_version": final_version,
+    }
+    report["consistent"] = (
+        not duplicates
+        and not report["users_created_twice"]
+        and report["replays_naming_another_customer"] == 0
+        and len(rows) == len(attempted_users)
+        and set(statuses) <= {201, 409, 422}
+        and final_version == 1 + update_statuses.get(200, 0)
+        and set(update_statuses) <= {200, 412}
+    )
+    print(json.dumps(report, indent=2))
+    return 0 if report["consistent"] else 1
+
+
+def run_threads(target, count):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Shared building blocks for the benchmarks: booting the app against a throwaway database,
+seeding synthetic catalogs, counting SQL statements per request and summarizing latencies.
+"""
+import os
+import random
+import subprocess
+import tempfile
+import threading
+import time
+
+from sqlalchemy import event
+
+GENRES = ('fiction', 'history', 'science', 'fantasy', 'mystery', 'biography', 'poetry', 'travel')
+WORDS = ('dragon', 'river', 'empire', 'garden', 'silent', 'winter', 'machine', 'letters', 'ocean', 'shadow',
+         'kingdom', 'journey', 'stars', 'glass', 'forest', 'memory', 'city', 'storm', 'secret', 'light')
+STATES = ('CA', 'NY', 'TX', 'WA', 'IL', 'MA', 'PA', 'OH', 'GA', 'NC')
+
+
+def boot_app(database_url=None, **env):
+    """
+    Creates the app against `database_url`, or a fresh SQLite file when none is given, and creates the tables.
+
+    Args:
+        database_url (str, optional): The database to benchmark against.
+        **env: Extra environment variables (configuration) to set before the app is created.
+    Returns:
+        Flask: The application instance.
+    """
+    if not database_url:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('RESERVATION_SWEEP_INTERVAL', '0')
+    os.environ.setdefault('RATE_LIMIT_ENABLED', '0')  # Every benchmark thread is the same client
+    for key, value in env.items():
+        os.environ[key] = str(value)
+
+    from app import create_app
+    from app.db import db
+
+    app = create_app()
+    with app.app_context():
+        db.create_all(bind_key=None)  # Tables live on the primary; replicas receive them through replication
+    return app
+
+
+def isbn_for(n):
+    return f"978{n:010d}"
+
+
+def user_id_for(n):
+    return f"reader{n}@example.com"
+
+
+def seed(app, books, customers, chunk_size=10000, seed_value=42):
+    """
+    Fills the catalog with synthetic books and customers using bulk INSERTs.
+
+    Args:
+        app: The Flask application instance.
+        books (int): The number of books to create.
+        customers (int): The number of customers to create.
+        chunk_size (int): Rows per INSERT statement.
+        seed_value (int): Random seed, so every run produces the same catalog.
+    Returns:
+        float: Seconds spent seeding.
+    """
+    from app.db import db
+    from app.models.book import Book
+    from app.models.customer import Customer
+
+    rng = random.Random(seed_value)
+    started = time.perf_counter()
+    with app.app_context():
+        for start in range(0, books, chunk_size):
+            rows = []
+            for n in range(start, min(start + chunk_size, books)):
+                title = ' '.join(rng.sample(WORDS, 3)).title()
+                rows.append({
+                    "ISBN": isbn_for(n),
+                    "title": title,
+                    "author": f"Author {rng.randrange(max(1, books // 20))}",
+                    "description": ' '.join(rng.choices(WORDS, k=rng.randint(20, 120))),
+                    "genre": rng.choice(GENRES),
+                    "price": round(rng.uniform(2, 60), 2),
+                    "quantity": rng.randint(0, 500),
+                })
+            db.session.execute(Book.__table__.insert(), rows)
+            db.session.commit()
+
+        for start in range(0, customers, chunk_size):
+            rows = [
+                {
+                    "userId": user_id_for(n),
+                    "name": f"Reader {n}",
+                    "phone": f"+1555{n:07d}",
+                    "address": f"{n} Main St",
+                    "address2": None,
+                    "city": "Springfield",
+                    "state": rng.choice(STATES),
+                    "zipcode": f"{rng.randrange(10000, 99999)}",
+                }
+                for n in range(start, min(start + chunk_size, customers))
+            ]
+            db.session.execute(Customer.__table__.insert(), rows)
+            db.session.commit()
+    return time.perf_counter() - started
+
+
+class QueryCounter:
+    """
+    Counts the SQL statements each thread executes, so a benchmark can attribute queries to requests
+    made from that thread.
+    """
+
+    def __init__(self, engine):
+        self._local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args, **kwargs):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def take(self):
+        """
+        Returns the number of statements executed by the calling thread since the last call.
+        """
+        count = getattr(self._local, 'count', 0)
+        self._local.count = 0
+        return count
+
+
+def percentile(sorted_values, pct):
+    """
+    Returns the nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    """
+    Summarizes request samples into latency and time-to-first-byte percentiles, throughput,
+    queries per request and response bytes on the wire.
+
+    Args:
+        samples (list): (latency seconds, status code, queries, body bytes, time to first byte) tuples.
+        elapsed (float): Wall-clock seconds the samples were collected over.
+    Returns:
+        dict: The summary.
+    """
+    latencies = sorted(sample[0] for sample in samples)
+    first_bytes = sorted(sample[4] for sample in samples)
+    count = len(samples)
+    sent = sum(sample[3] for sample in samples)
+    ms = lambda value: None if value is None else round(value * 1000, 3)
+    return {
+        "requests": count,
+        "errors": sum(1 for sample in samples if sample[1] >= 500),
+        "requests_per_s": round(count / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+        "ttfb_p50_ms": ms(percentile(first_bytes, 50)),
+        "ttfb_p95_ms": ms(percentile(first_bytes, 95)),
+        "queries_per_request": round(sum(sample[2] for sample in samples) / count, 2) if count else None,
+        "bytes_per_request": round(sent / count) if count else None,
+        "mb_per_s": round(sent / elapsed / 1e6, 3) if elapsed else None,
+    }
+
+
+def git_revision():
+    """
+    Returns the current commit hash, so reports can be compared between commits.
+    """
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,94 @@
+"""
+Concurrency benchmark for the stock purchase path.
+
+Many threads try to buy the same hot ISBN at once. The run reports purchase throughput and checks
+that the number of copies sold never exceeds the initial stock and that the final quantity is
+exactly the initial stock minus the copies sold.
+
+Usage:
+    python -m benchmarks.inventory_contention --threads 32 --stock 500 --attempts 2000
+    DATABASE_URL=mysql+pymysql://... python -m benchmarks.inventory_contention
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=32, help="Concurrent buyers")
+    parser.add_argument('--stock', type=int, default=500, help="Initial quantity of the hot book")
+    parser.add_argument('--attempts', type=int, default=2000, help="Total purchase attempts across all threads")
+    parser.add_argument('--isbn', default='9780000000001', help="ISBN of the hot book")
+    args = parser.parse_args(argv)
+
+    # Default to a throwaway SQLite file so the benchmark runs without a database server
+    if not os.getenv('DATABASE_URL'):
+        path = os.path.join(tempfile.mkdtemp(), 'inventory_bench.db')
+        os.environ['DATABASE_URL'] = f"sqlite:///{path}"
+    os.environ.setdefault('RESERVATION_SWEEP_INTERVAL', '0')
+
+    from app import create_app
+    from app.db import db
+    from app.models.book import Book
+
+    app = create_app()
+    with app.app_context():
+        db.create_all(bind_key=None)  # Tables live on the primary; replicas receive them through replication
+        db.session.query(Book).filter_by(ISBN=args.isbn).delete()
+        db.session.add(Book(ISBN=args.isbn, title="Hot title", author="Bench", description="Contended book",
+                            genre="bench", price=9.99, quantity=args.stock))
+        db.session.commit()
+
+    statuses = {}
+    lock = threading.Lock()
+    remaining = iter(range(args.attempts))
+
+    def buyer():
+        client = app.test_client()
+        counts = {}
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    break
+            status = client.post(f"/books/{args.isbn}/purchase", json={"quantity": 1}).status_code
+            counts[status] = counts.get(status, 0) + 1
+        with lock:
+            for status, count in counts.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=buyer) for _ in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        final_quantity = db.session.query(Book.quantity).filter_by(ISBN=args.isbn).scalar()
+
+    sold = statuses.get(201, 0)
+    report = {
+        "threads": args.threads,
+        "attempts": args.attempts,
+        "initial_stock": args.stock,
+        "sold": sold,
+        "sold_out_responses": statuses.get(409, 0),
+        "other_responses": {str(k): v for k, v in statuses.items() if k not in (201, 409)},
+        "final_quantity": final_quantity,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(args.attempts / elapsed, 1),
+        "oversold": sold > args.stock or final_quantity < 0,
+        "consistent": final_quantity == args.stock - sold,
+    }
+    print(json.dumps(report, indent=2))
+    return 0 if report["consistent"] and not report["oversold"] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
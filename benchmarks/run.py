@@ -0,0 +1,211 @@
+"""
+Mixed read/write load test for the books and customers blueprints.
+
+Boots create_app() against a local database (a throwaway SQLite file by default, or any
+DATABASE_URL such as a local MySQL), seeds a synthetic catalog, then drives a weighted mix of
+requests from many threads through the WSGI app. The JSON report holds p50/p95/p99 latency,
+time to first byte, requests per second, SQL queries per request and response bytes (as sent,
+after compression), overall and per operation, and is tagged with the git revision so runs can be
+compared with benchmarks/compare.py.
+
+Usage:
+    python -m benchmarks.run --books 10000 --customers 2000 --concurrency 16 --duration 20
+    python -m benchmarks.run --books 1000000 --write-ratio 0.02 --output results/base.json
+    python -m benchmarks.run --accept-encoding identity   # measure uncompressed responses
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+
+from benchmarks.harness import (
+    GENRES, WORDS, QueryCounter, boot_app, git_revision, isbn_for, seed, summarize, user_id_for
+)
+
+
+def read_operations(books, customers):
+    """
+    Returns the read operations and their weights. Each operation takes a random generator and
+    returns the (method, path, json body) of one request.
+    """
+    return [
+        ("get_book", 40, lambda rng: ("GET", f"/books/{isbn_for(rng.randrange(books))}", None)),
+        ("list_books", 10, lambda rng: ("GET", f"/books/?genre={rng.choice(GENRES)}&sort=price&limit=20", None)),
+        ("list_books_large", 2, lambda rng: ("GET", f"/books/?sort=price&limit=1000&min_price={rng.randrange(50)}", None)),
+        ("lookup_books", 8, lambda rng: ("GET", "/books/?isbn=" + ",".join(isbn_for(rng.randrange(books)) for _ in range(20)), None)),
+        ("search_books", 7, lambda rng: ("GET", f"/books/search?q={rng.choice(WORDS)}+{rng.choice(WORDS)[:3]}", None)),
+        ("get_customer", 15, lambda rng: ("GET", f"/customers/{rng.randrange(1, customers + 1)}", None)),
+        ("get_customer_by_user_id", 10, lambda rng: ("GET", f"/customers/?userId={user_id_for(rng.randrange(customers))}", None)),
+    ]
+
+
+def write_operations(books, counter):
+    """
+    Returns the write operations and their weights. New keys are drawn from a shared counter so
+    concurrent threads never collide.
+    """
+    def new_book(rng):
+        n = books + next(counter)
+        return ("POST", "/books/", {"ISBN": isbn_for(n), "title": "Bench Title", "Author": "Bench Author",
+                                    "description": "Written by the benchmark", "genre": rng.choice(GENRES),
+                                    "price": "9.99", "quantity": 10})
+
+    def update_book(rng):
+        isbn = isbn_for(rng.randrange(books))
+        return ("PUT", f"/books/{isbn}", {"title": "Updated Title", "Author": "Bench Author",
+                                          "description": "Updated by the benchmark", "genre": rng.choice(GENRES),
+                                          "price": "19.99", "quantity": rng.randint(1, 500)})
+
+    def new_customer(rng):
+        n = next(counter)
+        return ("POST", "/customers/", {"userId": f"bench{n}-{os.getpid()}@example.com", "name": "Bench",
+                                        "phone": "+15550000000", "address": "1 Bench Rd", "city": "Springfield",
+                                        "state": "IL", "zipcode": "62701"})
+
+    def purchase(rng):
+        return ("POST", f"/books/{isbn_for(rng.randrange(books))}/purchase", {"quantity": 1})
+
+    return [("add_book", 30, new_book), ("update_book", 40, update_book),
+            ("create_customer", 20, new_customer), ("purchase_book", 10, purchase)]
+
+
+class Counter:
+    """
+    Thread-safe source of unique integers.
+    """
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self._lock:
+            self._value += 1
+            return self._value
+
+
+def timed_request(client, method, path, body, headers):
+    """
+    Sends one request and reads the body as it is produced.
+    Returns:
+        tuple: (latency seconds, status code, body bytes, seconds to the first body byte)
+    """
+    started = time.perf_counter()
+    response = client.open(path, method=method, json=body, headers=headers, buffered=False)
+    first_byte, size = None, 0
+    try:
+        for chunk in response.response:
+            if chunk and first_byte is None:
+                first_byte = time.perf_counter() - started
+            size += len(chunk)
+    finally:
+        response.close()
+    latency = time.perf_counter() - started
+    return latency, response.status_code, size, latency if first_byte is None else first_byte
+
+
+def run_workload(app, books, customers, concurrency, duration, write_ratio, warmup, seed_value, accept_encoding='gzip'):
+    """
+    Drives the mixed workload and returns the per-operation samples and the measured wall time.
+    """
+    from app.db import db
+
+    with app.app_context():
+        queries = QueryCounter(db.engine)
+
+    reads = read_operations(books, customers)
+    writes = write_operations(books, Counter())
+    samples = {name: [] for name, _, _ in reads + writes}
+    headers = {'Accept-Encoding': accept_encoding}
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency + 1)
+    state = {"measuring": False, "stop": False}
+
+    def worker(index):
+        rng = random.Random(seed_value + index)
+        client = app.test_client()
+        local = {name: [] for name in samples}
+        read_names, read_weights = zip(*[(name, weight) for name, weight, _ in reads])
+        write_names, write_weights = zip(*[(name, weight) for name, weight, _ in writes])
+        build = {name: make for name, _, make in reads + writes}
+        start_barrier.wait()
+        while not state["stop"]:
+            if rng.random() < write_ratio:
+                name = rng.choices(write_names, write_weights)[0]
+            else:
+                name = rng.choices(read_names, read_weights)[0]
+            method, path, body = build[name](rng)
+            queries.take()
+            latency, status, size, first_byte = timed_request(client, method, path, body, headers)
+            executed = queries.take()
+            if state["measuring"]:
+                local[name].append((latency, status, executed, size, first_byte))
+        with lock:
+            for name, values in local.items():
+                samples[name].extend(values)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    time.sleep(warmup)
+    state["measuring"] = True
+    measured_from = time.perf_counter()
+    time.sleep(duration)
+    state["measuring"] = False
+    elapsed = time.perf_counter() - measured_from
+    state["stop"] = True
+    for thread in threads:
+        thread.join()
+    return samples, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=os.getenv('BENCH_DATABASE_URL'),
+                        help="Database to benchmark against (default: a fresh SQLite file)")
+    parser.add_argument('--books', type=int, default=10000, help="Synthetic books to seed (10k to 1M)")
+    parser.add_argument('--customers', type=int, default=2000, help="Synthetic customers to seed")
+    parser.add_argument('--skip-seed', action='store_true', help="Reuse an already seeded --database-url")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent client threads")
+    parser.add_argument('--duration', type=float, default=15, help="Measured seconds")
+    parser.add_argument('--warmup', type=float, default=3, help="Unmeasured seconds before measuring")
+    parser.add_argument('--write-ratio', type=float, default=0.1, help="Fraction of requests that write")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed for the catalog and the request mix")
+    parser.add_argument('--accept-encoding', default='gzip', help="Accept-Encoding sent with every request (identity: uncompressed)")
+    parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    app = boot_app(args.database_url)
+    seed_seconds = None if args.skip_seed else seed(app, args.books, args.customers, seed_value=args.seed)
+
+    samples, elapsed = run_workload(app, args.books, args.customers, args.concurrency, args.duration,
+                                    args.write_ratio, args.warmup, args.seed, args.accept_encoding)
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "database": app.config['SQLALCHEMY_DATABASE_URI'].split('://', 1)[0],
+        "config": {key: getattr(args, key) for key in ('books', 'customers', 'concurrency', 'duration', 'write_ratio', 'seed', 'accept_encoding')},
+        "seed_s": round(seed_seconds, 2) if seed_seconds is not None else None,
+        "overall": summarize([sample for values in samples.values() for sample in values], elapsed),
+        "operations": {name: summarize(values, elapsed) for name, values in samples.items()},
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
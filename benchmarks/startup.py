@@ -0,0 +1,131 @@
+"""
+Worker startup time: how long a new worker takes from being started to being ready (/ready).
+
+Two ways of starting a worker are measured, each `--runs` times against the same database:
+
+    cold: A fresh interpreter imports the app, creates it and warms up, which is what a worker
+          pays when it is not forked from a process that already imported the app.
+    warm: The app's modules are imported once in this process, which then forks a child per run
+          that only creates the app and warms up, as the gunicorn workers of `python -m app.serve` do.
+
+The report holds p50/p95 of the time to ready and the mean of every phase in the startup
+profile (/startup/profile), so a slow import or init step stands out. Forking needs a POSIX system.
+
+Usage:
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --database-url mysql+pymysql://user:pw@localhost/bench
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.harness import boot_app, git_revision, percentile
+
+# Runs in a fresh interpreter: import, create and warm up the app, then print its startup profile
+COLD_WORKER = """
+import json
+from app import create_app
+app = create_app()
+app.extensions['startup'].warm_up()
+print(json.dumps(app.extensions['startup'].profile.report()))
+"""
+
+
+def cold_start(env):
+    """
+    Starts one worker in a new interpreter.
+    Returns:
+        tuple: (seconds until ready, startup profile)
+    """
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', COLD_WORKER], env=env, check=True, capture_output=True, text=True).stdout
+    seconds = time.perf_counter() - started
+    return seconds, json.loads(output.strip().splitlines()[-1])
+
+
+def warm_start():
+    """
+    Forks one worker from this process, whose modules are already imported.
+    Returns:
+        tuple: (seconds until ready, startup profile)
+    """
+    read_end, write_end = os.pipe()
+    started = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        os.dup2(2, 1)  # Keep the worker's log lines out of the report on stdout
+        code = 0
+        try:
+            from app import create_app
+            app = create_app()
+            app.extensions['startup'].warm_up()
+            os.write(write_end, json.dumps(app.extensions['startup'].profile.report()).encode())
+        except BaseException:
+            code = 1
+        finally:
+            os.close(write_end)
+            os._exit(code)
+
+    os.close(write_end)
+    with os.fdopen(read_end, 'rb') as pipe:
+        output = pipe.read()
+    seconds = time.perf_counter() - started
+    os.waitpid(pid, 0)
+    return seconds, json.loads(output)
+
+
+def summarize(mode, samples):
+    seconds = sorted(sample[0] for sample in samples)
+    phases = {}
+    for _, profile in samples:
+        for phase in profile["phases"]:
+            if profile["imports_preloaded"] and phase["name"].startswith("import "):
+                continue  # Paid once by this process, not by the worker
+            phases.setdefault(phase["name"], []).append(phase["ms"])
+    ms = lambda value: round(value * 1000, 2)
+    return {
+        "mode": mode,
+        "runs": len(samples),
+        "ready_p50_ms": ms(percentile(seconds, 50)),
+        "ready_p95_ms": ms(percentile(seconds, 95)),
+        "phases_mean_ms": {name: round(sum(values) / len(values), 2) for name, values in phases.items()},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=os.getenv('BENCH_DATABASE_URL'),
+                        help="Database the workers connect to (default: a fresh SQLite file)")
+    parser.add_argument('--runs', type=int, default=10, help="Workers started per mode")
+    parser.add_argument('--modes', default='cold,warm')
+    parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    # Creates the tables, and imports the app's modules into this process for the warm starts
+    boot_app(database_url)
+    env = dict(os.environ, DATABASE_URL=database_url, RESERVATION_SWEEP_INTERVAL='0', RATE_LIMIT_ENABLED='0')
+
+    results = []
+    for mode in args.modes.split(','):
+        samples = [cold_start(env) if mode == 'cold' else warm_start() for _ in range(args.runs)]
+        results.append(summarize(mode, samples))
+        print(json.dumps({key: results[-1][key] for key in ("mode", "ready_p50_ms", "ready_p95_ms")}), file=sys.stderr)
+
+    output = json.dumps({"revision": git_revision(), "database": database_url.split('://', 1)[0],
+                         "runs": args.runs, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark of request validation cost.
+
+Compares the per-request validation the routes used to do inline (rebuilding the email regex and
+the state set on every call) with the schemas precompiled in app.validation, for valid and invalid
+book and customer payloads.
+
+Usage:
+    python -m benchmarks.validation --iterations 200000
+"""
+import argparse
+import json
+import re
+import sys
+import timeit
+
+from app.validation import BOOK_SCHEMA, CUSTOMER_SCHEMA
+
+BOOK = {"ISBN": "9780000000001", "title": "Title", "Author": "Author", "description": "A description",
+        "genre": "fiction", "price": "12.99", "quantity": 4}
+CUSTOMER = {"userId": "reader@example.com", "name": "Reader", "phone": "+15555550100", "address": "1 Main St",
+            "city": "Springfield", "state": "il", "zipcode": "62701"}
+
+
+def legacy_book(data):
+    for field in ['ISBN', 'title', 'Author', 'description', 'genre', 'price', 'quantity']:
+        if field not in data or not data[field]:
+            return f"{field} is a mandatory field and cannot be empty."
+    if not isinstance(data['price'], (float, str)) or not (len(str(data['price']).split('.')[-1]) == 2):
+        return "Price must have exactly two decimal points."
+    # The routes then read the converted values back out of the payload
+    return dict(ISBN=data['ISBN'], title=data['title'], author=data['Author'], description=data['description'],
+                genre=data['genre'], price=float(data['price']), quantity=int(data['quantity']))
+
+
+def legacy_customer(data):
+    for field in ['userId', 'name', 'phone', 'address', 'city', 'state', 'zipcode']:
+        if field not in data or not data[field]:
+            return f"Missing or invalid field: {field}"
+    email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    if not re.match(email_regex, data['userId']):
+        return "Invalid email format for userId"
+    valid_states = {
+        'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA', 'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA',
+        'ME', 'MD', 'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ', 'NM', 'NY', 'NC', 'ND', 'OH', 'OK',
+        'OR', 'PA', 'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY'
+    }
+    if data['state'].upper() not in valid_states:
+        return "Invalid state format. Must be a 2-letter US state abbreviation"
+    return None
+
+
+def measure(func, payload, iterations):
+    seconds = min(timeit.repeat(lambda: func(payload), number=iterations, repeat=5))
+    return round(seconds / iterations * 1e9, 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200000)
+    args = parser.parse_args(argv)
+
+    cases = {
+        "book_valid": (BOOK, legacy_book, BOOK_SCHEMA.validate),
+        "book_invalid": (dict(BOOK, price="12.9"), legacy_book, BOOK_SCHEMA.validate),
+        "customer_valid": (CUSTOMER, legacy_customer, CUSTOMER_SCHEMA.validate),
+        "customer_invalid": (dict(CUSTOMER, userId="not-an-email"), legacy_customer, CUSTOMER_SCHEMA.validate),
+    }
+    report = {}
+    for name, (payload, legacy, compiled) in cases.items():
+        report[name] = {
+            "legacy_ns_per_request": measure(legacy, payload, args.iterations),
+            "compiled_ns_per_request": measure(compiled, payload, args.iterations),
+        }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
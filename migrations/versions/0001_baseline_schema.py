@@ -0,0 +1,54 @@
+"""Baseline schema: the books and customers tables as the application first created them
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 12:00:00
+
+This is the schema db.create_all() made before migrations existed, including the unique index
+on the ISBN primary key and the unnamed unique index on userId. A database made that way is
+marked as being at this revision with `flask db stamp 0001` and then upgraded like a new one.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'books',
+        sa.Column('ISBN', sa.String(length=200), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('author', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('genre', sa.String(length=200), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('ISBN'),
+        sa.UniqueConstraint('ISBN'),
+    )
+
+    op.create_table(
+        'customers',
+        sa.Column('customer_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('userId', sa.String(length=255), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('phone', sa.String(length=255), nullable=False),
+        sa.Column('address', sa.String(length=255), nullable=False),
+        sa.Column('address2', sa.String(length=255), nullable=True),
+        sa.Column('city', sa.String(length=255), nullable=False),
+        sa.Column('state', sa.String(length=255), nullable=False),
+        sa.Column('zipcode', sa.String(length=255), nullable=False),
+        sa.PrimaryKeyConstraint('customer_id'),
+        sa.UniqueConstraint('userId'),
+    )
+
+
+def downgrade():
+    op.drop_table('customers')
+    op.drop_table('books')
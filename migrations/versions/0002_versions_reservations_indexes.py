@@ -0,0 +1,124 @@
+"""Add row versions, the reservations table and the indexes the routes need
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 12:15:00
+
+    - books and customers get `version` (optimistic concurrency, ETag) and `updated_at`
+      (Last-Modified). Existing rows start at version 1 and the time of the migration.
+    - The reservations table is created with its indexes.
+    - books gets the composite indexes of the keyset-paginated listing.
+    - customers gets the named unique index uq_customers_userId behind the userId lookup.
+
+On MySQL every statement on an existing table runs as online DDL (ALGORITHM=INPLACE, LOCK=NONE),
+so reads and writes continue while columns and indexes are built; the statement fails instead of
+silently falling back to a locking table copy. Redundant unique indexes left by the baseline (on
+the ISBN primary key, and the unnamed one on userId) are dropped there; SQLite's implicit
+indexes cannot be dropped and are left alone.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+ONLINE = "ALGORITHM=INPLACE, LOCK=NONE"
+
+
+def is_mysql():
+    return op.get_bind().dialect.name == 'mysql'
+
+
+def create_index(name, table, columns, unique=False):
+    if is_mysql():
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        op.execute(f"CREATE {kind} `{name}` ON `{table}` ({', '.join(f'`{c}`' for c in columns)}) {ONLINE}")
+    else:
+        op.create_index(name, table, columns, unique=unique)
+
+
+def add_version_columns(table):
+    """
+    Adds the NOT NULL version and updated_at columns to a table that may already hold rows.
+    """
+    if is_mysql():
+        op.execute(f"ALTER TABLE `{table}` ADD COLUMN `version` INT NOT NULL DEFAULT 1, "
+                   f"ADD COLUMN `updated_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, {ONLINE}")
+        return
+    # SQLite cannot add a column with a non-constant default, so updated_at is filled in a second step
+    op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute(f"UPDATE {table} SET updated_at = CURRENT_TIMESTAMP")
+    with op.batch_alter_table(table) as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def unique_indexes(table):
+    """
+    Returns the unique indexes and constraints of a table as {name: [columns]}.
+    """
+    inspector = sa.inspect(op.get_bind())
+    found = {index['name']: index['column_names'] for index in inspector.get_indexes(table) if index['unique']}
+    found.update({constraint['name']: constraint['column_names'] for constraint in inspector.get_unique_constraints(table)})
+    return found
+
+
+def drop_redundant_unique(table, columns, keep):
+    """
+    Drops the unique indexes on exactly `columns` other than `keep`; each one is a second copy
+    of the key that InnoDB maintains on every write. Only MySQL can drop them in place.
+    """
+    if not is_mysql():
+        return
+    for name, indexed in unique_indexes(table).items():
+        if indexed == columns and name not in (None, keep):
+            op.execute(f"DROP INDEX `{name}` ON `{table}` {ONLINE}")
+
+
+def upgrade():
+    add_version_columns('books')
+    add_version_columns('customers')
+
+    # Keyset-paginated listing: each filter column followed by the sort key and the ISBN tie-breaker
+    create_index('ix_books_genre_isbn', 'books', ['genre', 'ISBN'])
+    create_index('ix_books_genre_price_isbn', 'books', ['genre', 'price', 'ISBN'])
+    create_index('ix_books_author_isbn', 'books', ['author', 'ISBN'])
+    create_index('ix_books_price_isbn', 'books', ['price', 'ISBN'])
+    drop_redundant_unique('books', ['ISBN'], keep='PRIMARY')
+
+    # GET /customers?userId= and the duplicate check in POST /customers
+    create_index('uq_customers_userId', 'customers', ['userId'], unique=True)
+    drop_redundant_unique('customers', ['userId'], keep='uq_customers_userId')
+
+    op.create_table(
+        'reservations',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('ISBN', sa.String(length=200), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['ISBN'], ['books.ISBN']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_reservations_ISBN', 'reservations', ['ISBN'])
+    # The reservation sweeper's "active and expired" scan
+    op.create_index('ix_reservations_status_expires_at', 'reservations', ['status', 'expires_at'])
+
+
+def downgrade():
+    op.drop_table('reservations')
+    if is_mysql():
+        # The baseline's unnamed unique index was dropped on upgrade; userId stays unique
+        create_index('userId', 'customers', ['userId'], unique=True)
+    op.drop_index('uq_customers_userId', table_name='customers')
+    for index in ('ix_books_price_isbn', 'ix_books_author_isbn', 'ix_books_genre_price_isbn', 'ix_books_genre_isbn'):
+        op.drop_index(index, table_name='books')
+    for table in ('customers', 'books'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('updated_at')
+            batch_op.drop_column('version')
@@ -0,0 +1,65 @@
+"""Add books.isbn13 and customers.user_id_lower
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 12:30:00
+
+GET /books/<isbn> finds a book stored under another form of its ISBN (ISBN-10, hyphenated)
+through isbn13, and GET /customers?userId= finds a customer whatever the case of the userId
+through user_id_lower.
+
+Both columns are added empty and nullable, which is an in-place change; new rows get their
+values from the application, and existing rows are filled afterwards, in small batches, by
+`flask catalog backfill isbn13` and `flask catalog backfill user_id_lower`. Until then the
+old rows are only found by their exact ISBN and userId.
+
+On MySQL every statement runs as online DDL (ALGORITHM=INPLACE, LOCK=NONE), so reads and
+writes continue while the columns and indexes are built.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+ONLINE = "ALGORITHM=INPLACE, LOCK=NONE"
+
+
+def is_mysql():
+    return op.get_bind().dialect.name == 'mysql'
+
+
+def add_column(table, column, ddl_type):
+    if is_mysql():
+        op.execute(f"ALTER TABLE `{table}` ADD COLUMN `{column.name}` {ddl_type} NULL, {ONLINE}")
+    else:
+        op.add_column(table, column)
+
+
+def create_index(name, table, columns, unique=False):
+    if is_mysql():
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        op.execute(f"CREATE {kind} `{name}` ON `{table}` ({', '.join(f'`{c}`' for c in columns)}) {ONLINE}")
+    else:
+        op.create_index(name, table, columns, unique=unique)
+
+
+def upgrade():
+    add_column('books', sa.Column('isbn13', sa.String(length=13), nullable=True), "VARCHAR(13)")
+    create_index('ix_books_isbn13', 'books', ['isbn13'])
+
+    add_column('customers', sa.Column('user_id_lower', sa.String(length=255), nullable=True), "VARCHAR(255)")
+    create_index('ix_customers_user_id_lower', 'customers', ['user_id_lower'])
+
+
+def downgrade():
+    op.drop_index('ix_customers_user_id_lower', table_name='customers')
+    with op.batch_alter_table('customers') as batch_op:
+        batch_op.drop_column('user_id_lower')
+    op.drop_index('ix_books_isbn13', table_name='books')
+    with op.batch_alter_table('books') as batch_op:
+        batch_op.drop_column('isbn13')
@@ -0,0 +1,80 @@
+import pytest
+
+
+@pytest.fixture
+def bare_app(tmp_path, monkeypatch):
+    """
+    An application on a fresh, empty SQLite database, with rate limiting off (every test client is
+    the same peer) and no background reservation sweeper.
+    """
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv('RESERVATION_SWEEP_INTERVAL', '0')
+    monkeypatch.setenv('RATE_LIMIT_ENABLED', '0')
+
+    from app import create_app
+    from app.db import db
+    from app.search import book_search
+
+    app = create_app()
+    # The search index is a module-level singleton; start every test without one
+    book_search.invalidate()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def app(bare_app):
+    """
+    `bare_app` with the schema of the models created.
+    """
+    from app.db import db
+
+    with bare_app.app_context():
+        db.create_all(bind_key=None)
+    return bare_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def configured_app(app, monkeypatch):
+    """
+    Builds another application on the database of `app` with extra settings from the environment.
+    """
+    from app import create_app
+    from app.db import db
+
+    created = []
+
+    def build(**settings):
+        for name, value in settings.items():
+            monkeypatch.setenv(name, value)
+        created.append(create_app())
+        return created[-1]
+
+    yield build
+    for instance in created:
+        with instance.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+
+def book_payload(isbn="9780321815736", **fields):
+    """
+    A valid POST /books body.
+    """
+    return dict({"ISBN": isbn, "title": "Software Architecture in Practice", "Author": "Bass",
+                 "description": "Seminal", "genre": "non-fiction", "price": 59.95, "quantity": 10}, **fields)
+
+
+def customer_payload(user_id="ada@example.com", **fields):
+    """
+    A valid POST /customers body.
+    """
+    return dict({"userId": user_id, "name": "Ada", "phone": "555-0100", "address": "1 Main St",
+                 "city": "Springfield", "state": "IL", "zipcode": "62701"}, **fields)
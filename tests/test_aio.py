@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from tests.conftest import book_payload
+
+pytest.importorskip("quart")
+pytest.importorskip("aiosqlite")
+
+ISBN = "9780321815736"
+
+
+@pytest.fixture
+def aio_app(app):
+    """
+    The asyncio app on the same database as `app`.
+    """
+    from app.aio import create_async_app
+    from app.aio.db import aio_db
+
+    aio_app = create_async_app()
+    yield aio_app
+    asyncio.run(aio_db.engine.dispose())
+
+
+def test_duplicate_isbn_is_422(aio_app):
+    async def run():
+        client = aio_app.test_client()
+        assert (await client.post('/books/', json=book_payload())).status_code == 201
+
+        response = await client.post('/books/', json=book_payload(title="Impostor"))
+        assert response.status_code == 422
+        assert await response.get_json() == {"message": "This ISBN already exists in the system."}
+        assert (await (await client.get(f'/books/{ISBN}')).get_json())["title"] == "Software Architecture in Practice"
+
+    asyncio.run(run())
+
+
+def test_batch_row_stored_by_another_writer_is_422(aio_app, monkeypatch):
+    monkeypatch.setattr('app.aio.routes.books.drop_existing', lambda rows, errors, existing: rows)
+
+    async def run():
+        client = aio_app.test_client()
+        await client.post('/books/', json=book_payload())
+        response = await client.post('/books/batch', json=[book_payload("9780000000001"), book_payload()])
+        assert [result["status"] for result in (await response.get_json())["results"]] == [201, 422]
+
+    asyncio.run(run())
+
+
+def test_cache_stats_need_the_token(aio_app):
+    async def run():
+        client = aio_app.test_client()
+        assert (await client.get('/cache/stats')).status_code == 404
+        aio_app.config['CATALOG_HTTP_TOKEN'] = 's3cret'
+        assert (await client.get('/cache/stats')).status_code == 401
+        response = await client.get('/cache/stats', headers={'Authorization': 'Bearer s3cret'})
+        assert "books" in await response.get_json()
+
+    asyncio.run(run())
+
+
+def test_put_of_a_missing_book_is_404_with_or_without_if_match(aio_app):
+    async def run():
+        client = aio_app.test_client()
+        for headers in ({}, {'If-Match': '"1"'}):
+            response = await client.put('/books/9990000000000', json=book_payload("9990000000000"), headers=headers)
+            assert response.status_code == 404
+
+    asyncio.run(run())
+
+
+def test_conditional_get_and_listing(aio_app):
+    async def run():
+        client = aio_app.test_client()
+        created = await client.post('/books/', json=book_payload())
+        etag = created.headers['ETag']
+
+        assert (await client.get(f'/books/{ISBN}', headers={'If-None-Match': etag})).status_code == 304
+        response = await client.put(f'/books/{ISBN}', json=book_payload(title="Second"), headers={'If-Match': etag})
+        assert response.status_code == 200
+        assert (await client.get(f'/books/{ISBN}', headers={'If-None-Match': etag})).status_code == 200
+
+        listing = await (await client.get('/books/?fields=ISBN,title')).get_json()
+        assert listing == {"books": [{"ISBN": ISBN, "title": "Second"}], "next_cursor": None}
+
+    asyncio.run(run())
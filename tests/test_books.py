@@ -0,0 +1,146 @@
+import json
+import threading
+
+from app.cache import LRUCache, book_cache
+from app.db import db
+from app.models.book import Book
+from app.routes.books import cache_book
+from app.serializers import BOOK_FIELDS, columns_for
+from tests.conftest import book_payload
+
+ISBN = "9780321815736"
+THREADS = 16
+
+
+def read_row(app, isbn=ISBN):
+    """
+    Reads a book row the way a cache miss loads it.
+    """
+    with app.app_context():
+        return db.session.query(*columns_for(None, BOOK_FIELDS, Book.version, Book.updated_at)).filter(Book.ISBN == isbn).first()
+
+
+def test_load_that_read_before_an_update_does_not_replace_its_write_through(app, client):
+    client.post('/books/', json=book_payload())
+    stale = read_row(app)
+
+    assert client.put(f'/books/{ISBN}', json=book_payload(title="Second Edition")).status_code == 200
+    # The miss that read version 1 finishes after the update stored version 2
+    with app.app_context():
+        cache_book(stale)
+
+    assert book_cache.get(ISBN)["version"] == 2
+    assert client.get(f'/books/{ISBN}').get_json()["title"] == "Second Edition"
+
+
+def test_load_that_read_before_a_stock_change_is_not_cached(app, client):
+    client.post('/books/', json=book_payload(quantity=5))
+    client.get(f'/books/{ISBN}')
+    stale = read_row(app)
+
+    assert client.post(f'/books/{ISBN}/purchase', json={"quantity": 2}).status_code == 201
+    with app.app_context():
+        cache_book(stale)
+
+    assert book_cache.get(ISBN) is None
+    assert client.get(f'/books/{ISBN}').get_json()["quantity"] == 3
+
+
+def test_store_keeps_the_newest_version():
+    cache = LRUCache(maxsize=10, ttl=60)
+
+    assert cache.store("a", {"version": 2})
+    assert not cache.store("a", {"version": 1})
+    assert cache.store("a", {"version": 3})
+    assert cache.get("a") == {"version": 3}
+
+
+def test_invalidate_refuses_stores_until_the_holdoff_ends():
+    cache = LRUCache(maxsize=10, ttl=60)
+    cache.store("a", {"version": 1})
+
+    cache.invalidate("a", holdoff=60)
+    assert cache.get("a") is None
+    assert not cache.store("a", {"version": 2})
+
+    cache.invalidate("a", holdoff=0)
+    assert cache.store("a", {"version": 2})
+    assert cache.get("a") == {"version": 2}
+
+
+def test_duplicate_isbn_is_rejected_without_touching_the_stored_book(client):
+    assert client.post('/books/', json=book_payload()).status_code == 201
+
+    response = client.post('/books/', json=book_payload(title="Impostor"))
+    assert response.status_code == 422
+    assert response.get_json() == {"message": "This ISBN already exists in the system."}
+    assert client.get(f'/books/{ISBN}').get_json()["title"] == "Software Architecture in Practice"
+
+
+def test_concurrent_posts_of_one_isbn_create_it_once(app):
+    barrier = threading.Barrier(THREADS)
+    statuses = []
+    lock = threading.Lock()
+
+    def post():
+        client = app.test_client()
+        barrier.wait()
+        status = client.post('/books/', json=book_payload()).status_code
+        with lock:
+            statuses.append(status)
+
+    threads = [threading.Thread(target=post) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(statuses) == [201] + [422] * (THREADS - 1)
+    with app.app_context():
+        assert db.session.query(Book).count() == 1
+
+
+
+def test_cache_serves_repeated_reads(app, client):
+    app.config['CATALOG_HTTP_TOKEN'] = 's3cret'
+    client.post('/books/', json=book_payload())
+    client.get(f'/books/{ISBN}')
+    client.get(f'/books/{ISBN}')
+
+    stats = client.get('/cache/stats', headers={'Authorization': 'Bearer s3cret'}).get_json()["books"]
+    assert stats["backend"] == "memory"
+    assert stats["hits"] >= 2
+
+
+def test_batch_reports_every_item(client):
+    client.post('/books/', json=book_payload())
+    items = [book_payload("9780000000001"), book_payload(), book_payload("9780000000001"), book_payload("9780000000002", price=5)]
+
+    body = client.post('/books/batch', json={"books": items}).get_json()
+
+    assert (body["created"], body["failed"]) == (1, 3)
+    assert [result["status"] for result in body["results"]] == [201, 422, 422, 400]
+    assert client.get('/books/9780000000001').status_code == 200
+    assert client.post('/books/batch', json={"books": "none"}).status_code == 400
+
+
+def test_batch_row_stored_by_another_writer_is_422_and_the_rest_of_its_chunk_is_created(client, monkeypatch):
+    client.post('/books/', json=book_payload())
+    # The other writer commits between the duplicate check and the bulk INSERT
+    monkeypatch.setattr('app.routes.books.drop_existing', lambda rows, errors, existing: rows)
+
+    body = client.post('/books/batch', json=[book_payload("9780000000001"), book_payload(), book_payload("9780000000002")]).get_json()
+
+    assert [result["status"] for result in body["results"]] == [201, 422, 201]
+    assert body["results"][1]["message"] == "This ISBN already exists in the system."
+    assert client.get('/books/9780000000002').status_code == 200
+
+
+def test_ndjson_batch_streams_a_result_per_line(client):
+    lines = [json.dumps(book_payload("9780000000001")), "{not json", json.dumps(book_payload("9780000000002"))]
+
+    response = client.post('/books/batch/ndjson', data="\n".join(lines), content_type='application/x-ndjson')
+    results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert [result.get("status") for result in results[:3]] == [201, 400, 201]
+    assert results[3] == {"created": 2, "failed": 1}
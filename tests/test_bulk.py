@@ -0,0 +1,29 @@
+import pytest
+
+from tests.conftest import book_payload, customer_payload
+from tests.test_listing import add_books, isbn
+
+
+def test_bulk_lookup_keeps_request_order_and_reports_missing(client):
+    add_books(client, 3)
+    client.get(f'/books/{isbn(2)}')  # One of them is served from the cache
+
+    body = client.get(f'/books/?isbn={isbn(2)},{isbn(0)},9990000000000,{isbn(2)}&fields=ISBN').get_json()
+    assert body == {"books": [{"ISBN": isbn(2)}, {"ISBN": isbn(0)}], "missing": ["9990000000000"]}
+
+    body = client.post('/books/lookup', json={"isbns": [isbn(1)], "fields": ["title"]}).get_json()
+    assert body == {"books": [{"title": "Software Architecture in Practice"}], "missing": []}
+
+
+@pytest.mark.parametrize("body", [{}, {"isbns": "9780000000000"}, {"isbns": []}, {"isbns": [str(n) for n in range(101)]}])
+def test_invalid_bulk_lookups_are_400(client, body):
+    assert client.post('/books/lookup', json=body).status_code == 400
+
+
+def test_bulk_customer_lookup(client):
+    ids = [client.post('/customers/', json=customer_payload(f"user{n}@example.com")).get_json()["id"] for n in range(2)]
+
+    body = client.get(f'/customers/?ids={ids[1]},{ids[0]},999&fields=userId').get_json()
+    assert body["customers"] == [{"userId": "user1@example.com"}, {"userId": "user0@example.com"}]
+    assert body["missing"] == [999]
+    assert client.get('/customers/?ids=abc').status_code == 400
@@ -0,0 +1,69 @@
+import gzip
+
+from tests.conftest import book_payload
+
+ISBN = "9780321815736"
+GZIP = {'Accept-Encoding': 'gzip'}
+
+
+def test_conditional_get_and_put(client):
+    created = client.post('/books/', json=book_payload())
+    etag, last_modified = created.headers['ETag'], created.headers['Last-Modified']
+
+    assert client.get(f'/books/{ISBN}', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(f'/books/{ISBN}', headers={'If-Modified-Since': last_modified}).status_code == 304
+    # A field selection is another representation with its own tag
+    assert client.get(f'/books/{ISBN}?fields=title', headers={'If-None-Match': etag}).status_code == 200
+
+    assert client.put(f'/books/{ISBN}', json=book_payload(title="Second"), headers={'If-Match': etag}).status_code == 200
+    assert client.get(f'/books/{ISBN}', headers={'If-None-Match': etag}).status_code == 200
+    assert client.put(f'/books/{ISBN}', json=book_payload(title="Third"), headers={'If-Match': etag}).status_code == 412
+
+
+def test_put_of_a_missing_book_is_404_with_or_without_if_match(client):
+    missing = '/books/9990000000000'
+    assert client.put(missing, json=book_payload("9990000000000")).status_code == 404
+    assert client.put(missing, json=book_payload("9990000000000"), headers={'If-Match': '"1"'}).status_code == 404
+    assert client.put(missing, json=book_payload("9990000000000"), headers={'If-Match': '*'}).status_code == 404
+
+
+def add_book(client):
+    # Long enough to be compressed (COMPRESSION_MIN_SIZE)
+    client.post('/books/', json=book_payload(description="Seminal " * 200))
+
+
+def test_compressed_response_has_its_own_etag(client):
+    add_book(client)
+
+    plain = client.get(f'/books/{ISBN}')
+    compressed = client.get(f'/books/{ISBN}', headers=GZIP)
+
+    assert plain.headers['ETag'] == '"1"'
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.headers['ETag'] == '"1+gzip"'
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+
+
+def test_if_none_match_accepts_both_forms_and_echoes_the_client_tag(client):
+    add_book(client)
+
+    response = client.get(f'/books/{ISBN}', headers=dict(GZIP, **{'If-None-Match': '"1+gzip"'}))
+    assert response.status_code == 304
+    assert response.headers['ETag'] == '"1+gzip"'
+
+    response = client.get(f'/books/{ISBN}', headers={'If-None-Match': '"1"'})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == '"1"'
+
+    assert client.get(f'/books/{ISBN}', headers={'If-None-Match': '"2+gzip"'}).status_code == 200
+
+
+def test_if_match_accepts_a_compressed_tag(client):
+    add_book(client)
+
+    response = client.put(f'/books/{ISBN}', json=book_payload(title="Second"), headers={'If-Match': '"1+gzip"'})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"2"'
+
+    response = client.put(f'/books/{ISBN}', json=book_payload(title="Third"), headers={'If-Match': '"1+gzip"'})
+    assert response.status_code == 412
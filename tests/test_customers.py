@@ -0,0 +1,105 @@
+import threading
+
+from app.db import db
+from app.models.customer import Customer
+from tests.conftest import customer_payload
+
+THREADS = 16
+
+
+def post_concurrently(app, headers_for):
+    """
+    POSTs the same customer from THREADS threads released at once.
+    Returns:
+        list: (status code, replayed, JSON body) per request.
+    """
+    barrier = threading.Barrier(THREADS)
+    results = []
+    lock = threading.Lock()
+
+    def attempt(n):
+        client = app.test_client()
+        barrier.wait()
+        response = client.post('/customers/', json=customer_payload(), headers=headers_for(n))
+        with lock:
+            results.append((response.status_code, response.headers.get('Idempotent-Replayed') == 'true', response.get_json()))
+
+    threads = [threading.Thread(target=attempt, args=(n,)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def customer_count(app):
+    with app.app_context():
+        return db.session.query(Customer).count()
+
+
+def test_concurrent_retries_with_one_idempotency_key_create_one_customer(app):
+    results = post_concurrently(app, lambda n: {'Idempotency-Key': 'create-ada'})
+
+    created = [body["id"] for status, replayed, body in results if status == 201 and not replayed]
+    assert len(created) == 1
+    for status, replayed, body in results:
+        assert (status, replayed) in {(201, False), (201, True), (409, False), (422, False)}
+        if replayed:
+            assert body["id"] == created[0]
+    assert customer_count(app) == 1
+
+
+def test_concurrent_creates_of_one_user_id_create_one_customer(app):
+    results = post_concurrently(app, lambda n: {'Idempotency-Key': f'create-{n}'})
+
+    assert sorted(status for status, _, _ in results) == [201] + [422] * (THREADS - 1)
+    assert customer_count(app) == 1
+
+
+def test_replay_returns_the_stored_response_and_a_different_body_is_rejected(client):
+    first = client.post('/customers/', json=customer_payload(), headers={'Idempotency-Key': 'k1'})
+    replay = client.post('/customers/', json=customer_payload(), headers={'Idempotency-Key': 'k1'})
+    other = client.post('/customers/', json=customer_payload(name="Eve"), headers={'Idempotency-Key': 'k1'})
+
+    assert first.status_code == replay.status_code == 201
+    assert replay.headers['Idempotent-Replayed'] == 'true'
+    assert replay.get_json() == first.get_json()
+    assert other.status_code == 422
+
+
+def test_conditional_put(client):
+    customer = client.post('/customers/', json=customer_payload()).get_json()
+    etag = client.get(f'/customers/{customer["id"]}').headers['ETag']
+
+    updated = client.put(f'/customers/{customer["id"]}', json=customer_payload(name="Ada L."), headers={'If-Match': etag})
+    assert updated.status_code == 200
+    assert updated.headers['ETag'] != etag
+
+    stale = client.put(f'/customers/{customer["id"]}', json=customer_payload(name="Ada K."), headers={'If-Match': etag})
+    assert stale.status_code == 412
+    assert client.get(f'/customers/{customer["id"]}', headers={'If-None-Match': updated.headers['ETag']}).status_code == 304
+
+
+def test_put_of_a_missing_customer_is_404_with_or_without_if_match(client):
+    assert client.put('/customers/99', json=customer_payload()).status_code == 404
+    assert client.put('/customers/99', json=customer_payload(), headers={'If-Match': '"1"'}).status_code == 404
+
+
+def test_put_to_a_taken_user_id_is_rejected(client):
+    client.post('/customers/', json=customer_payload("ada@example.com"))
+    grace = client.post('/customers/', json=customer_payload("grace@example.com")).get_json()
+
+    assert client.put(f'/customers/{grace["id"]}', json=customer_payload("ada@example.com")).status_code == 422
+
+
+def test_unexpected_error_is_logged_not_returned(client, monkeypatch, caplog):
+    client.post('/customers/', json=customer_payload())
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("password=hunter2")
+    monkeypatch.setattr('app.routes.customer.serialize_customer', fail)
+
+    response = client.get('/customers/?userId=ada@example.com')
+    assert response.status_code == 500
+    assert response.get_json() == {"message": "An error occurred while retrieving the customer"}
+    assert caplog.records[-1].exc_info[1].args == ("password=hunter2",)
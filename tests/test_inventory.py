@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from app.db import db
+from app.models.book import Book
+from tests.conftest import book_payload
+
+ISBN = "9780321815736"
+THREADS = 16
+
+
+def test_concurrent_purchases_never_oversell(app, client):
+    client.post('/books/', json=book_payload(quantity=5))
+    barrier = threading.Barrier(THREADS)
+    statuses = []
+    lock = threading.Lock()
+
+    def purchase():
+        buyer = app.test_client()
+        barrier.wait()
+        status = buyer.post(f'/books/{ISBN}/purchase', json={"quantity": 1}).status_code
+        with lock:
+            statuses.append(status)
+
+    threads = [threading.Thread(target=purchase) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses.count(201) == 5
+    assert statuses.count(409) == THREADS - 5
+    with app.app_context():
+        assert db.session.query(Book.quantity).filter_by(ISBN=ISBN).scalar() == 0
+    assert client.get(f'/books/{ISBN}').get_json()["quantity"] == 0
+
+
+def test_reservation_holds_stock_until_purchased(client):
+    client.post('/books/', json=book_payload(quantity=2))
+
+    reservation = client.post(f'/books/{ISBN}/reserve', json={"quantity": 2})
+    assert reservation.status_code == 201
+    assert client.post(f'/books/{ISBN}/purchase', json={"quantity": 1}).status_code == 409
+
+    completed = client.post(f'/books/{ISBN}/purchase', json={"reservation_id": reservation.get_json()["id"]})
+    assert completed.status_code == 200
+    assert completed.get_json()["status"] == "purchased"
+    assert client.post(f'/books/{ISBN}/purchase', json={"reservation_id": reservation.get_json()["id"]}).status_code == 409
+
+
+def test_purchase_of_a_missing_book_is_404(client):
+    assert client.post(f'/books/{ISBN}/purchase', json={"quantity": 1}).status_code == 404
+
+
+@pytest.mark.parametrize("action", ["reserve", "purchase"])
+@pytest.mark.parametrize("body", [[1, 2], "2", 3, {"quantity": 0}, {"quantity": 1.5}])
+def test_malformed_bodies_are_400(client, action, body):
+    client.post('/books/', json=book_payload())
+
+    response = client.post(f'/books/{ISBN}/{action}', json=body)
+    assert response.status_code == 400
+    assert "message" in response.get_json()
+
+
+def test_inventory_routes_are_rate_limited_by_default(bare_app, monkeypatch):
+    monkeypatch.delenv('RATE_LIMIT_BLUEPRINTS', raising=False)
+    monkeypatch.setenv('RATE_LIMIT_ENABLED', '1')
+
+    from app import create_app
+    from app.ratelimit import rate_limiter
+
+    create_app()
+    assert 'inventory' in rate_limiter.blueprints
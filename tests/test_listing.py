@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from tests.conftest import book_payload
+
+
+def isbn(n):
+    return f"978{n:010d}"
+
+
+def add_books(client, count, **fields):
+    response = client.post('/books/batch', json=[book_payload(isbn(n), **fields) for n in range(count)])
+    assert response.get_json()["created"] == count
+
+
+def pages(client, query):
+    """
+    Follows a listing's cursors to the end.
+    Returns:
+        list: The ISBNs of every page, in order.
+    """
+    isbns, cursor = [], None
+    while True:
+        body = client.get(f'/books/?{query}' + (f'&cursor={cursor}' if cursor else '')).get_json()
+        isbns.extend(book["ISBN"] for book in body["books"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return isbns
+
+
+def test_pages_cover_the_catalog_once_in_order(client):
+    add_books(client, 25)
+
+    assert pages(client, 'limit=10') == [isbn(n) for n in range(25)]
+
+
+def test_cursor_is_stable_when_rows_are_added_before_it(client):
+    add_books(client, 20)
+    first = client.get('/books/?limit=10').get_json()
+
+    # A book that sorts before the cursor does not shift the next page
+    client.post('/books/', json=book_payload("9770000000000"))
+    second = client.get(f'/books/?limit=10&cursor={first["next_cursor"]}').get_json()
+
+    assert [book["ISBN"] for book in second["books"]] == [isbn(n) for n in range(10, 20)]
+    assert second["next_cursor"] is None
+
+
+def test_sorting_by_a_column_with_ties_neither_skips_nor_repeats(client):
+    client.post('/books/batch', json=[book_payload(isbn(n), price=f"{10 + n % 3}.00") for n in range(20)])
+
+    listed = pages(client, 'sort=price&limit=4')
+
+    assert sorted(listed) == [isbn(n) for n in range(20)]
+    prices = [float(f"{10 + int(book[-2:]) % 3}.00") for book in listed]
+    assert prices == sorted(prices)
+
+
+def test_filters_and_field_selection(client):
+    add_books(client, 4)
+    client.put(f'/books/{isbn(1)}', json=book_payload(isbn(1), genre="fiction", quantity=1))
+    client.post(f'/books/{isbn(1)}/purchase', json={"quantity": 1})
+
+    body = client.get('/books/?genre=fiction&fields=ISBN,quantity').get_json()
+    assert body == {"books": [{"ISBN": isbn(1), "quantity": 0}], "next_cursor": None}
+    assert isbn(1) not in [book["ISBN"] for book in client.get('/books/?in_stock=true').get_json()["books"]]
+    assert client.get('/books/?min_price=60').get_json()["books"] == []
+
+
+def test_large_pages_are_streamed_with_the_same_shape(app, client):
+    app.config['LIST_STREAM_THRESHOLD'] = 10
+    add_books(client, 30)
+
+    response = client.get('/books/?limit=20')
+    assert response.is_streamed
+    body = json.loads(response.get_data())
+    assert [book["ISBN"] for book in body["books"]] == [isbn(n) for n in range(20)]
+    assert pages(client, 'limit=20') == [isbn(n) for n in range(30)]
+
+
+@pytest.mark.parametrize("query", ["cursor=not-a-cursor", "sort=title", "limit=0", "min_price=cheap", "fields=nope"])
+def test_invalid_listing_parameters_are_400(client, query):
+    assert client.get(f'/books/?{query}').status_code == 400
+
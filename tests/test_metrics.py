@@ -0,0 +1,12 @@
+from tests.conftest import book_payload
+
+ISBN = "9780321815736"
+
+
+def test_metrics_count_requests_and_queries(client):
+    client.post('/books/', json=book_payload())
+    client.get(f'/books/{ISBN}')
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'endpoint="books.get_book"' in text
+    assert any(line.startswith('db_queries_total') and 'endpoint="books.add_book"' in line for line in text.splitlines())
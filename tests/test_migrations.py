@@ -0,0 +1,64 @@
+import sqlalchemy as sa
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask_migrate import upgrade
+
+from app.backfill import BACKFILLS
+from app.db import db, init_migrations
+from tests.conftest import customer_payload
+
+
+def migrate(app, revision='head'):
+    with app.app_context():
+        upgrade(revision=revision)
+
+
+def test_migrations_build_the_schema_of_the_models(bare_app):
+    init_migrations(bare_app)
+    migrate(bare_app)
+
+    with bare_app.app_context(), db.engine.connect() as connection:
+        assert compare_metadata(MigrationContext.configure(connection), db.metadata) == []
+
+
+def test_baseline_database_is_upgraded_and_backfilled(bare_app):
+    init_migrations(bare_app)
+    migrate(bare_app, '0001')
+    with bare_app.app_context():
+        columns = [column['name'] for column in sa.inspect(db.engine).get_columns('books')]
+        assert columns == ['ISBN', 'title', 'author', 'description', 'genre', 'price', 'quantity']
+        db.session.execute(sa.text("INSERT INTO books VALUES ('0-321-81573-4', 'T', 'A', 'D', 'g', 12.99, 3)"))
+        db.session.execute(sa.text("INSERT INTO customers (userId, name, phone, address, city, state, zipcode) "
+                                   "VALUES ('Ada@Example.com', 'Ada', '555', '1 Main St', 'Springfield', 'IL', '62701')"))
+        db.session.commit()
+
+    migrate(bare_app)
+    client = bare_app.test_client()
+    # Old rows have a version and are found by their exact keys before the backfill
+    assert client.get('/books/0-321-81573-4').headers['ETag'] == '"1"'
+    assert client.get('/customers/?userId=Ada@Example.com').status_code == 200
+    assert client.get('/customers/?userId=ada@example.com').status_code == 404
+
+    with bare_app.app_context():
+        for backfill in BACKFILLS.values():
+            backfill.run(pause=0)
+            assert backfill.remaining() == 0
+
+    # The other forms of a key are only looked up when enabled
+    assert client.get('/customers/?userId=ada@example.com').status_code == 404
+    assert client.get('/books/9780321815736').status_code == 404
+    bare_app.config.update(USER_ID_ANY_CASE=True, ISBN_REDIRECTS=True)
+    assert client.get('/customers/?userId=ada@example.com').get_json()["userId"] == "Ada@Example.com"
+    response = client.get('/books/9780321815736?fields=title')
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/0-321-81573-4?fields=title')
+
+
+def test_user_id_in_another_case_must_match_one_customer(app, client):
+    app.config['USER_ID_ANY_CASE'] = True
+    client.post('/customers/', json=customer_payload("Ada@Example.com"))
+    assert client.get('/customers/?userId=ada@example.com').get_json()["userId"] == "Ada@Example.com"
+
+    client.post('/customers/', json=customer_payload("ADA@example.com"))
+    assert client.get('/customers/?userId=ada@example.com').status_code == 404
+    assert client.get('/customers/?userId=ADA@example.com').get_json()["userId"] == "ADA@example.com"
@@ -0,0 +1,41 @@
+import threading
+import time
+
+from app.cache import SingleFlight
+
+ISBN = "9780321815736"
+
+
+def test_rate_limit_turns_away_a_burst(configured_app):
+    client = configured_app(RATE_LIMIT_ENABLED='1', RATE_LIMIT_RATE='0.001', RATE_LIMIT_BURST='3').test_client()
+
+    statuses = [client.get(f'/books/{ISBN}').status_code for _ in range(5)]
+    assert statuses == [404, 404, 404, 429, 429]
+    limited = client.get(f'/books/{ISBN}')
+    assert int(limited.headers['Retry-After']) >= 1
+    # Endpoints outside the limited blueprints are never turned away
+    assert all(client.get('/status').status_code == 200 for _ in range(5))
+
+
+def test_concurrent_loads_of_one_key_share_a_single_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return {"version": 1}
+
+    threads = [threading.Thread(target=flight.do, args=(ISBN, load)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while flight.stats()["coalesced"] < 7 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert flight.stats() == {"loads": 1, "coalesced": 7, "in_flight": 0}
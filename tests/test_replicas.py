@@ -0,0 +1,15 @@
+from tests.conftest import book_payload
+
+ISBN = "9780321815736"
+
+
+def test_writes_pin_the_client_to_the_primary(configured_app, tmp_path):
+    replica = configured_app(DATABASE_REPLICA_URLS=f"sqlite:///{tmp_path / 'test.db'}", READ_YOUR_WRITES_SECONDS='5',
+                             CATALOG_HTTP_TOKEN='s3cret')
+    client = replica.test_client()
+
+    created = client.post('/books/', json=book_payload())
+    assert created.status_code == 201
+    assert 'db_primary_until' in created.headers['Set-Cookie']
+    assert client.get(f'/books/{ISBN}').status_code == 200
+    assert client.get('/db/replicas', headers={'Authorization': 'Bearer s3cret'}).get_json()["replicas"] == {"replica0": {"healthy": True}}
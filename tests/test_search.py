@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+import sqlalchemy as sa
+
+from app.db import db, utcnow
+from app.search import BookSearch
+from app.search.index import InvertedIndex
+from tests.conftest import book_payload
+
+
+def worker_search(path=None, refresh_interval=30):
+    """
+    A search index as another worker process would hold it.
+    """
+    search = BookSearch()
+    search.path = path
+    search.refresh_interval = refresh_interval
+    return search
+
+
+def retitle(isbn, title):
+    """
+    Changes a book behind the back of every index, as a write on another worker does.
+    """
+    db.session.execute(sa.text("UPDATE books SET title = :title, version = version + 1, updated_at = :now WHERE ISBN = :isbn"),
+                       {"title": title, "now": utcnow() + timedelta(seconds=1), "isbn": isbn})
+    db.session.commit()
+
+
+def hits(search, query):
+    return [isbn for isbn, _ in search.index.search(query)]
+
+
+def test_search_endpoint_ranks_matching_books(client):
+    assert client.post('/books/', json=book_payload("1111111111", title="Distributed Systems")).status_code == 201
+    assert client.post('/books/', json=book_payload("2222222222", title="Gardening")).status_code == 201
+
+    response = client.get('/books/search?q=distrib')
+
+    assert response.status_code == 200
+    assert [book["ISBN"] for book in response.get_json()["results"]] == ["1111111111"]
+    assert client.get('/books/search').status_code == 400
+
+
+def test_saved_index_is_ignored_once_a_book_changed(app, client, tmp_path):
+    path = str(tmp_path / 'search.json')
+    assert client.post('/books/', json=book_payload("1111111111", title="Distributed Systems")).status_code == 201
+    with app.app_context():
+        first = worker_search(path)
+        first.ensure_ready()
+
+        # Same row count, but a newer write: the saved copy must not be used
+        retitle("1111111111", "Compilers")
+        second = worker_search(path)
+        second.ensure_ready()
+
+    assert hits(second, "compilers") == ["1111111111"]
+    assert hits(second, "distributed") == []
+
+
+def test_saved_index_is_loaded_when_the_catalog_is_unchanged(app, client, tmp_path):
+    path = str(tmp_path / 'search.json')
+    assert client.post('/books/', json=book_payload("1111111111", title="Distributed Systems")).status_code == 201
+    with app.app_context():
+        worker_search(path).ensure_ready()
+        loaded = worker_search(path)
+        loaded.build = None  # Fails the test if the index is rebuilt instead of loaded
+        loaded.ensure_ready()
+
+    assert hits(loaded, "distributed") == ["1111111111"]
+
+
+def test_refresh_picks_up_writes_of_other_workers(app, client):
+    assert client.post('/books/', json=book_payload("1111111111", title="Distributed Systems")).status_code == 201
+    with app.app_context():
+        search = worker_search(refresh_interval=30)
+        search.ensure_ready()
+        retitle("1111111111", "Compilers")
+
+        search.ensure_ready()
+        assert hits(search, "compilers") == []  # Not due yet
+
+        search.refreshed_at -= 30
+        search.ensure_ready()
+
+    assert hits(search, "compilers") == ["1111111111"]
+
+
+def test_exact_term_survives_prefix_expansion():
+    index = InvertedIndex()
+    index.add("rare", {"title": "Art"})
+    # 60 completions of "art", each more common than the exact term
+    for n in range(60):
+        index.add(f"common{n}", {"title": f"article{n} article{(n + 1) % 60}"})
+
+    assert "art" in index.suggest("art", limit=3)
+    assert index.search("art")[0][0] == "rare"
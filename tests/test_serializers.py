@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from app.serializers import OrjsonProvider, orjson
+from tests.conftest import book_payload
+
+pytestmark = pytest.mark.skipif(orjson is None, reason="orjson is not installed")
+
+BODY = {"title": "T", "ISBN": "9780321815736", "price": 59.95, "quantity": 10, "Author": "A"}
+
+
+def test_orjson_sorts_keys_like_the_default_provider(app):
+    provider = OrjsonProvider(app)
+
+    assert json.loads(provider.dumps(BODY)) == BODY
+    assert list(json.loads(provider.dumps(BODY))) == sorted(BODY)
+    with app.app_context():
+        assert list(json.loads(provider.response(BODY).get_data())) == sorted(BODY)
+
+
+def test_orjson_keeps_insertion_order_when_sorting_is_off(app):
+    provider = OrjsonProvider(app)
+    provider.sort_keys = False
+
+    assert list(json.loads(provider.dumps(BODY))) == list(BODY)
+
+
+def test_book_responses_match_the_standard_library_encoder(app, client):
+    client.post('/books/', json=book_payload())
+    fast = client.get('/books/9780321815736').get_data()
+    app.json = app.json_provider_class(app)
+
+    # The default provider ends the body with a newline
+    assert client.get('/books/9780321815736').get_data().rstrip(b"\n") == fast
@@ -0,0 +1,23 @@
+from app.db import pool_settings
+from app.serve import parse_args
+
+
+def test_settings_come_from_the_environment_unless_given(monkeypatch):
+    monkeypatch.setenv('WEB_CONCURRENCY', '3')
+    monkeypatch.setenv('WEB_THREADS', '8')
+    monkeypatch.setenv('PORT', '8080')
+
+    args = parse_args([])
+    assert (args.mode, args.workers, args.threads, args.bind) == ('sync', 3, 8, '0.0.0.0:8080')
+    assert parse_args(['--workers', '5', '--mode', 'async']).workers == 5
+
+
+def test_pool_is_sized_from_the_handler_threads(bare_app):
+    bare_app.config.update(SERVER_THREADS=16, DB_POOL_SIZE=None, DB_MAX_OVERFLOW=None)
+    assert pool_settings(bare_app) == (16, 4)
+
+    bare_app.config.update(SERVER_THREADS=0)
+    assert pool_settings(bare_app) == (10, 20)
+
+    bare_app.config.update(SERVER_THREADS=16, DB_POOL_SIZE='6', DB_MAX_OVERFLOW='1')
+    assert pool_settings(bare_app) == (6, 1)
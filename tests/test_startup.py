@@ -0,0 +1,33 @@
+import pytest
+
+AUTH = {'Authorization': 'Bearer s3cret'}
+
+
+def test_status_and_readiness(app, client):
+    app.config['CATALOG_HTTP_TOKEN'] = 's3cret'
+    assert client.get('/status').get_json() == {"message": "OK"}
+
+    app.extensions['startup'].warm_up()
+    ready = client.get('/ready')
+    assert ready.status_code == 200
+    assert ready.get_json()["components"]["database"]["state"] == "ready"
+    assert any(phase["name"] == "warm up database" for phase in client.get('/startup/profile', headers=AUTH).get_json()["phases"])
+
+
+@pytest.mark.parametrize("path", ['/startup/profile', '/cache/stats', '/ratelimit/stats', '/db/replicas'])
+def test_operator_endpoints_need_the_token(app, client, path):
+    assert client.get(path).status_code == 404
+
+    app.config['CATALOG_HTTP_TOKEN'] = 's3cret'
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get(path, headers=AUTH).status_code == 200
+
+
+def test_readiness_is_503_until_the_database_answers(configured_app, tmp_path):
+    unreachable = configured_app(DATABASE_URL=f"sqlite:///{tmp_path / 'missing' / 'test.db'}")
+
+    assert not unreachable.extensions['startup'].run_pending()
+    ready = unreachable.test_client().get('/ready')
+    assert ready.status_code == 503
+    assert ready.get_json()["components"]["database"]["state"] == "failed"
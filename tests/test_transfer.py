@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from tests.conftest import book_payload, customer_payload
+
+AUTH = {'Authorization': 'Bearer s3cret'}
+
+
+@pytest.fixture
+def catalog_app(app):
+    app.config['CATALOG_HTTP_TOKEN'] = 's3cret'
+    return app
+
+
+def ndjson(*rows):
+    return ''.join(json.dumps(row) + '\n' for row in rows).encode()
+
+
+def customer_row(customer_id, user_id, **fields):
+    row = customer_payload(user_id, **fields)
+    row['customer_id'] = customer_id
+    return row
+
+
+def test_http_endpoints_are_off_without_a_token(client):
+    assert client.get('/catalog/customers/export').status_code == 404
+    assert client.post('/catalog/customers/import', data=b'').status_code == 404
+
+
+def test_http_endpoints_require_the_token(catalog_app):
+    client = catalog_app.test_client()
+    assert client.get('/catalog/customers/export').status_code == 401
+    assert client.get('/catalog/customers/export', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/catalog/customers/export', headers=AUTH).status_code == 200
+
+
+def test_import_rejects_invalid_rows_and_keeps_the_rest(catalog_app):
+    client = catalog_app.test_client()
+    assert client.post('/customers/', json=customer_payload()).status_code == 201
+
+    body = ndjson(customer_row(1, "mallory@example.com", state="ZZ"), customer_row(None, "grace@example.com"), [1, 2])
+    response = client.post('/catalog/customers/import?format=ndjson', data=body, headers=AUTH)
+
+    assert response.status_code == 200
+    result = response.get_json()
+    assert (result["rows"], result["failed"]) == (1, 2)
+    assert [error["row"] for error in result["errors"]] == [1, 3]
+    assert "state" in result["errors"][0]["errors"]
+    assert client.get('/customers/1').get_json()["userId"] == "ada@example.com"
+
+
+def test_import_skips_rows_whose_user_id_belongs_to_another_customer(catalog_app):
+    client = catalog_app.test_client()
+    assert client.post('/customers/', json=customer_payload("ada@example.com")).status_code == 201
+
+    body = ndjson(
+        customer_row(None, "grace@example.com"),
+        customer_row(7, "ada@example.com"),  # Taken by customer 1
+        customer_row(None, "grace@example.com"),  # Taken by the first row
+        customer_row(1, "ada@example.com", name="Ada Lovelace"),  # Customer 1 itself
+    )
+    response = client.post('/catalog/customers/import?format=ndjson', data=body, headers=AUTH)
+
+    result = response.get_json()
+    assert response.status_code == 200
+    assert (result["rows"], result["failed"]) == (2, 2)
+    assert [error["row"] for error in result["errors"]] == [2, 3]
+    assert client.get('/customers/1').get_json()["name"] == "Ada Lovelace"
+
+
+def test_csv_export_round_trips_through_import(catalog_app):
+    client = catalog_app.test_client()
+    assert client.post('/books/', json=book_payload("1111111111", price="10.10")).status_code == 201
+    assert client.post('/books/', json=book_payload("2222222222")).status_code == 201
+
+    exported = client.get('/catalog/books/export?format=csv', headers=AUTH).data
+    response = client.post('/catalog/books/import?format=csv', data=exported, headers=AUTH)
+
+    assert response.status_code == 200
+    assert response.get_json()["rows"] == 2
+
+
+def test_import_rejects_books_that_fail_the_schema(catalog_app):
+    client = catalog_app.test_client()
+    row = dict(book_payload(), author="Bass", price=12.999)
+    del row["Author"]
+
+    response = client.post('/catalog/books/import?format=ndjson', data=ndjson(row), headers=AUTH)
+
+    assert response.status_code == 200
+    assert list(response.get_json()["errors"][0]["errors"]) == ["price"]
+    assert client.get('/books/9780321815736').status_code == 404
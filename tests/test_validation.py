@@ -0,0 +1,105 @@
+import pytest
+
+from app.validation import BOOK_SCHEMA, BOOK_UPDATE_SCHEMA, CUSTOMER_SCHEMA, error_body
+from tests.conftest import book_payload, customer_payload
+
+
+def test_valid_book_is_cleaned():
+    fields, errors = BOOK_SCHEMA.validate(book_payload(ISBN=9780321815736, price="59.95", quantity="10"))
+
+    assert errors == {}
+    assert fields["ISBN"] == "9780321815736"
+    assert fields["price"] == 59.95
+    assert fields["quantity"] == 10
+
+
+@pytest.mark.parametrize("quantity, expected", [(3, 3), (3.0, 3), ("3", 3)])
+def test_whole_quantities_are_accepted(quantity, expected):
+    fields, errors = BOOK_SCHEMA.validate(book_payload(quantity=quantity))
+
+    assert errors == {}
+    assert fields["quantity"] == expected
+
+
+@pytest.mark.parametrize("quantity", [3.5, "3.0", "three", True, [3]])
+def test_other_quantities_are_rejected(quantity):
+    _, errors = BOOK_SCHEMA.validate(book_payload(quantity=quantity))
+
+    assert errors == {"quantity": "quantity must be a whole number."}
+
+
+@pytest.mark.parametrize("field, value", [("quantity", 0), ("price", 0.0), ("ISBN", ""), ("title", False)])
+def test_falsy_values_are_missing(field, value):
+    _, errors = BOOK_SCHEMA.validate(book_payload(**{field: value}))
+
+    assert errors == {field: f"{field} is a mandatory field and cannot be empty."}
+
+
+@pytest.mark.parametrize("price", ["12.99", "-1.00", 12.55])
+def test_prices_with_two_decimals_are_accepted(price):
+    fields, errors = BOOK_SCHEMA.validate(book_payload(price=price))
+
+    assert errors == {}
+    assert fields["price"] == float(price)
+
+
+@pytest.mark.parametrize("price", [12.5, 12, "12.999", "12.ab"])
+def test_other_prices_are_rejected(price):
+    _, errors = BOOK_SCHEMA.validate(book_payload(price=price))
+
+    assert errors == {"price": "Price must have exactly two decimal points."}
+
+
+def test_every_book_error_is_reported():
+    _, errors = BOOK_SCHEMA.validate({"ISBN": True, "title": "", "price": 5.5, "quantity": 1})
+
+    assert errors == {
+        "ISBN": "ISBN must be a string.",
+        "title": "title is a mandatory field and cannot be empty.",
+        "Author": "Author is a mandatory field and cannot be empty.",
+        "description": "description is a mandatory field and cannot be empty.",
+        "genre": "genre is a mandatory field and cannot be empty.",
+        "price": "Price must have exactly two decimal points.",
+    }
+
+
+def test_missing_fields_are_reported_first():
+    _, errors = BOOK_SCHEMA.validate(book_payload(price=5.5, quantity=0))
+
+    assert error_body(errors) == {
+        "message": "quantity is a mandatory field and cannot be empty.",
+        "errors": {"quantity": "quantity is a mandatory field and cannot be empty.",
+                   "price": "Price must have exactly two decimal points."},
+    }
+
+
+def test_update_schema_does_not_require_the_isbn():
+    payload = book_payload()
+    del payload["ISBN"]
+
+    assert BOOK_UPDATE_SCHEMA.validate(payload)[1] == {}
+
+
+@pytest.mark.parametrize("body", [[], "book", 3, None])
+def test_non_object_bodies_are_rejected(body):
+    assert BOOK_SCHEMA.validate(body) == ({}, {"body": "Request body must be a JSON object."})
+
+
+def test_customer_checks_email_and_state_and_allows_no_address2():
+    fields, errors = CUSTOMER_SCHEMA.validate(customer_payload(state="il"))
+    assert errors == {}
+    assert fields["address2"] is None
+
+    _, errors = CUSTOMER_SCHEMA.validate(customer_payload(user_id="not-an-email", state="XX"))
+    assert list(errors) == ["userId", "state"]
+    assert errors == {
+        "userId": "Invalid email format for userId",
+        "state": "Invalid state format. Must be a 2-letter US state abbreviation",
+    }
+
+
+@pytest.mark.parametrize("field, value", [("userId", ["ada@example.com"]), ("state", 17)])
+def test_customer_fields_of_the_wrong_type_are_rejected(field, value):
+    _, errors = CUSTOMER_SCHEMA.validate(customer_payload(**{field: value}))
+
+    assert list(errors) == [field]